@@ -0,0 +1,242 @@
+"""Benchmark do caminho de download (MB/s e CPU por byte).
+
+Sobe um servidor HTTP local (em outro processo, com sendfile e suporte a
+Range) servindo um arquivo aleatório e compara:
+
+  - o laço antigo: iter_content(8 KiB) + progress.update() a cada bloco;
+  - copy_response() com uma conexão (readinto + progresso limitado);
+  - ranged_download() com várias conexões.
+
+Todos os casos calculam o SHA-1 do arquivo, como em uma instalação real. O
+tempo de CPU medido é só o do cliente (time.process_time, todas as threads).
+
+Uso:
+    python benchmarks/bench_download.py [--size-mb 512] [--repeat 3]
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from rich.console import Console  # noqa: E402
+from rich.progress import Progress  # noqa: E402
+from rich.table import Table  # noqa: E402
+
+from easymcserver.downloader.ranged import ranged_download  # noqa: E402
+from easymcserver.downloader.session import new_session  # noqa: E402
+from easymcserver.downloader.transfer import Throttle, copy_response  # noqa: E402
+
+console = Console()
+
+
+# --- Servidor -------------------------------------------------------------
+
+
+def serve(path: str, port_file: str):
+    size = os.path.getsize(path)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            start, end = 0, size - 1
+            match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if match:
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else size - 1
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", '"bench"')
+            self.end_headers()
+            with open(path, "rb") as f:
+                try:
+                    self.connection.sendfile(f, start, end - start + 1)
+                except OSError:
+                    pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    with open(port_file, "w") as f:
+        f.write(str(server.server_address[1]))
+    server.serve_forever()
+
+
+def start_server(path: str):
+    port_file = path + ".port"
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", path, "--port-file", port_file]
+    )
+    for _ in range(100):
+        if os.path.exists(port_file) and os.path.getsize(port_file):
+            with open(port_file) as f:
+                port = int(f.read())
+            with socket.create_connection(("127.0.0.1", port), timeout=5):
+                return process, f"http://127.0.0.1:{port}/file.bin"
+        time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("o servidor de benchmark não iniciou")
+
+
+# --- Casos ----------------------------------------------------------------
+
+
+def _progress():
+    # Renderização real do Rich, mas descartada (não polui o terminal)
+    return Progress(console=Console(file=io.StringIO(), force_terminal=True))
+
+
+def legacy_loop(url, dest, session, expected):
+    sha1 = hashlib.sha1()
+    with _progress() as progress:
+        task = progress.add_task("bench", total=None)
+        with session.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            total = int(response.headers.get("content-length", 0))
+            progress.update(task, total=total)
+            with open(dest, "wb") as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if chunk:
+                        f.write(chunk)
+                        progress.update(task, advance=len(chunk))
+    # O laço antigo não tinha hash; a verificação precisava reler o arquivo
+    with open(dest, "rb") as f:
+        while block := f.read(1024 * 1024):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def single_stream(url, dest, session, expected):
+    sha1 = hashlib.sha1()
+    with _progress() as progress:
+        task = progress.add_task("bench", total=None)
+        report = Throttle(
+            lambda done, total: progress.update(task, completed=done, total=total)
+        )
+        done = 0
+
+        def advance(n):
+            nonlocal done
+            done += n
+            report(done, None)
+
+        with session.get(
+            url, headers={"Accept-Encoding": "identity"}, stream=True, timeout=30
+        ) as response:
+            response.raise_for_status()
+            with open(dest, "wb", buffering=0) as f:
+                copy_response(response, f, on_bytes=advance, hashers=[sha1])
+    return sha1.hexdigest()
+
+
+def make_ranged(segments):
+    def run(url, dest, session, expected):
+        with _progress() as progress:
+            task = progress.add_task("bench", total=None)
+            ranged_download(
+                url,
+                dest,
+                segments=segments,
+                session=session,
+                expected_hash=expected,
+                on_progress=lambda done, total: progress.update(
+                    task, completed=done, total=total
+                ),
+            )
+        # ranged_download já lança ValueError se o hash não conferir
+        return expected
+
+    return run
+
+
+# --- Execução -------------------------------------------------------------
+
+
+def measure(case, url, dest, session, expected):
+    if os.path.exists(dest):
+        os.remove(dest)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    digest = case(url, dest, session, expected)
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    if digest != expected:
+        raise RuntimeError(f"hash incorreto em {case}: {digest}")
+    return wall, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--segments", type=int, default=4)
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--port-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port_file)
+        return
+
+    size = args.size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory(prefix="easymc-bench-") as tmp:
+        source = os.path.join(tmp, "file.bin")
+        console.print(f"Gerando arquivo de teste ({args.size_mb} MB)...")
+        sha1 = hashlib.sha1()
+        with open(source, "wb") as f:
+            for _ in range(0, size, 4 * 1024 * 1024):
+                block = os.urandom(4 * 1024 * 1024)
+                sha1.update(block)
+                f.write(block)
+        expected = sha1.hexdigest()
+
+        process, url = start_server(source)
+        session = new_session()
+        cases = [
+            ("iter_content 8 KiB (antigo)", legacy_loop),
+            ("copy_response, 1 conexão", single_stream),
+            (f"ranged_download, {args.segments} conexões", make_ranged(args.segments)),
+        ]
+        table = Table(title=f"Download de {args.size_mb} MB (mediana de {args.repeat})")
+        for column in ("Caso", "MB/s", "CPU (s)", "CPU ns/byte"):
+            table.add_column(column, justify="left" if column == "Caso" else "right")
+        try:
+            for name, case in cases:
+                dest = os.path.join(tmp, "out.bin")
+                runs = [
+                    measure(case, url, dest, session, expected)
+                    for _ in range(args.repeat)
+                ]
+                wall = statistics.median(r[0] for r in runs)
+                cpu = statistics.median(r[1] for r in runs)
+                table.add_row(
+                    name,
+                    f"{size / wall / 1e6:.0f}",
+                    f"{cpu:.2f}",
+                    f"{cpu / size * 1e9:.2f}",
+                )
+        finally:
+            process.kill()
+            session.close()
+        console.print(table)
+
+
+if __name__ == "__main__":
+    main()
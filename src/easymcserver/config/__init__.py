@@ -1,3 +1,8 @@
 """Config and properties utilities."""
 
-__all__ = ["server_properties", "auto_start_stop_java"]
+__all__ = [
+    "server_properties",
+    "apply_properties",
+    "auto_start_stop_java",
+    "apply_jvm_flags",
+]
@@ -0,0 +1,433 @@
+# Benchmark de inicialização: compara perfis de flags da JVM
+#
+# O mesmo diretório de servidor é iniciado várias vezes com cada perfil,
+# alternando os perfis a cada rodada para que aquecimento de cache de disco
+# ou variação de frequência da CPU não favoreçam um deles. De cada boot saem
+# o tempo informado pelo servidor ("Done (X.XXXs)!"), o tempo de parede até
+# essa linha e o pico de memória (RSS) do processo e seus filhos. O resultado
+# vai para um JSON com a descrição da máquina, para comparar entre hosts.
+
+import json
+import math
+import os
+import platform
+import socket
+import statistics
+import threading
+import time
+from collections import deque
+import psutil
+from rich.console import Console
+from rich.table import Table
+from easymcserver.config.cds import (
+    flag_position,
+    launch_file,
+    launch_flags,
+    script_command,
+)
+from easymcserver.config.jvm_args import determine_jvm_args_list
+from easymcserver.config.launch import java_executable, jvm_args_for
+from easymcserver.downloader.cache import file_digest
+from easymcserver.system.cgroup import get_limits
+from easymcserver.system.jdk import describe_jdk
+from easymcserver.system.supervisor import DONE_RE, boot_until_done
+
+console = Console()
+
+RESULT_VERSION = 1
+# Nível de confiança dos intervalos da mediana
+CONFIDENCE = 0.95
+# Intervalo entre leituras de memória do processo (s)
+RSS_INTERVAL = 0.05
+
+# Nome curto de cada perfil, a partir da flag do coletor de lixo
+_GC_PROFILES = {
+    "-XX:+UseG1GC": "g1",
+    "-XX:+UseZGC": "zgc",
+    "-XX:+ZGenerational": "zgc-gen",
+    "-XX:+UseShenandoahGC": "shenandoah",
+    "-XX:+UseConcMarkSweepGC": "cms",
+}
+
+
+def _suggestion_version(feature: int) -> str:
+    """Versão mais próxima (sem passar) entre as que têm sugestões de flags."""
+    if feature < 17:
+        return "1.8"
+    return str(max(v for v in (17, 21, 25) if v <= feature))
+
+
+def default_profiles(feature: int):
+    """Perfis padrão para o Java `feature`: {nome: [flags]}.
+
+    "atual" é o script de inicialização como está; os demais usam cada
+    coletor sugerido para essa versão (e o G1 também com as flags de
+    desempenho sugeridas).
+    """
+    collectors, _, perf_flags = determine_jvm_args_list(_suggestion_version(feature))
+    profiles = {"atual": []}
+    for option in collectors:
+        # Uma opção de coletor pode ter mais de uma flag (ex.: ZGC geracional)
+        flags = option.split()
+        profiles[_GC_PROFILES.get(flags[-1], flags[-1].lstrip("-X:+"))] = flags
+    if "g1" in profiles:
+        # G1NewSizePercent é uma opção experimental
+        unlock = "-XX:+UnlockExperimentalVMOptions"
+        profiles["g1-perf"] = (
+            ["-XX:+UseG1GC"] + ([] if unlock in perf_flags else [unlock]) + perf_flags
+        )
+    return profiles
+
+
+def parse_profile(text: str, available: dict):
+    """Lê um perfil: "nome" (padrão) ou "nome=flags separadas por espaço"."""
+    name, sep, flags = text.partition("=")
+    name = name.strip()
+    if sep:
+        return name, flags.split()
+    if name not in available:
+        raise ValueError(
+            f"perfil desconhecido: {name!r} (disponíveis: {', '.join(available)})"
+        )
+    return name, available[name]
+
+
+# --- Medição --------------------------------------------------------------
+
+
+class _RssSampler(threading.Thread):
+    """Lê periodicamente o RSS somado do processo e de todos os seus filhos.
+
+    O script de inicialização é um shell que executa o java: sem os filhos,
+    o pico medido seria o do shell.
+    """
+
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak = 0
+        self._finished = threading.Event()
+
+    def run(self):
+        try:
+            root = psutil.Process(self.pid)
+        except psutil.NoSuchProcess:
+            return
+        while not self._finished.is_set():
+            try:
+                processes = [root] + root.children(recursive=True)
+            except psutil.NoSuchProcess:
+                break
+            total = 0
+            for process in processes:
+                try:
+                    total += process.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            self.peak = max(self.peak, total)
+            self._finished.wait(RSS_INTERVAL)
+
+    def stop(self):
+        self._finished.set()
+        self.join()
+
+
+def run_once(directory: str, command):
+    """Um boot completo. Retorna {"done", "wall", "peak_rss"} ou None se falhar."""
+    state = {"sampler": None, "done_at": None}
+    tail = deque(maxlen=5)
+
+    def on_start(process):
+        state["sampler"] = _RssSampler(process.pid)
+        state["sampler"].start()
+
+    def on_line(line):
+        tail.append(line.rstrip())
+        if state["done_at"] is None and DONE_RE.search(line):
+            state["done_at"] = time.perf_counter()
+
+    started = time.perf_counter()
+    try:
+        done = boot_until_done(directory, command, on_line=on_line, on_start=on_start)
+    finally:
+        if state["sampler"]:
+            state["sampler"].stop()
+    if done is None or state["done_at"] is None:
+        for line in tail:
+            console.print(f"  [dim]{line}[/dim]")
+        return None
+    return {
+        "done": done,
+        "wall": state["done_at"] - started,
+        "peak_rss": state["sampler"].peak,
+    }
+
+
+# --- Estatística ----------------------------------------------------------
+
+
+def _binomial_cdf(k: int, n: int) -> float:
+    """P(X <= k) para X ~ Binomial(n, 1/2)."""
+    return sum(math.comb(n, i) for i in range(k + 1)) / 2**n
+
+
+def median_interval(values, confidence: float = CONFIDENCE):
+    """Mediana e intervalo de confiança sem supor distribuição.
+
+    Usa as estatísticas de ordem: o intervalo [x(k), x(n-k+1)] contém a
+    mediana real com probabilidade 1 - 2·P(X < k), X ~ Binomial(n, 1/2).
+    Tempos de boot têm cauda longa (um boot lento por I/O, GC...), então a
+    mediana e esse intervalo são mais honestos que média e desvio padrão.
+    Retorna (mediana, mínimo, máximo, confiança obtida); com poucas medições
+    o intervalo é o mais estreito que ainda atinge `confidence`, ou todo o
+    intervalo de valores se nem ele atingir.
+    """
+    data = sorted(values)
+    n = len(data)
+    median = statistics.median(data)
+    k = 1
+    while k + 1 <= (n + 1) // 2 and 1 - 2 * _binomial_cdf(k, n) >= confidence:
+        k += 1
+    coverage = 1 - 2 * _binomial_cdf(k - 1, n)
+    return median, data[k - 1], data[n - k], coverage
+
+
+def summarize(runs):
+    """Resumo por perfil: mediana e intervalo de cada métrica."""
+    summary = {}
+    for profile in dict.fromkeys(r["profile"] for r in runs):
+        ok = [r for r in runs if r["profile"] == profile and r["done"] is not None]
+        entry = {
+            "runs": len(ok),
+            "failures": sum(r["profile"] == profile for r in runs) - len(ok),
+        }
+        for metric in ("done", "wall", "peak_rss"):
+            if ok:
+                median, low, high, coverage = median_interval([r[metric] for r in ok])
+                entry[metric] = {
+                    "median": median,
+                    "ci_low": low,
+                    "ci_high": high,
+                    "confidence": coverage,
+                }
+        summary[profile] = entry
+    return summary
+
+
+# --- Máquina --------------------------------------------------------------
+
+
+def _cpu_model():
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def machine_info(java: str = "java"):
+    frequency = psutil.cpu_freq()
+    return {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "cpu": _cpu_model(),
+        "cpu_logical": psutil.cpu_count(),
+        "cpu_physical": psutil.cpu_count(logical=False),
+        "cpu_max_mhz": frequency.max if frequency else None,
+        "memory_total": psutil.virtual_memory().total,
+        # Limites do contêiner, se houver: explicam diferenças entre máquinas iguais
+        "cgroup": get_limits(),
+        "python": platform.python_version(),
+        "jdk": describe_jdk(java),
+    }
+
+
+# --- Execução -------------------------------------------------------------
+
+
+def _print_summary(summary, title):
+    table = Table(title=title)
+    table.add_column("Perfil", style="cyan")
+    table.add_column("Boots", justify="right")
+    table.add_column('"Done" (s)', justify="right")
+    table.add_column("Parede (s)", justify="right")
+    table.add_column("Pico RSS (MB)", justify="right")
+
+    def cell(entry, metric, scale=1, fmt=".2f"):
+        if metric not in entry:
+            return "-"
+        m = entry[metric]
+        return (
+            f"{m['median'] / scale:{fmt}} "
+            f"[dim]({m['ci_low'] / scale:{fmt}}–{m['ci_high'] / scale:{fmt}})[/dim]"
+        )
+
+    for profile, entry in summary.items():
+        boots = str(entry["runs"])
+        if entry["failures"]:
+            boots += f" [red](+{entry['failures']} falhas)[/red]"
+        table.add_row(
+            profile,
+            boots,
+            cell(entry, "done"),
+            cell(entry, "wall"),
+            cell(entry, "peak_rss", 1024**2, ".0f"),
+        )
+    console.print(table)
+    confidences = [
+        entry["done"]["confidence"] for entry in summary.values() if "done" in entry
+    ]
+    if confidences:
+        console.print(
+            f"[dim]Mediana (intervalo de confiança de {min(confidences) * 100:.0f}% ou mais).[/dim]"
+        )
+
+
+def run_benchmark(
+    directory: str,
+    profiles=None,
+    runs: int = 5,
+    warmup: int = 1,
+    java: str = None,
+    output: str = None,
+) -> bool:
+    """Inicia o servidor `runs` vezes com cada perfil e mostra as medianas.
+
+    `profiles` é uma lista de "nome" ou "nome=flags" (padrão: todos os
+    perfis sugeridos para o Java detectado). Os boots de aquecimento
+    (o primeiro gera o mundo de um servidor novo) não entram no resultado.
+    """
+    if java is None:
+        # Padrão: o Java do script de inicialização (escolhido pela versão do servidor)
+        java = java_executable(directory)
+    jdk = describe_jdk(java)
+    if not jdk:
+        console.print(
+            "[bold red][ERRO][/bold red] O Java não está instalado ou não está no PATH. Instale-o e tente novamente."
+        )
+        return False
+    command = script_command(directory)
+    if not command:
+        console.print(
+            "[bold red][ERRO][/bold red] Script de inicialização Java não encontrado. Instale o servidor primeiro."
+        )
+        return False
+    command[0] = java
+    # As flags do jvm_args.txt ficam só no perfil "atual"; os demais partem sem elas
+    current, _ = jvm_args_for(directory, java)
+    for i in range(len(command) - len(current) + 1):
+        if current and command[i : i + len(current)] == current:
+            del command[i : i + len(current)]
+            break
+    position = flag_position(command)
+    # Todos os perfis mantêm o CDS, se ativado, para medir só a diferença das flags
+    cds_flags = launch_flags(directory, java)
+    command[position:position] = cds_flags
+    position += len(cds_flags)
+
+    available = default_profiles(jdk["feature"])
+    try:
+        selected = dict(parse_profile(p, available) for p in profiles or available)
+    except ValueError as e:
+        console.print(f"[bold red][ERRO][/bold red] {e}")
+        return False
+    if selected.get("atual") == []:
+        selected["atual"] = current
+
+    def with_flags(flags):
+        return command[:position] + list(flags) + command[position:]
+
+    for i in range(warmup):
+        console.print(f"[cyan]Boot de aquecimento {i + 1}/{warmup}...[/cyan]")
+        if run_once(directory, command) is None:
+            console.print(
+                "[bold red][ERRO][/bold red] O servidor não terminou de iniciar (veja logs/latest.log)."
+            )
+            return False
+
+    results = []
+    rejected = set()
+    for round_number in range(1, runs + 1):
+        for name, flags in selected.items():
+            if name in rejected:
+                continue
+            console.print(f"[cyan]Rodada {round_number}/{runs}: {name}...[/cyan]")
+            measured = run_once(directory, with_flags(flags))
+            if measured is None:
+                console.print(
+                    f'[bold yellow][AVISO][/bold yellow] O perfil [cyan]{name}[/cyan] não chegou ao "Done".'
+                )
+                measured = {"done": None, "wall": None, "peak_rss": None}
+                # Um perfil que falha logo no primeiro boot não é suportado por este JDK
+                if round_number == 1:
+                    rejected.add(name)
+            results.append(
+                {"profile": name, "flags": flags, "run": round_number, **measured}
+            )
+
+    summary = summarize(results)
+    _print_summary(
+        summary, f"Inicialização — {os.path.basename(os.path.abspath(directory))}"
+    )
+
+    if output:
+        data = {
+            "version": RESULT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "machine": machine_info(java),
+            "server": {
+                "directory": os.path.abspath(directory),
+                "launch_file": os.path.basename(launch_file(directory)),
+                "launch_sha256": file_digest(launch_file(directory), "sha256"),
+                "command": command,
+            },
+            "settings": {"runs": runs, "warmup": warmup, "confidence": CONFIDENCE},
+            "profiles": selected,
+            "runs": results,
+            "summary": summary,
+        }
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        console.print(f"[bold green][OK][/bold green] Resultados salvos em {output}.")
+    return True
+
+
+def compare_results(paths) -> bool:
+    """Mostra lado a lado o "Done" mediano de cada perfil em vários arquivos."""
+    loaded = []
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                loaded.append((path, json.load(f)))
+        except (OSError, json.JSONDecodeError) as e:
+            console.print(
+                f"[bold red][ERRO][/bold red] Não foi possível ler {path}: {e}"
+            )
+            return False
+
+    table = Table(title='"Done" mediano (s) por máquina')
+    table.add_column("Perfil", style="cyan")
+    for path, data in loaded:
+        machine = data.get("machine", {})
+        jdk = machine.get("jdk") or {}
+        table.add_column(
+            f"{machine.get('hostname', path)}\n[dim]{machine.get('cpu', '')}\n"
+            f"Java {jdk.get('runtime', '?')}[/dim]",
+            justify="right",
+        )
+    profiles = dict.fromkeys(p for _, data in loaded for p in data.get("summary", {}))
+    for profile in profiles:
+        row = [profile]
+        for _, data in loaded:
+            entry = data["summary"].get(profile, {}).get("done")
+            row.append(
+                f"{entry['median']:.2f} [dim]({entry['ci_low']:.2f}–{entry['ci_high']:.2f})[/dim]"
+                if entry
+                else "-"
+            )
+        table.add_row(*row)
+    console.print(table)
+    return True
@@ -0,0 +1,284 @@
+# CDS/AppCDS: arquivo de classes pré-processadas para acelerar a inicialização
+#
+# Um boot de treino com -XX:ArchiveClassesAtExit grava as classes carregadas
+# pelo servidor; nas próximas inicializações a JVM mapeia esse arquivo em vez
+# de ler e verificar cada classe dos jars. O arquivo fica no cache, com nome
+# derivado do hash do jar (ou argfile) e da identidade do JDK: trocar qualquer
+# um dos dois aponta para outro arquivo, e um arquivo incompatível é ignorado
+# pela própria JVM.
+
+import hashlib
+import json
+import os
+import re
+import shlex
+from rich.console import Console
+from easymcserver.downloader.cache import file_digest, get_cache_dir
+from easymcserver.system.jdk import describe_jdk
+from easymcserver.system.supervisor import boot_until_done
+
+console = Console()
+
+# Arquivo no diretório do servidor que indica que o CDS está ativado
+MARKER_FILE = ".easymc-cds.json"
+# -XX:ArchiveClassesAtExit (arquivo dinâmico) existe a partir do JDK 13
+MIN_FEATURE = 13
+# A partir do JDK 19 a JVM recria sozinha um arquivo ausente ou desatualizado
+AUTO_CREATE_FEATURE = 19
+
+_CDS_FLAG_RE = re.compile(
+    r"^-XX:(SharedArchiveFile=|ArchiveClassesAtExit=|[+-]AutoCreateSharedArchive$)"
+)
+
+
+def launch_java(directory: str) -> str:
+    """Java que o script de inicialização usa (ver config/launch.py)."""
+    # Importação local: o launch usa as funções deste módulo
+    from easymcserver.config.launch import java_executable
+
+    return java_executable(directory)
+
+
+def launch_file(directory: str):
+    """Jar (ou argfile do NeoForge) que a JVM executa para este servidor."""
+    # Importação local: utils importa este módulo para montar o script
+    from easymcserver.utils import get_launch_target
+
+    target = get_launch_target(directory)
+    rel = target[1:] if target.startswith("@") else target.split(" ", 1)[1]
+    return os.path.join(directory, rel)
+
+
+def archive_key(directory: str, jdk: dict) -> str:
+    """Chave do arquivo CDS: hash do jar + versão e instalação do JDK."""
+    digest = file_digest(launch_file(directory), "sha256")[:16]
+    jdk_hash = hashlib.sha1(
+        f"{jdk['runtime']}|{jdk['vendor']}|{jdk['home']}".encode()
+    ).hexdigest()[:8]
+    runtime = re.sub(r"[^A-Za-z0-9.]+", "_", jdk["runtime"])
+    return f"{digest}-jdk{runtime}-{jdk_hash}"
+
+
+def archive_path(key: str):
+    return get_cache_dir() / "cds" / f"{key}.jsa"
+
+
+def _read_marker(directory):
+    try:
+        with open(os.path.join(directory, MARKER_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_marker(directory, marker):
+    with open(os.path.join(directory, MARKER_FILE), "w", encoding="utf-8") as f:
+        json.dump(marker, f, indent=2)
+
+
+def launch_flags(directory: str, java: str = None):
+    """Flags de CDS para o script de inicialização ([] se desativado).
+
+    O arquivo é o do JDK que vai executar o servidor (`java`, padrão: o do
+    script), não o do treino: se o JDK mudar, a chave muda junto.
+    """
+    marker = _read_marker(directory)
+    if not marker or not marker.get("enabled"):
+        return []
+    jdk = describe_jdk(java or launch_java(directory))
+    if not jdk or jdk["feature"] < MIN_FEATURE:
+        return []
+    try:
+        path = archive_path(archive_key(directory, jdk))
+    except OSError:
+        return []
+    if jdk["feature"] >= AUTO_CREATE_FEATURE:
+        return ["-XX:+AutoCreateSharedArchive", f"-XX:SharedArchiveFile={path}"]
+    return [f"-XX:SharedArchiveFile={path}"] if path.exists() else []
+
+
+# --- Script de inicialização ----------------------------------------------
+
+
+def _script_path(directory):
+    return os.path.join(directory, "start.bat" if os.name == "nt" else "start.sh")
+
+
+def _split(line):
+    return shlex.split(line, posix=os.name != "nt")
+
+
+def join_command(args):
+    """Junta os argumentos numa linha de comando para o script (sh ou cmd)."""
+    if os.name == "nt":
+        return " ".join(f'"{a}"' if " " in a else a for a in args)
+    return shlex.join(args)
+
+
+# Prefixos que o launcher põe antes do java (ver config/launch.py)
+_WRAPPERS = {"exec", "numactl", "taskset", "nice", "ionice", "start"}
+_WRAPPER_VALUE_RE = re.compile(r"^[0-9A-Fa-f][0-9A-Fa-f,\-]*$")
+
+
+def java_index(args):
+    """Posição do java na linha, pulando os prefixos do launcher; None se não houver."""
+    for i, arg in enumerate(args):
+        if os.path.basename(arg).lower() in ("java", "java.exe"):
+            return i
+        if i == 0 and arg not in _WRAPPERS:
+            return None
+        if arg in _WRAPPERS or arg.startswith("-") or _WRAPPER_VALUE_RE.match(arg):
+            continue
+        if os.name == "nt" and (arg.startswith("/") or arg in ('""', "")):
+            continue
+        return None
+    return None
+
+
+def is_java_line(line: str) -> bool:
+    """True se a linha do script executa o java (do PATH ou de um JDK específico)."""
+    try:
+        args = _split(line.strip())
+    except ValueError:
+        return False
+    return java_index(args) is not None
+
+
+def script_command(directory: str):
+    """Linha do java no script de inicialização, como lista, sem prefixos nem flags de CDS."""
+    try:
+        with open(_script_path(directory), "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return None
+    for line in lines:
+        if is_java_line(line):
+            args = _split(line.strip())
+            args = args[java_index(args) :]
+            return [a for a in args if not _CDS_FLAG_RE.match(a)]
+    return None
+
+
+def flag_position(command):
+    """Índice logo depois de java e das flags de memória (-Xmx/-Xms)."""
+    position = 1
+    while position < len(command) and command[position].startswith("-Xm"):
+        position += 1
+    return position
+
+
+def apply_to_start_script(directory: str) -> bool:
+    """Regera o script de inicialização com as flags de CDS atuais."""
+    # Importação local: o launch usa as funções deste módulo
+    from easymcserver.config.launch import refresh_start_script
+
+    return refresh_start_script(directory)
+
+
+# --- Treino ---------------------------------------------------------------
+
+
+def train(directory: str, java: str = None) -> bool:
+    """Gera o arquivo CDS do servidor e mede a inicialização antes e depois.
+
+    São três boots: treino (grava o arquivo ao sair), referência sem o
+    arquivo e, por fim, com o arquivo. O treino vem primeiro para que a
+    geração do mundo de um servidor novo não distorça a comparação.
+    """
+    if java is None:
+        # Padrão: o Java do script de inicialização (escolhido pela versão do servidor)
+        java = launch_java(directory)
+    jdk = describe_jdk(java)
+    if not jdk:
+        console.print(
+            "[bold red][ERRO][/bold red] O Java não está instalado ou não está no PATH. Instale-o e tente novamente."
+        )
+        return False
+    if jdk["feature"] < MIN_FEATURE:
+        console.print(
+            f"[bold red][ERRO][/bold red] O CDS dinâmico precisa do Java {MIN_FEATURE} ou mais novo "
+            f"(detectado: {jdk['runtime']})."
+        )
+        return False
+
+    command = script_command(directory)
+    if not command:
+        console.print(
+            "[bold red][ERRO][/bold red] Script de inicialização Java não encontrado. Instale o servidor primeiro."
+        )
+        return False
+    command[0] = java
+    position = flag_position(command)
+
+    def with_flags(*flags):
+        return command[:position] + list(flags) + command[position:]
+
+    path = archive_path(archive_key(directory, jdk))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+
+    console.print("[cyan]Boot de treino (gravando as classes carregadas)...[/cyan]")
+    if (
+        boot_until_done(directory, with_flags(f"-XX:ArchiveClassesAtExit={tmp}"))
+        is None
+    ):
+        console.print("[bold red][ERRO][/bold red] O servidor não terminou de iniciar.")
+        return False
+    if not tmp.exists():
+        console.print(
+            "[bold red][ERRO][/bold red] A JVM não gerou o arquivo CDS (veja logs/latest.log)."
+        )
+        return False
+    os.replace(tmp, path)
+
+    console.print("[cyan]Medindo a inicialização sem o arquivo...[/cyan]")
+    before = boot_until_done(directory, with_flags())
+    console.print("[cyan]Medindo a inicialização com o arquivo...[/cyan]")
+    after = boot_until_done(directory, with_flags(f"-XX:SharedArchiveFile={path}"))
+
+    _write_marker(
+        directory,
+        {
+            "enabled": True,
+            "java": java,
+            "archive": str(path),
+            "runtime": jdk["runtime"],
+            "startup_before": before,
+            "startup_after": after,
+        },
+    )
+    apply_to_start_script(directory)
+
+    console.print(
+        f"[bold green][OK][/bold green] Arquivo CDS criado ({path.stat().st_size / 1024**2:.1f} MB)."
+    )
+    if before and after:
+        console.print(
+            f"Inicialização: [cyan]{before:.2f}s[/cyan] -> [cyan]{after:.2f}s[/cyan] "
+            f"([bold]{(1 - after / before) * 100:.0f}%[/bold] mais rápido)."
+        )
+    return True
+
+
+def disable(directory: str):
+    marker = _read_marker(directory) or {}
+    marker["enabled"] = False
+    _write_marker(directory, marker)
+    apply_to_start_script(directory)
+    console.print("[bold green][OK][/bold green] CDS desativado para este servidor.")
+
+
+def refresh(directory: str):
+    """Atualiza as flags depois de trocar o jar ou o JDK (ex.: após um update)."""
+    marker = _read_marker(directory)
+    if not marker or not marker.get("enabled"):
+        return
+    apply_to_start_script(directory)
+    java = launch_java(directory)
+    jdk = describe_jdk(java)
+    if jdk and MIN_FEATURE <= jdk["feature"] < AUTO_CREATE_FEATURE:
+        if not launch_flags(directory, java):
+            console.print(
+                "[bold yellow][AVISO][/bold yellow] O jar ou o Java mudou: o arquivo CDS precisa ser "
+                "gerado de novo (easymc cds <diretório>)."
+            )
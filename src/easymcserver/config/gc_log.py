@@ -0,0 +1,406 @@
+# Análise do log de GC: pausas, taxa de alocação e tendência do heap
+#
+# O log é lido linha a linha e cada linha só atualiza contadores: as pausas
+# vão para um histograma com faixas logarítmicas (largura relativa fixa) e a
+# tendência do heap é uma regressão linear calculada de forma incremental.
+# A memória usada não depende do tamanho do log, então logs de vários GB
+# podem ser lidos inteiros, e o modo "follow" acompanha o log do servidor em
+# execução, inclusive quando a JVM troca de arquivo na rotação.
+
+import json
+import math
+import os
+import re
+import time
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+from easymcserver.config.jvm_args import GC_LOG_FILE
+from easymcserver.config.jvm_flags import load_jvm_args, parse_option
+
+console = Console()
+
+# Meta de pausa padrão (a mesma do -XX:MaxGCPauseMillis sugerido)
+PAUSE_TARGET_MS = 50
+# Largura relativa de cada faixa do histograma (1% de erro nos percentis)
+HISTOGRAM_PRECISION = 0.01
+PERCENTILES = (50, 90, 99, 99.9)
+# Intervalo entre leituras no modo follow (s)
+FOLLOW_INTERVAL = 1.0
+
+_UNITS = {"B": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+# Log unificado (Java 9+): [2024-01-01T12:00:00.000+0000][12.345s][info][gc,phases] GC(5) ...
+_UPTIME_RE = re.compile(r"\[(\d+(?:[.,]\d+)?)s\]")
+_TAGS_RE = re.compile(r"\[(gc(?:,\w+)*)\s*\]")
+_PAUSE_RE = re.compile(
+    r"GC\(\d+\)\s+(?:[yo]:\s+)?Pause ([A-Za-z ]+?)(?:\s*\(.*)?(?:\s+\d\S*->.*)?\s+(\d+(?:[.,]\d+)?)ms\s*$"
+)
+_HEAP_RE = re.compile(
+    r"GC\(\d+\).*?\s(\d+)([BKMG])(?:\(\d+%\))?->(\d+)([BKMG])(?:\(\d+%\))?(?:\((\d+)([BKMG])\))?"
+)
+
+# Java 8 (-XX:+PrintGCDetails):
+# 2024-...: 12.345: [GC (Allocation Failure) [PSYoungGen: ...] 1000K->500K(2000K), 0.0012 secs]
+_LEGACY_START_RE = re.compile(r"(\d+\.\d+): \[(Full GC|GC)\b(.*)")
+_LEGACY_PAUSE_RE = re.compile(r", (\d+\.\d+) secs\]")
+_LEGACY_HEAP_RE = re.compile(r"(?<!: )(\d+)K->(\d+)K\((\d+)K\)")
+_LEGACY_G1_HEAP_RE = re.compile(
+    r"Heap: ([\d.]+)([BKMG])\([\d.]+[BKMG]\)->([\d.]+)([BKMG])\(([\d.]+)([BKMG])\)"
+)
+
+
+def _bytes(value, unit):
+    return float(value.replace(",", ".")) * _UNITS[unit]
+
+
+class PauseHistogram:
+    """Histograma de pausas (ms) com faixas logarítmicas e memória constante."""
+
+    def __init__(self, precision: float = HISTOGRAM_PRECISION):
+        self._log_base = math.log1p(precision)
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def add(self, ms: float):
+        index = math.floor(math.log(max(ms, 1e-6)) / self._log_base)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def percentile(self, p: float):
+        """Valor abaixo do qual estão `p`% das pausas (erro de ±precisão/2)."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Centro geométrico da faixa, sem passar dos extremos medidos
+                value = math.exp((index + 0.5) * self._log_base)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+class _Trend:
+    """Regressão linear incremental (y em função de x), sem guardar os pontos."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.sxx = 0.0
+        self.sxy = 0.0
+
+    def add(self, x, y):
+        self.n += 1
+        dx = x - self.mean_x
+        self.mean_x += dx / self.n
+        self.mean_y += (y - self.mean_y) / self.n
+        self.sxx += dx * (x - self.mean_x)
+        self.sxy += dx * (y - self.mean_y)
+
+    @property
+    def slope(self):
+        return self.sxy / self.sxx if self.n > 1 and self.sxx > 0 else None
+
+
+class GcLogAnalyzer:
+    """Acumula as estatísticas de um log de GC alimentado linha a linha."""
+
+    def __init__(self, threshold_ms: float = PAUSE_TARGET_MS):
+        self.threshold_ms = threshold_ms
+        self.pauses = PauseHistogram()
+        self.kinds = {}
+        self.over_threshold = 0
+        self.longest_at = None
+        self.heap_after = _Trend()
+        self.heap_capacity = None
+        self.last_heap_after = None
+        self.allocated = 0.0
+        self.first_uptime = None
+        self.last_uptime = None
+        self.lines = 0
+        self._uptime = None
+
+    def feed(self, line: str):
+        self.lines += 1
+        match = _UPTIME_RE.search(line)
+        if match:
+            self._uptime = float(match.group(1).replace(",", "."))
+            self._parse_unified(line)
+        else:
+            self._parse_legacy(line)
+
+    def _parse_unified(self, line):
+        tags = _TAGS_RE.search(line)
+        if not tags or tags.group(1) not in ("gc", "gc,phases"):
+            return
+        pause = _PAUSE_RE.search(line)
+        if pause:
+            self._add_pause(
+                pause.group(1).strip(), float(pause.group(2).replace(",", "."))
+            )
+        # Só a linha-resumo [gc] traz o heap total antes -> depois
+        if tags.group(1) == "gc":
+            heap = _HEAP_RE.search(line)
+            if heap:
+                before, after = _bytes(*heap.group(1, 2)), _bytes(*heap.group(3, 4))
+                capacity = _bytes(*heap.group(5, 6)) if heap.group(5) else None
+                self._add_heap(before, after, capacity)
+
+    def _parse_legacy(self, line):
+        start = _LEGACY_START_RE.search(line)
+        if start:
+            self._uptime = float(start.group(1))
+            pause = _LEGACY_PAUSE_RE.search(line)
+            if pause:
+                self._add_pause(
+                    self._legacy_kind(start.group(2), start.group(3)),
+                    float(pause.group(1)) * 1000,
+                )
+            heaps = _LEGACY_HEAP_RE.findall(line)
+            if heaps:
+                before, after, capacity = (int(v) * 1024 for v in heaps[-1])
+                self._add_heap(before, after, capacity)
+            return
+        # G1 no Java 8 informa o heap em uma linha separada, logo depois da pausa
+        g1_heap = _LEGACY_G1_HEAP_RE.search(line)
+        if g1_heap:
+            self._add_heap(
+                _bytes(*g1_heap.group(1, 2)),
+                _bytes(*g1_heap.group(3, 4)),
+                _bytes(*g1_heap.group(5, 6)),
+            )
+
+    @staticmethod
+    def _legacy_kind(collector, details):
+        details = details.lower()
+        if collector == "Full GC":
+            return "Full"
+        for word, kind in (
+            ("remark", "Remark"),
+            ("cleanup", "Cleanup"),
+            ("initial mark", "Initial Mark"),
+            ("mixed", "Mixed"),
+        ):
+            if word in details:
+                return kind
+        return "Young"
+
+    def _add_pause(self, kind, ms):
+        self.pauses.add(ms)
+        self.kinds[kind] = self.kinds.get(kind, 0) + 1
+        if ms > self.threshold_ms:
+            self.over_threshold += 1
+        if ms >= self.pauses.max:
+            self.longest_at = self._uptime
+
+    def _add_heap(self, before, after, capacity):
+        if self.last_heap_after is not None and before >= self.last_heap_after:
+            # O que entrou no heap desde a coleta anterior foi alocado
+            self.allocated += before - self.last_heap_after
+        self.last_heap_after = after
+        if capacity:
+            self.heap_capacity = capacity
+        if self._uptime is not None:
+            if self.first_uptime is None:
+                self.first_uptime = self._uptime
+            self.last_uptime = self._uptime
+            self.heap_after.add(self._uptime, after)
+
+    def summary(self) -> dict:
+        span = (
+            self.last_uptime - self.first_uptime if self.first_uptime is not None else 0
+        )
+        slope = self.heap_after.slope
+        return {
+            "lines": self.lines,
+            "pauses": self.pauses.count,
+            "pause_kinds": self.kinds,
+            "pause_total_ms": self.pauses.total,
+            "pause_max_ms": self.pauses.max if self.pauses.count else None,
+            "pause_max_at": self.longest_at,
+            "percentiles_ms": {str(p): self.pauses.percentile(p) for p in PERCENTILES},
+            "threshold_ms": self.threshold_ms,
+            "over_threshold": self.over_threshold,
+            "span_seconds": span,
+            "allocation_rate": self.allocated / span if span > 0 else None,
+            "heap_after_last": self.last_heap_after,
+            "heap_capacity": self.heap_capacity,
+            # bytes por minuto; crescimento contínuo depois das coletas sugere vazamento
+            "heap_after_trend": slope * 60 if slope is not None else None,
+        }
+
+
+# --- Arquivos -------------------------------------------------------------
+
+
+def log_files(path: str):
+    """Arquivos do log em ordem cronológica (rotacionados antes do atual).
+
+    `path` pode ser o diretório do servidor ou o arquivo de log. A rotação
+    do log unificado renomeia o atual para gc.log.N; a do Java 8 escreve em
+    gc.log.N.current. Em ambos os casos a data de modificação dá a ordem.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, GC_LOG_FILE)
+    directory, base = os.path.split(os.path.abspath(path))
+    try:
+        names = [
+            n for n in os.listdir(directory) if n == base or n.startswith(base + ".")
+        ]
+    except FileNotFoundError:
+        return []
+    files = [os.path.join(directory, n) for n in names]
+    return sorted(files, key=lambda f: (os.path.getmtime(f), f.endswith(base)))
+
+
+def _read_lines(f, analyzer, pending=b""):
+    """Alimenta o analisador com as linhas completas; retorna o resto (sem \\n)."""
+    for raw in f:
+        if not raw.endswith(b"\n"):
+            pending += raw
+            break
+        analyzer.feed((pending + raw).decode("utf-8", "replace"))
+        pending = b""
+    return pending
+
+
+def pause_target(directory: str):
+    """-XX:MaxGCPauseMillis ativo no jvm_args.txt do servidor, se houver."""
+    model = load_jvm_args(directory)
+    args = model.active_args() if model else []
+    for name, value, _ in map(parse_option, args):
+        if name == "MaxGCPauseMillis":
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    return None
+
+
+def _format_bytes(value):
+    return f"{value / 1024**2:,.0f} MB" if value is not None else "-"
+
+
+def render_summary(summary) -> Table:
+    table = Table(title="Log de GC", show_header=False)
+    table.add_column(style="cyan")
+    table.add_column(justify="right")
+
+    def ms(value):
+        return f"{value:.2f} ms" if value is not None else "-"
+
+    kinds = ", ".join(f"{k}: {n}" for k, n in summary["pause_kinds"].items())
+    table.add_row("Pausas", f"{summary['pauses']}" + (f" ({kinds})" if kinds else ""))
+    for p, value in summary["percentiles_ms"].items():
+        table.add_row(f"p{p}", ms(value))
+    longest = ms(summary["pause_max_ms"])
+    if summary["pause_max_at"] is not None:
+        longest += f" [dim](em {summary['pause_max_at']:.0f}s)[/dim]"
+    table.add_row("Maior pausa", longest)
+    over = summary["over_threshold"]
+    color = "red" if over else "green"
+    table.add_row(
+        f"Pausas > {summary['threshold_ms']:g} ms",
+        f"[{color}]{over}[/{color}]"
+        + (f" ({over / summary['pauses'] * 100:.1f}%)" if summary["pauses"] else ""),
+    )
+    rate = summary["allocation_rate"]
+    table.add_row("Taxa de alocação", f"{rate / 1024**2:,.1f} MB/s" if rate else "-")
+    table.add_row(
+        "Heap após GC",
+        f"{_format_bytes(summary['heap_after_last'])} de {_format_bytes(summary['heap_capacity'])}",
+    )
+    trend = summary["heap_after_trend"]
+    table.add_row(
+        "Tendência do heap após GC",
+        f"{trend / 1024**2:+,.1f} MB/min" if trend is not None else "-",
+    )
+    table.add_row("Período", f"{summary['span_seconds'] / 60:,.1f} min")
+    return table
+
+
+def analyze_gc_log(
+    path: str,
+    follow: bool = False,
+    threshold_ms: float = None,
+    as_json: bool = False,
+) -> bool:
+    """Analisa o log de GC (e os rotacionados) e mostra o resumo.
+
+    Com `follow`, continua lendo o log atual até Ctrl+C, atualizando o
+    resumo. `threshold_ms` padrão: o -XX:MaxGCPauseMillis do servidor, ou 50.
+    """
+    files = log_files(path)
+    if not files:
+        console.print(
+            f"[bold red][ERRO][/bold red] Nenhum log de GC encontrado em {path}. "
+            "Ative a flag -Xlog:gc* (ou -Xloggc no Java 8) e inicie o servidor."
+        )
+        return False
+    if threshold_ms is None:
+        threshold_ms = (
+            pause_target(path) if os.path.isdir(path) else None
+        ) or PAUSE_TARGET_MS
+    analyzer = GcLogAnalyzer(threshold_ms)
+
+    for file in files[:-1]:
+        with open(file, "rb") as f:
+            _read_lines(f, analyzer)
+    current = files[-1]
+    handle = open(current, "rb")
+    try:
+        pending = _read_lines(handle, analyzer)
+        if follow:
+            _follow(path, handle, pending, analyzer)
+            handle = None
+    finally:
+        if handle:
+            handle.close()
+
+    summary = analyzer.summary()
+    if as_json:
+        print(json.dumps(summary, indent=2))
+    elif not follow:
+        console.print(render_summary(summary))
+    return True
+
+
+def _follow(path, handle, pending, analyzer):
+    """Lê o que for escrito no log até Ctrl+C, seguindo a rotação."""
+    console.print("[dim]Acompanhando o log (Ctrl+C para sair)...[/dim]")
+    try:
+        with Live(render_summary(analyzer.summary()), console=console) as live:
+            while True:
+                time.sleep(FOLLOW_INTERVAL)
+                pending = _read_lines(handle, analyzer, pending)
+                files = log_files(path)
+                if files:
+                    newest = os.stat(files[-1])
+                    current = os.fstat(handle.fileno())
+                    if (newest.st_ino, newest.st_dev) != (
+                        current.st_ino,
+                        current.st_dev,
+                    ):
+                        # Rotação: termina o arquivo antigo e passa para o novo
+                        pending = _read_lines(handle, analyzer, pending)
+                        handle.close()
+                        handle = open(files[-1], "rb")
+                        pending = _read_lines(handle, analyzer)
+                    elif newest.st_size < handle.tell():
+                        # Arquivo truncado no lugar (filecount=0 ou cópia externa)
+                        handle.seek(0)
+                        pending = b""
+                live.update(render_summary(analyzer.summary()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        handle.close()
@@ -3,22 +3,38 @@
 import os
 from InquirerPy import prompt, inquirer
 from rich.console import Console
+from easymcserver.config.jvm_flags import (
+    JvmArgsFile,
+    load_jvm_args,
+    print_problems,
+    validate_jvm_args,
+)
+from easymcserver.config.launch import refresh_start_script
+from easymcserver.system.jdk import jdk_for_server, parse_version, version_line
 from easymcserver.system.sys_info import check_java_installed
 
 console = Console()
 
+# Log de GC (relativo ao diretório do servidor), com rotação
+GC_LOG_FILE = "logs/gc.log"
+GC_LOG_FILE_COUNT = 5
+GC_LOG_FILE_SIZE = "20M"
+# Native Memory Tracking: permite ver para onde vai a memória fora do heap (jcmd)
+NMT_FLAG = "-XX:NativeMemoryTracking=summary"
+
 
 def edit_jvm_args_file(directory, mode="r"):
-    # Versão, PATH e lista de argumentos
-    java_version_raw = check_java_installed(True)
-    if not java_version_raw:
+    # Versão do Java que o servidor usa e lista de argumentos
+    jdk = jdk_for_server(directory)
+    if not jdk:
         return
+    java_version_raw = version_line(jdk)
     console.print(f"[bold green][OK][/bold green] Java detectado: {java_version_raw}")
     java_version = format_java_version_string(java_version_raw)
     # Se a versão detectada não for uma das pré-definidas, pergunte ao usuário se ele deseja escolher uma versão para gerar o arquivo.
     if not java_version:
         console.print(
-            f"[bold red][ERRO][/bold red] A edição de flags da JVM não suporta essa versão do Java: {check_java_installed(True)}"
+            f"[bold red][ERRO][/bold red] A edição de flags da JVM não suporta essa versão do Java: {java_version_raw}"
         )
 
         manual_selected_java_version = inquirer.select(
@@ -91,154 +107,35 @@ def edit_jvm_args_file(directory, mode="r"):
     elif mode == "w":
         try:
             with open(jvm_args_path, "r", encoding="utf-8") as file:
-                lines = file.readlines()
+                model = JvmArgsFile.parse(file.read())
         except FileNotFoundError:
-            lines = []  # Caso o arquivo seja deletado na edição
-
-        garbage_collector_options = []
-        memory_config_options = []
-        perf_flags_options = []
-        others_options = []
-        active_flags = []
-        section = "others"
-
-        for line in lines:
-            stripped = line.strip()
-            if not stripped:
-                continue
-
-            # Busca por seção
-            lower_line = stripped.lower()
-            if "garbage collector" in lower_line:
-                section = "gb_collector"
-                continue
-            elif "memory config" in lower_line:
-                section = "mem_config"
-                continue
-            elif "performance flags" in lower_line:
-                section = "perf_flags"
-                continue
-            elif "others" in lower_line:
-                section = "others"
-                continue
-
-            # Captura as flags ativas e inativas
-            if stripped.startswith("#-") or stripped.startswith("-"):
-                # Remove # e espaços extras para garantir comparação limpa
-                clean_flag = normalize(stripped.lstrip("#"))
-
-                # Linhas ativas
-                if stripped.startswith("-"):
-                    active_flags.append(normalize(clean_flag))
-
-                if section == "gb_collector":
-                    garbage_collector_options.append(clean_flag)
-                elif section == "mem_config":
-                    memory_config_options.append(clean_flag)
-                elif section == "perf_flags":
-                    perf_flags_options.append(clean_flag)
-                elif section == "others":
-                    others_options.append(clean_flag)
+            model = JvmArgsFile()  # Caso o arquivo seja deletado na edição
 
         try:
-            # 1. Seleção Única (GC)
-            if garbage_collector_options:
-                current_gc = next(
-                    (
-                        f
-                        for f in garbage_collector_options
-                        if normalize(f) in active_flags
-                    ),
-                    garbage_collector_options[0],
-                )
-
-                garbage_collector_flags = inquirer.select(
-                    message="Selecione o Garbage Collector:",
-                    choices=garbage_collector_options,
-                    default=current_gc,
-                ).execute()
-            else:
-                garbage_collector_flags = []
-
-            # 2, 3, 4. Seleções Múltiplas
-            if memory_config_options:
-                current_mem = [
-                    f for f in memory_config_options if normalize(f) in active_flags
-                ]
-                memory_choices = [
-                    {"name": flag, "value": flag, "enabled": flag in active_flags}
-                    for flag in memory_config_options
-                ]
-
-                memory_config_flags = inquirer.checkbox(
-                    message="Selecione as flags de Memória:",
-                    choices=memory_choices,
-                    cycle=True,
-                    transformer=lambda result: f"{len(result)} flags selecionadas",
-                ).execute()
-            else:
-                memory_config_flags = []
-
-            if perf_flags_options:
-                current_perf = [
-                    f for f in perf_flags_options if normalize(f) in active_flags
-                ]
-                perf_choices = [
-                    {"name": flag, "value": flag, "enabled": flag in active_flags}
-                    for flag in perf_flags_options
-                ]
-
-                perf_flags = inquirer.checkbox(
-                    message="Selecione as flags de Performance:",
-                    choices=perf_choices,
-                    default=current_perf,
-                    cycle=True,
-                    transformer=lambda result: f"{len(result)} flags selecionadas",
-                ).execute()
-            else:
-                perf_flags = []
-
-            if others_options:
-                current_others = [
-                    f for f in others_options if normalize(f) in active_flags
-                ]
-                others_choices = [
-                    {"name": flag, "value": flag, "enabled": flag in active_flags}
-                    for flag in others_options
+            while True:
+                selected = _select_flags(model)
+                model.set_active(selected)
+                # Combinações inválidas são recusadas antes de chegar ao boot
+                if print_problems(validate_jvm_args(model, jdk)):
+                    break
+                questions = [
+                    {
+                        "type": "confirm",
+                        "name": "retry",
+                        "message": "Essa combinação de flags impede o servidor de iniciar. Deseja corrigir?",
+                        "default": True,
+                    }
                 ]
-
-                others_flags = inquirer.checkbox(
-                    message="Selecione outras flags:",
-                    choices=others_options,
-                    default=current_others,
-                    cycle=True,
-                    transformer=lambda result: f"{len(result)} flags selecionadas",
-                ).execute()
-            else:
-                others_flags = []
-
-            # O check 'if garbage_collector_flags' evita erros de concatenação
-            all_selected_flags = set(
-                ([garbage_collector_flags] if garbage_collector_flags else [])
-                + (memory_config_flags or [])
-                + (perf_flags or [])
-                + (others_flags or [])
-            )
+                if not prompt(questions)["retry"]:
+                    console.print(
+                        "[bold yellow][AVISO][/bold yellow] Edição cancelada. Nenhuma alteração foi salva."
+                    )
+                    return
 
             # Gravação do arquivo
-            with open(jvm_args_path, "w", encoding="utf-8") as file:
-                for line in lines:
-                    stripped = line.strip()
-
-                    if stripped.startswith("-") or stripped.startswith("#-"):
-                        raw_flag = normalize(stripped.lstrip("#"))
-
-                        if raw_flag in all_selected_flags:
-                            file.write(f"{raw_flag}\n")  # Ativa no arquivo
-                        else:
-                            file.write(f"#{raw_flag}\n")  # Comenta no arquivo
-                    else:
-                        file.write(line if line.endswith("\n") else line + "\n")
+            model.save(jvm_args_path)
+            # O script passa a usar o jvm_args.txt salvo (no Java 8, as flags na linha)
+            refresh_start_script(directory)
 
             console.print(
                 "[bold green][OK][/bold green] Configurações salvas com sucesso!\n"
@@ -251,31 +148,74 @@ def edit_jvm_args_file(directory, mode="r"):
             return  # Sai da função sem abrir o arquivo para escrita
 
 
+def _select_flags(model):
+    """Pergunta as flags de cada seção; retorna o texto das selecionadas."""
+    garbage_collector_options = [f.text for f in model.flags("gc")]
+    active_flags = [f.text for f in model.active()]
+
+    # 1. Seleção Única (GC)
+    if garbage_collector_options:
+        current_gc = next(
+            (f for f in garbage_collector_options if f in active_flags),
+            garbage_collector_options[0],
+        )
+
+        garbage_collector_flags = inquirer.select(
+            message="Selecione o Garbage Collector:",
+            choices=garbage_collector_options,
+            default=current_gc,
+        ).execute()
+    else:
+        garbage_collector_flags = None
+
+    # 2, 3, 4. Seleções Múltiplas
+    selected = [garbage_collector_flags] if garbage_collector_flags else []
+    for section, message in (
+        ("memory", "Selecione as flags de Memória:"),
+        ("perf", "Selecione as flags de Performance:"),
+        ("others", "Selecione outras flags:"),
+    ):
+        options = [f.text for f in model.flags(section)]
+        if not options:
+            continue
+        choices = [
+            {"name": flag, "value": flag, "enabled": flag in active_flags}
+            for flag in options
+        ]
+        selected += (
+            inquirer.checkbox(
+                message=message,
+                choices=choices,
+                cycle=True,
+                transformer=lambda result: f"{len(result)} flags selecionadas",
+            ).execute()
+            or []
+        )
+    return selected
+
+
 def normalize(flag: str) -> str:
     return flag.strip().replace("\r", "")
 
 
 def view_jvm_args(directory):
     jvm_args = edit_jvm_args_file(directory, "r")
+    if jvm_args is None:
+        return ""
     list_of_args = ""
-    for line in jvm_args:
-        if line.strip() and not line.startswith("#"):
-            # console.print(f"[bold blue]{line}[/bold blue]")
-            list_of_args += f"{line.strip()}\n"
+    for flag in JvmArgsFile.parse(jvm_args).active():
+        list_of_args += f"{flag.text}\n"
     return list_of_args
 
 
 def format_java_version_string(java_version_raw):
-    # Encontra a versão através dos números após 'java version' em java version "25.0.2" 2026-01-20 LTS
-    only_number = java_version_raw[14:]
-    if only_number.strip().startswith("1.8"):
+    # Aceita a saída do java -version em qualquer formato: java version "1.8.0_392",
+    # openjdk version "21.0.2" 2024-01-16, openjdk 25 2025-09-16...
+    feature, _ = parse_version(java_version_raw)
+    if feature == 8:
         return "1.8"
-    elif only_number.strip().startswith("17"):
-        return "17"
-    elif only_number.strip().startswith("21"):
-        return "21"
-    elif only_number.strip().startswith("25"):
-        return "25"
+    elif feature in (17, 21, 25):
+        return str(feature)
     else:
         return False
 
@@ -300,27 +240,87 @@ def format_java_version_string(java_version_raw):
     """
 
 
+def gc_logging_flag(java_version):
+    """Linha de flags que grava o log de GC em logs/gc.log, com rotação.
+
+    No Java 9+ é o log unificado (-Xlog) com data e uptime em cada linha,
+    que é o formato lido por config/gc_log.py; o Java 8 só tem as flags
+    antigas.
+    """
+    if float(java_version) == 1.8:
+        return (
+            f"-Xloggc:{GC_LOG_FILE} -XX:+PrintGCDetails -XX:+PrintGCDateStamps "
+            f"-XX:+UseGCLogFileRotation -XX:NumberOfGCLogFiles={GC_LOG_FILE_COUNT} "
+            f"-XX:GCLogFileSize={GC_LOG_FILE_SIZE}"
+        )
+    return (
+        f"-Xlog:gc*:file={GC_LOG_FILE}:time,uptime,level,tags:"
+        f"filecount={GC_LOG_FILE_COUNT},filesize={GC_LOG_FILE_SIZE}"
+    )
+
+
 def restore_jvm_args_file(jvm_args_path, jvm_args_list, java_version):
+    # Barra invertida dentro de f-string só é aceita a partir do Python 3.12
+    sep = "\n#"
+    # A JVM não cria o diretório do log de GC e o servidor só cria logs/ depois
+    os.makedirs(
+        os.path.join(os.path.dirname(jvm_args_path), os.path.dirname(GC_LOG_FILE)),
+        exist_ok=True,
+    )
     with open(jvm_args_path, "w", encoding="utf-8") as file:
         file.write(
             f'# Não apague a linha "java version"! \n'
             f"#java version: {java_version}\n\n"
             f"# --- Garbage Collector ---\n"
-            f"#{'\n#'.join(jvm_args_list[0])}\n\n"
+            f"#{sep.join(jvm_args_list[0])}\n\n"
             f"# --- Memory Config ---\n"
-            f"#{'\n#'.join(jvm_args_list[1])}\n\n"
+            f"#{sep.join(jvm_args_list[1])}\n\n"
             f"# --- Performance Flags ---\n"
-            f"#{'\n#'.join(jvm_args_list[2])}"
+            f"#{sep.join(jvm_args_list[2])}"
             f"\n\n# --- Others ---\n"
+            f"#{gc_logging_flag(java_version)}\n"
+            f"#{NMT_FLAG}\n"
         )
 
 
+def apply_jvm_flags(directory, flags, java_version="21", gc_log=False, nmt=False):
+    """Gera o jvm_args.txt já com `flags` ativas (uso não interativo).
+
+    Flags sugeridas para a versão do Java são descomentadas; as demais são
+    adicionadas na seção "Others". `gc_log` ativa o log de GC e `nmt` o
+    Native Memory Tracking. Retorna False se a combinação de flags impedir
+    a JVM de iniciar (o arquivo é gravado mesmo assim, para correção).
+    """
+    jvm_args_path = os.path.join(directory, "jvm_args.txt")
+    restore_jvm_args_file(
+        jvm_args_path, determine_jvm_args_list(java_version), java_version
+    )
+    wanted = [normalize(flag) for flag in flags or []]
+    if gc_log:
+        wanted.append(gc_logging_flag(java_version))
+    if nmt:
+        wanted.append(NMT_FLAG)
+
+    model = load_jvm_args(directory)
+    for flag in wanted:
+        model.add(flag)
+    model.save(jvm_args_path)
+    refresh_start_script(directory)
+
+    # Com o JDK do servidor a validação usa as flags reais dele
+    feature, _ = parse_version(str(java_version))
+    jdk = jdk_for_server(directory, quiet=True)
+    if jdk and jdk["feature"] != feature:
+        jdk = None
+    return print_problems(validate_jvm_args(model, jdk, feature))
+
+
 def determine_jvm_args_list(java_version):
 
     garbage_collector = [
         "-XX:+UseG1GC",  # Equilibrado (Padrão para Java 17, 21, 25)
         "-XX:+UseZGC",  # Baixa latência (Java 17+)
-        "-XX:+ZGenerational",  # Ultra-fluidez (Habilitado no Java 25, experimental no 21)
+        "-XX:+UseZGC -XX:+ZGenerational",  # Ultra-fluidez (ZGC geracional no Java 21; padrão do ZGC a partir do 23)
         "-XX:+UseShenandoahGC",  # Baixa latência alternativo (Java 17+)
         "-XX:+UseConcMarkSweepGC",  # Legado (Apenas Java 8)
     ]
@@ -329,6 +329,8 @@ def determine_jvm_args_list(java_version):
         "-XX:+AlwaysPreTouch",  # Aloca toda a RAM ao iniciar (Evita engasgos durante o jogo)
         "-XX:+UseCompactObjectHeaders",  # NOVO: Java 25 (Reduz uso de RAM em ~20%)
         "-XX:G1HeapRegionSize=32M",  # Otimiza carregamento de chunks grandes
+        "-XX:+UseTransparentHugePages",  # Heap em páginas de 2 MB (THP do kernel em always/madvise)
+        "-XX:+UseLargePages",  # Heap em páginas reservadas (vm.nr_hugepages); ver easymc hugepages
     ]
 
     optimizing_perf = [
@@ -336,6 +338,7 @@ def determine_jvm_args_list(java_version):
         "-XX:+DisableExplicitGC",  # Impede que mods forcem limpezas lentas (System.gc)
         "-XX:MaxGCPauseMillis=50",  # Meta de latência: 50ms para manter 20 TPS
         "-XX:+PerfDisableSharedMem",  # Reduz IO desnecessário no disco/SSD
+        "-XX:+UnlockExperimentalVMOptions",  # Necessária para a G1NewSizePercent (experimental)
         "-XX:G1NewSizePercent=30",  # Garante espaço para entidades e partículas novas
         "-XX:-DontCompileHugeMethods",  # Permite compilação de métodos gigantes comuns em mods
     ]
@@ -344,24 +347,25 @@ def determine_jvm_args_list(java_version):
         case 1.8:
             jvm_args_list = (
                 [garbage_collector[0], garbage_collector[4]],
-                [mem_manager[0], mem_manager[2]],
+                [mem_manager[0], mem_manager[2], mem_manager[3], mem_manager[4]],
                 optimizing_perf,
             )
         case 17:
             jvm_args_list = (
                 [garbage_collector[0], garbage_collector[1], garbage_collector[3]],
-                [mem_manager[0], mem_manager[2]],
+                [mem_manager[0], mem_manager[2], mem_manager[3], mem_manager[4]],
                 optimizing_perf,
             )
         case 21:
             jvm_args_list = (
                 garbage_collector[:4],
-                [mem_manager[0], mem_manager[2]],
+                [mem_manager[0], mem_manager[2], mem_manager[3], mem_manager[4]],
                 optimizing_perf,
             )
         case 25:
             jvm_args_list = (
-                garbage_collector[:4],
+                # No Java 25 o ZGC só tem o modo geracional (ZGenerational é ignorada)
+                [garbage_collector[0], garbage_collector[1], garbage_collector[3]],
                 mem_manager,
                 optimizing_perf,
             )
@@ -0,0 +1,521 @@
+# Modelo do jvm_args.txt e validação das flags da JVM
+#
+# O jvm_args.txt é lido uma única vez para um JvmArgsFile: seções (pelo
+# cabeçalho "# --- Título ---"), flags ativas e comentadas e as demais
+# linhas, preservadas na gravação. A validação combina uma matriz de
+# compatibilidade (coletores que se excluem, flags que só existem em algumas
+# versões do Java, opções experimentais) com a lista real de flags do JDK,
+# tirada de `java -XX:+PrintFlagsFinal -version` e guardada em cache por JDK:
+# uma combinação inválida é recusada na hora, e não no boot do servidor.
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+from rich.console import Console
+from easymcserver.downloader.cache import get_cache_dir
+from easymcserver.system.jdk import jdk_for_server, parse_version
+
+console = Console()
+
+JVM_ARGS_FILE = "jvm_args.txt"
+
+SECTION_TITLES = {
+    "gc": "Garbage Collector",
+    "memory": "Memory Config",
+    "perf": "Performance Flags",
+    "others": "Others",
+}
+_SECTION_KEYS = {title.lower(): key for key, title in SECTION_TITLES.items()}
+
+_SECTION_RE = re.compile(r"^#\s*---\s*(.+?)\s*---\s*$")
+_JAVA_VERSION_RE = re.compile(r"^#\s*java version:\s*(\S+)", re.IGNORECASE)
+# bool UseG1GC    = true    {product} {default}   (o Java 8 usa ":=" quando alterada)
+_PRINT_FLAGS_RE = re.compile(r"^\s*(\S+)\s+(\w+)\s+:?=\s*(.*?)\s*\{([^}]*)\}")
+_NUMBER_RE = re.compile(r"^-?\d+[kKmMgGtT]?$")
+
+# Opções que escolhem o coletor de lixo: só uma pode estar ativa
+GC_SELECTORS = {
+    "UseG1GC": "g1",
+    "UseZGC": "zgc",
+    "UseShenandoahGC": "shenandoah",
+    "UseParallelGC": "parallel",
+    "UseSerialGC": "serial",
+    "UseConcMarkSweepGC": "cms",
+    "UseEpsilonGC": "epsilon",
+}
+GC_NAMES = {
+    "g1": "G1",
+    "zgc": "ZGC",
+    "shenandoah": "Shenandoah",
+    "parallel": "Parallel",
+    "serial": "Serial",
+    "cms": "CMS",
+    "epsilon": "Epsilon",
+}
+
+# Matriz de compatibilidade das opções -XX. Chaves de cada regra:
+#   min/max       versões do Java em que a opção existe
+#   obsolete      a partir dessa versão a JVM ignora a opção (com aviso)
+#   experimental  exige -XX:+UnlockExperimentalVMOptions (True: sempre;
+#                 número: nas versões anteriores a ele)
+#   requires      só faz sentido com esse coletor (erro sem ele)
+#   gc            só tem efeito com esse coletor (aviso sem ele)
+FLAG_RULES = {
+    "UseConcMarkSweepGC": {"max": 13},
+    "CMSInitiatingOccupancyFraction": {"max": 13, "gc": "cms"},
+    "UseZGC": {"min": 11, "experimental": 15},
+    "ZGenerational": {"min": 21, "obsolete": 24, "requires": "zgc"},
+    "UseShenandoahGC": {"min": 12, "experimental": 15},
+    "UseEpsilonGC": {"min": 11, "experimental": True},
+    "UseCompactObjectHeaders": {"min": 24, "experimental": 25},
+    "G1NewSizePercent": {"experimental": True, "gc": "g1"},
+    "G1MaxNewSizePercent": {"experimental": True, "gc": "g1"},
+    "G1MixedGCLiveThresholdPercent": {"experimental": True, "gc": "g1"},
+    "G1HeapRegionSize": {"gc": "g1"},
+    "G1ReservePercent": {"gc": "g1"},
+    "G1HeapWastePercent": {"gc": "g1"},
+    "G1MixedGCCountTarget": {"gc": "g1"},
+    "G1RSetUpdatingPauseTimePercent": {"obsolete": 20, "gc": "g1"},
+    "AggressiveOpts": {"obsolete": 12, "max": 12},
+    "UseGCLogFileRotation": {"max": 8},
+    "NumberOfGCLogFiles": {"max": 8},
+    "GCLogFileSize": {"max": 8},
+    "PrintGCDateStamps": {"max": 8},
+    "PrintGCDetails": {"obsolete": 9},
+}
+# Opções fora do -XX que dependem da versão
+_X_RULES = {"-Xlog": {"min": 9}}
+# O G1 só usa -XX:+UseNUMA a partir do JDK 14
+G1_NUMA_FEATURE = 14
+
+UNLOCK_EXPERIMENTAL = "UnlockExperimentalVMOptions"
+UNLOCK_DIAGNOSTIC = "UnlockDiagnosticVMOptions"
+
+
+# --- Modelo ---------------------------------------------------------------
+
+
+def parse_option(arg: str):
+    """Uma opção da JVM como (nome, valor, tipo).
+
+    "-XX:+UseG1GC" -> ("UseG1GC", True, "bool"); "-XX:G1HeapRegionSize=8M"
+    -> ("G1HeapRegionSize", "8M", "value"); as demais (-Xlog, -Xmx4G...)
+    -> (prefixo, argumento, "other").
+    """
+    if arg.startswith("-XX:+") or arg.startswith("-XX:-"):
+        return arg[5:], arg[4] == "+", "bool"
+    if arg.startswith("-XX:"):
+        name, _, value = arg[4:].partition("=")
+        return name, value, "value"
+    return re.split(r"[:=]", arg, 1)[0], arg, "other"
+
+
+class JvmFlag:
+    """Linha de flag do jvm_args.txt (ativa ou comentada).
+
+    Uma linha pode ter várias opções, como o log de GC do Java 8.
+    """
+
+    def __init__(self, text: str, active: bool, section: str):
+        self.text = text
+        self.active = active
+        self.section = section
+
+    @property
+    def args(self):
+        return self.text.split()
+
+    @property
+    def options(self):
+        return [parse_option(arg) for arg in self.args]
+
+    def render(self) -> str:
+        return self.text if self.active else f"#{self.text}"
+
+
+class JvmArgsFile:
+    """jvm_args.txt lido uma vez: linhas comuns (str) e flags (JvmFlag)."""
+
+    def __init__(self, items=None, java_version=None):
+        self.items = items or []
+        self.java_version = java_version
+
+    @classmethod
+    def parse(cls, text: str):
+        items = []
+        java_version = None
+        section = "others"
+        for raw in text.splitlines():
+            stripped = raw.strip().replace("\r", "")
+            header = _SECTION_RE.match(stripped)
+            version = _JAVA_VERSION_RE.match(stripped)
+            if header:
+                section = _SECTION_KEYS.get(header.group(1).lower(), section)
+                items.append(raw)
+            elif version and java_version is None:
+                java_version = version.group(1)
+                items.append(raw)
+            elif stripped.startswith("-"):
+                items.append(JvmFlag(stripped, True, section))
+            elif stripped.startswith("#-"):
+                items.append(JvmFlag(stripped[1:].strip(), False, section))
+            else:
+                items.append(raw)
+        return cls(items, java_version)
+
+    def flags(self, section: str = None):
+        return [
+            item
+            for item in self.items
+            if isinstance(item, JvmFlag)
+            and (section is None or item.section == section)
+        ]
+
+    def active(self):
+        return [flag for flag in self.flags() if flag.active]
+
+    def active_args(self):
+        """Argumentos ativos, na ordem do arquivo (para a linha de comando)."""
+        return [arg for flag in self.active() for arg in flag.args]
+
+    def set_active(self, texts):
+        """Ativa as flags em `texts` e comenta as demais."""
+        texts = set(texts)
+        for flag in self.flags():
+            flag.active = flag.text in texts
+
+    def add(self, text: str, section: str = "others", active: bool = True):
+        """Ativa uma flag existente ou a acrescenta ao fim da seção."""
+        for flag in self.flags():
+            if flag.text == text:
+                flag.active = active
+                return flag
+        flag = JvmFlag(text, active, section)
+        position = len(self.items)
+        for i, item in enumerate(self.items):
+            if isinstance(item, JvmFlag) and item.section == section:
+                position = i + 1
+        self.items.insert(position, flag)
+        return flag
+
+    def render(self) -> str:
+        lines = [
+            item.render() if isinstance(item, JvmFlag) else item for item in self.items
+        ]
+        return "\n".join(lines) + "\n"
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+
+
+def load_jvm_args(directory: str):
+    """JvmArgsFile do servidor em `directory` (None se não houver arquivo)."""
+    try:
+        with open(os.path.join(directory, JVM_ARGS_FILE), "r", encoding="utf-8") as f:
+            return JvmArgsFile.parse(f.read())
+    except OSError:
+        return None
+
+
+# --- Flags do JDK (PrintFlagsFinal) ---------------------------------------
+
+
+def parse_print_flags(text: str):
+    """Saída de -XX:+PrintFlagsFinal -> {nome: {"type", "value", "kinds"}}."""
+    flags = {}
+    for line in text.splitlines():
+        match = _PRINT_FLAGS_RE.match(line)
+        if match:
+            kind, name, value, kinds = match.groups()
+            flags[name] = {"type": kind, "value": value, "kinds": kinds.split()}
+    return flags
+
+
+def _dump_path(java: str):
+    real = os.path.realpath(java)
+    st = os.stat(real)
+    key = hashlib.sha1(f"{real}|{st.st_mtime_ns}|{st.st_size}".encode()).hexdigest()
+    return get_cache_dir() / "jvm-flags" / f"{key[:16]}.json"
+
+
+def jdk_flags(java: str):
+    """Flags aceitas pelo JDK de `java` (em cache por executável), ou None."""
+    try:
+        path = _dump_path(java)
+    except OSError:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        pass
+    try:
+        result = subprocess.run(
+            [
+                java,
+                f"-XX:+{UNLOCK_DIAGNOSTIC}",
+                f"-XX:+{UNLOCK_EXPERIMENTAL}",
+                "-XX:+PrintFlagsFinal",
+                "-version",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    flags = parse_print_flags(result.stdout)
+    if result.returncode != 0 or not flags:
+        return None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(flags, f)
+    os.replace(tmp, path)
+    return flags
+
+
+# --- Validação ------------------------------------------------------------
+
+
+def selected_gc(args, feature: int) -> str:
+    """Coletor que a JVM usará com `args` (o último selecionado, ou o padrão)."""
+    gc = None
+    for arg in args:
+        name, value, kind = parse_option(arg)
+        if kind == "bool" and name in GC_SELECTORS and value:
+            gc = GC_SELECTORS[name]
+    # Padrão da JVM em máquinas "de servidor": Parallel no Java 8, G1 depois
+    return gc or ("parallel" if feature <= 8 else "g1")
+
+
+def _problem(level, flag, message):
+    return {"level": level, "flag": flag, "message": message}
+
+
+def _check_value(name, value, kind, spec):
+    """Confere o tipo da opção com o da JVM; retorna a mensagem de erro ou None."""
+    if spec["type"] == "bool":
+        if kind != "bool":
+            return f"-XX:{name} é booleana: use -XX:+{name} ou -XX:-{name}"
+        return None
+    if kind == "bool":
+        return f"-XX:{name} precisa de um valor (-XX:{name}=...)"
+    if spec["type"] in ("double",):
+        try:
+            float(value)
+        except ValueError:
+            return f"-XX:{name}={value}: valor não numérico"
+    elif spec["type"] not in ("ccstr", "ccstrlist") and not _NUMBER_RE.match(value):
+        return f"-XX:{name}={value}: valor não numérico"
+    return None
+
+
+def validate_args(args, feature: int, jdk_flag_specs=None):
+    """Problemas de uma lista de argumentos da JVM para o Java `feature`.
+
+    Retorna [{"level": "erro" | "aviso", "flag", "message"}]. Erros impedem a
+    JVM de iniciar (ou tornam a combinação sem sentido); avisos são opções
+    ignoradas. Com `jdk_flag_specs` (de jdk_flags), cada opção -XX também é
+    conferida com as que o JDK realmente tem.
+    """
+    problems = []
+    options = [parse_option(arg) for arg in args]
+    enabled = {name: value for name, value, kind in options if kind == "bool"}
+    unlocked_experimental = enabled.get(UNLOCK_EXPERIMENTAL, False)
+    unlocked_diagnostic = enabled.get(UNLOCK_DIAGNOSTIC, False)
+    gc = selected_gc(args, feature)
+
+    selectors = [
+        name
+        for name, value, kind in options
+        if kind == "bool" and value and name in GC_SELECTORS
+    ]
+    if len(set(selectors)) > 1:
+        problems.append(
+            _problem(
+                "erro",
+                selectors[-1],
+                "Mais de um coletor de lixo ativo: "
+                + ", ".join(f"-XX:+{name}" for name in dict.fromkeys(selectors)),
+            )
+        )
+
+    seen = {}
+    for (name, value, kind), arg in zip(options, args):
+        if kind == "other":
+            rule = _X_RULES.get(name)
+            if rule and feature < rule.get("min", 0):
+                problems.append(
+                    _problem(
+                        "erro", arg, f"{name} exige o Java {rule['min']} ou mais novo"
+                    )
+                )
+            continue
+
+        if name in seen and seen[name] != value:
+            problems.append(
+                _problem(
+                    "aviso",
+                    arg,
+                    f"-XX:{name} aparece mais de uma vez; vale a última ({arg})",
+                )
+            )
+        seen[name] = value
+
+        rule = FLAG_RULES.get(name, {})
+        spec = jdk_flag_specs.get(name) if jdk_flag_specs is not None else None
+        # Removida (expired): a JVM recusa a flag e não inicia
+        expired = rule.get("max") and feature > rule["max"]
+        # Obsoleta: ainda aceita, mas ignorada (só um aviso)
+        obsolete = rule.get("obsolete") and feature >= rule["obsolete"] and not expired
+        if obsolete:
+            problems.append(
+                _problem(
+                    "aviso",
+                    arg,
+                    f"-XX:{name} é ignorada a partir do Java {rule['obsolete']}",
+                )
+            )
+        if jdk_flag_specs is not None:
+            # A lista do próprio JDK vale mais que a matriz
+            if spec is None:
+                if expired:
+                    message = f"-XX:{name} foi removida depois do Java {rule['max']}"
+                elif obsolete:
+                    continue
+                else:
+                    message = f"-XX:{name} não existe neste JDK"
+                problems.append(_problem("erro", arg, message))
+                continue
+            error = _check_value(name, value, kind, spec)
+            if error:
+                problems.append(_problem("erro", arg, error))
+            if "experimental" in spec["kinds"] and not unlocked_experimental:
+                problems.append(
+                    _problem(
+                        "erro",
+                        arg,
+                        f"-XX:{name} é experimental: ative antes -XX:+{UNLOCK_EXPERIMENTAL}",
+                    )
+                )
+            if "diagnostic" in spec["kinds"] and not unlocked_diagnostic:
+                problems.append(
+                    _problem(
+                        "erro",
+                        arg,
+                        f"-XX:{name} é de diagnóstico: ative antes -XX:+{UNLOCK_DIAGNOSTIC}",
+                    )
+                )
+        else:
+            if rule.get("min") and feature < rule["min"]:
+                problems.append(
+                    _problem(
+                        "erro",
+                        arg,
+                        f"-XX:{name} exige o Java {rule['min']} ou mais novo",
+                    )
+                )
+                continue
+            if expired:
+                problems.append(
+                    _problem(
+                        "erro",
+                        arg,
+                        f"-XX:{name} foi removida depois do Java {rule['max']}",
+                    )
+                )
+                continue
+            experimental = rule.get("experimental")
+            if (
+                (experimental is True or (experimental and feature < experimental))
+                and not unlocked_experimental
+                and not obsolete
+            ):
+                problems.append(
+                    _problem(
+                        "erro",
+                        arg,
+                        f"-XX:{name} é experimental: ative antes -XX:+{UNLOCK_EXPERIMENTAL}",
+                    )
+                )
+
+        # Combinações com o coletor (desativar uma opção nunca é problema)
+        if value is False:
+            continue
+        if rule.get("requires") and gc != rule["requires"]:
+            problems.append(
+                _problem(
+                    "erro",
+                    arg,
+                    f"-XX:{name} exige o coletor {GC_NAMES[rule['requires']]} (-XX:+Use{GC_NAMES[rule['requires']]})",
+                )
+            )
+        elif rule.get("gc") and gc != rule["gc"]:
+            problems.append(
+                _problem(
+                    "aviso",
+                    arg,
+                    f"-XX:{name} só tem efeito com o {GC_NAMES[rule['gc']]} (coletor atual: {GC_NAMES[gc]})",
+                )
+            )
+        if name == "UseNUMA" and gc == "g1" and feature < G1_NUMA_FEATURE:
+            problems.append(
+                _problem(
+                    "aviso",
+                    arg,
+                    f"O G1 só usa -XX:+UseNUMA a partir do Java {G1_NUMA_FEATURE}",
+                )
+            )
+    return problems
+
+
+def validate_jvm_args(model: JvmArgsFile, jdk=None, feature: int = None):
+    """Problemas das flags ativas de `model`.
+
+    Com `jdk` (de system/jdk.py) a versão e a lista de flags vêm do próprio
+    JDK; sem ele, só a matriz de compatibilidade para o Java `feature`.
+    """
+    specs = None
+    if jdk:
+        feature = jdk["feature"]
+        specs = jdk_flags(jdk["java"])
+    if feature is None:
+        feature, _ = parse_version(model.java_version or "21")
+    return validate_args(model.active_args(), feature, specs)
+
+
+def print_problems(problems) -> bool:
+    """Mostra os problemas; retorna True se não houver erros."""
+    for problem in problems:
+        if problem["level"] == "erro":
+            console.print(f"[bold red][ERRO][/bold red] {problem['message']}")
+        else:
+            console.print(f"[bold yellow][AVISO][/bold yellow] {problem['message']}")
+    return not any(problem["level"] == "erro" for problem in problems)
+
+
+def check_jvm_args(directory: str) -> bool:
+    """Valida o jvm_args.txt do servidor com o JDK que ele usa."""
+    model = load_jvm_args(directory)
+    if model is None:
+        console.print(
+            f"[bold red][ERRO][/bold red] {JVM_ARGS_FILE} não encontrado em {directory}."
+        )
+        return False
+    jdk = jdk_for_server(directory, quiet=True)
+    problems = validate_jvm_args(model, jdk)
+    ok = print_problems(problems)
+    if ok:
+        source = (
+            f"Java {jdk['feature']} ({jdk['java']})"
+            if jdk
+            else "matriz de compatibilidade"
+        )
+        console.print(
+            f"[bold green][OK][/bold green] {len(model.active_args())} flag(s) ativa(s) válidas ({source})."
+        )
+    return ok
@@ -0,0 +1,352 @@
+# Perfil de flags da JVM calculado para a máquina
+#
+# Em vez das listas fixas de determine_jvm_args_list, o perfil parte da
+# máquina (CPUs disponíveis, nós NUMA, páginas grandes), do Xmx do
+# servidor e da versão do Java. A base é o conjunto de flags do Aikar para o
+# G1, o mais usado em servidores de Minecraft; heaps grandes em máquinas com
+# muitos núcleos usam o ZGC geracional. Cada flag vai para o jvm_args.txt já
+# ativa, precedida de um comentário com o motivo.
+
+import os
+import re
+from rich.console import Console
+from rich.table import Table
+from easymcserver.config.cds import script_command
+from easymcserver.config.jvm_args import NMT_FLAG, gc_logging_flag
+from easymcserver.config.jvm_flags import SECTION_TITLES, print_problems, validate_args
+from easymcserver.config.launch import refresh_start_script
+from easymcserver.system.cgroup import effective_memory
+from easymcserver.system.hugepages import (
+    PAGESIZE_LOG_FLAG,
+    detect_hugepages,
+    recommend_large_pages,
+)
+from easymcserver.system.jdk import jdk_for_server
+from easymcserver.system.sys_info import get_cpu_count, get_numa_nodes, get_thp_mode
+
+console = Console()
+
+# A partir daqui o Aikar aumenta a geração jovem e as regiões do G1
+LARGE_HEAP_MB = 12 * 1024
+# ZGC só compensa com heap grande e núcleos sobrando para as fases concorrentes
+ZGC_MIN_HEAP_MB = 16 * 1024
+ZGC_MIN_CPUS = 8
+# ZGC geracional: opcional no 21 e 22, padrão a partir do 23
+ZGC_MIN_FEATURE = 21
+ZGC_GENERATIONAL_DEFAULT = 23
+# G1 passou a suportar -XX:+UseNUMA no JDK 14
+G1_NUMA_FEATURE = 14
+# G1RSetUpdatingPauseTimePercent deixou de ter efeito com o novo remembered set
+G1_RSET_MAX_FEATURE = 20
+
+_MEMORY_RE = re.compile(r"^(\d+(?:\.\d+)?)([KMG])$", re.IGNORECASE)
+
+
+def detect_host():
+    """Características da máquina usadas pelo gerador."""
+    return {
+        "cpus": get_cpu_count(),
+        "numa_nodes": get_numa_nodes(),
+        "thp": get_thp_mode(),
+        "hugepages": detect_hugepages(),
+        "memory_mb": effective_memory() // 1024**2,
+    }
+
+
+def memory_to_mb(value: str) -> int:
+    """Converte "4G" em 4096 e "512M" em 512 (megabytes)."""
+    match = _MEMORY_RE.match(str(value).strip())
+    if not match:
+        raise ValueError(f"tamanho de memória inválido: {value!r} (ex.: 4G, 512M)")
+    number, unit = float(match.group(1)), match.group(2).upper()
+    return int(number * {"K": 1 / 1024, "M": 1, "G": 1024}[unit])
+
+
+def script_xmx(directory: str):
+    """Xmx configurado no script de inicialização, ou None."""
+    for arg in script_command(directory) or []:
+        if arg.startswith("-Xmx"):
+            return arg[4:]
+    return None
+
+
+def java_feature(java_version) -> int:
+    """Número da versão do Java: "1.8" vira 8, "21" continua 21."""
+    version = str(java_version)
+    return int(version.split(".")[1] if version.startswith("1.") else float(version))
+
+
+def parallel_gc_threads(cpus: int) -> int:
+    """Mesma fórmula da JVM, mas sobre as CPUs que o processo pode usar.
+
+    Dentro de contêineres ou com taskset, versões antigas da JVM enxergam
+    todas as CPUs do host e criam threads de GC demais.
+    """
+    return cpus if cpus <= 8 else 8 + (cpus - 8) * 5 // 8
+
+
+def use_zgc(feature: int, xmx_mb: int, cpus: int) -> bool:
+    return (
+        feature >= ZGC_MIN_FEATURE
+        and xmx_mb >= ZGC_MIN_HEAP_MB
+        and cpus >= ZGC_MIN_CPUS
+    )
+
+
+def generate_profile(java_version, xmx_mb: int, host=None):
+    """Flags para esta máquina, por seção: {"gc", "memory", "perf", "others"}.
+
+    Cada seção é uma lista de (flag, explicação).
+    """
+    host = host or detect_host()
+    feature = java_feature(java_version)
+    cpus = host["cpus"]
+    parallel = parallel_gc_threads(cpus)
+    concurrent = max(1, (parallel + 2) // 4)
+    large = xmx_mb >= LARGE_HEAP_MB
+    profile = {"gc": [], "memory": [], "perf": [], "others": []}
+
+    if use_zgc(feature, xmx_mb, cpus):
+        profile["gc"].append(
+            (
+                "-XX:+UseZGC",
+                f"ZGC: pausas abaixo de 1 ms mesmo com {xmx_mb // 1024} GB de heap, usando núcleos sobrando",
+            )
+        )
+        if feature < ZGC_GENERATIONAL_DEFAULT:
+            profile["perf"].append(
+                (
+                    "-XX:+ZGenerational",
+                    "Modo geracional do ZGC: coleta os objetos de vida curta (chunks, pacotes) com menos trabalho",
+                )
+            )
+        profile["perf"].append(
+            (
+                f"-XX:ConcGCThreads={max(2, cpus // 4)}",
+                f"Threads das fases concorrentes: 1/4 das {cpus} CPUs, o resto fica para o servidor",
+            )
+        )
+        numa_supported = True
+    else:
+        profile["gc"].append(
+            (
+                "-XX:+UseG1GC",
+                "G1 com as flags do Aikar: pausas curtas e previsíveis para o tamanho de heap de um servidor",
+            )
+        )
+        new_size, max_new_size = (40, 50) if large else (30, 40)
+        region = "16M" if large else "8M"
+        reserve, occupancy = (15, 20) if large else (20, 15)
+        profile["memory"] += [
+            (
+                "-XX:+UnlockExperimentalVMOptions",
+                "Libera G1NewSizePercent e G1MaxNewSizePercent (opções experimentais)",
+            ),
+            (
+                f"-XX:G1NewSizePercent={new_size}",
+                "Geração jovem grande: o servidor cria muitos objetos temporários por tick",
+            ),
+            (
+                f"-XX:G1MaxNewSizePercent={max_new_size}",
+                "Limite da geração jovem, para sobrar espaço para os dados de longa duração",
+            ),
+            (
+                f"-XX:G1HeapRegionSize={region}",
+                "Regiões maiores: arrays de chunks deixam de ser objetos gigantes (humongous)",
+            ),
+            (
+                f"-XX:G1ReservePercent={reserve}",
+                "Reserva para promoções, evita falhas de evacuação (e a pausa longa que vem depois)",
+            ),
+            (
+                "-XX:G1HeapWastePercent=5",
+                "Aceita 5% de espaço não recuperado em troca de menos coletas mistas",
+            ),
+            (
+                "-XX:G1MixedGCCountTarget=4",
+                "Limpa a geração velha em até 4 coletas mistas, cada uma mais curta",
+            ),
+            (
+                f"-XX:InitiatingHeapOccupancyPercent={occupancy}",
+                "Começa a marcação concorrente cedo, antes de a geração velha encher",
+            ),
+            (
+                "-XX:G1MixedGCLiveThresholdPercent=90",
+                "Regiões com até 90% de dados vivos ainda entram nas coletas mistas",
+            ),
+            (
+                "-XX:SurvivorRatio=32",
+                "Espaços survivor pequenos: quase nada sobrevive mais de uma coleta jovem",
+            ),
+            (
+                "-XX:MaxTenuringThreshold=1",
+                "Promove logo o que sobreviveu uma vez, em vez de copiar de novo a cada coleta",
+            ),
+        ]
+        if feature < G1_RSET_MAX_FEATURE:
+            profile["memory"].append(
+                (
+                    "-XX:G1RSetUpdatingPauseTimePercent=5",
+                    "Menos tempo de pausa gasto atualizando o remembered set",
+                )
+            )
+        profile["perf"] += [
+            (
+                "-XX:MaxGCPauseMillis=200",
+                "Meta que o G1 cumpre com folga; metas menores encolhem a geração jovem e geram mais coletas",
+            ),
+            (
+                "-XX:+ParallelRefProcEnabled",
+                "Processa as referências fracas em paralelo durante as pausas",
+            ),
+            (
+                f"-XX:ParallelGCThreads={parallel}",
+                f"Threads das pausas: calculado para as {cpus} CPUs disponíveis para o processo",
+            ),
+            (
+                f"-XX:ConcGCThreads={concurrent}",
+                "Threads da marcação concorrente: cerca de 1/4 das threads de pausa",
+            ),
+        ]
+        numa_supported = feature >= G1_NUMA_FEATURE
+
+    profile["memory"].append(
+        (
+            "-XX:+AlwaysPreTouch",
+            "Reserva e zera todo o heap na inicialização: sem engasgos quando o heap cresce",
+        )
+    )
+    # Páginas explícitas reservadas para o heap inteiro ou, se não houver, THP
+    large_pages = recommend_large_pages(
+        xmx_mb, host.get("hugepages") or {"thp": host["thp"]}, feature
+    )
+    for flag in large_pages["flags"]:
+        profile["memory"].append((flag, large_pages["reason"]))
+    if feature >= 25:
+        profile["memory"].append(
+            (
+                "-XX:+UseCompactObjectHeaders",
+                "Cabeçalhos de objeto de 8 bytes (Java 25): menos memória e mais objetos por cache",
+            )
+        )
+
+    profile["perf"] += [
+        (
+            "-XX:+DisableExplicitGC",
+            "Ignora System.gc() de plugins e mods, que causaria uma coleta completa",
+        ),
+        (
+            "-XX:+PerfDisableSharedMem",
+            "Não grava estatísticas em /tmp a cada coleta (evita pausas por I/O de disco)",
+        ),
+    ]
+    if host["numa_nodes"] > 1 and numa_supported:
+        profile["perf"].append(
+            (
+                "-XX:+UseNUMA",
+                f"Máquina com {host['numa_nodes']} nós NUMA: aloca memória perto da CPU que vai usá-la",
+            )
+        )
+
+    profile["others"].append(
+        (
+            f"#{gc_logging_flag(java_version)}",
+            "Log de GC (desativado): tire o # para analisar as pausas com easymc gclog",
+        )
+    )
+    profile["others"].append(
+        (
+            f"#{NMT_FLAG}",
+            "Rastreamento da memória nativa (desativado, custa ~1% de CPU): use com easymc nmt",
+        )
+    )
+    if large_pages["flags"] and feature >= 9:
+        profile["others"].append(
+            (
+                PAGESIZE_LOG_FLAG,
+                "Registra o tamanho de página do heap: confira com easymc hugepages --verify",
+            )
+        )
+    return profile
+
+
+def write_profile(directory: str, java_version, xmx_mb: int, profile, host):
+    """Grava o jvm_args.txt no formato lido por config/jvm_flags.py."""
+    lines = [
+        '# Não apague a linha "java version"! ',
+        f"#java version: {java_version}",
+        f"# Perfil gerado para {host['cpus']} CPU(s), Xmx {xmx_mb} MB, "
+        f"{host['numa_nodes']} nó(s) NUMA, THP {host['thp'] or 'indisponível'}",
+    ]
+    for section, title in SECTION_TITLES.items():
+        lines += ["", f"# --- {title} ---"]
+        for flag, explanation in profile[section]:
+            lines += [f"# {explanation}", flag]
+    os.makedirs(os.path.join(directory, "logs"), exist_ok=True)
+    with open(os.path.join(directory, "jvm_args.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def generate_jvm_profile(
+    directory: str, xmx: str = None, java_version=None, write: bool = True
+) -> bool:
+    """Gera (e grava, com `write`) o perfil de flags para o servidor em `directory`."""
+    if java_version is None:
+        # O Java que o servidor usa (escolhido pela versão do Minecraft)
+        jdk = jdk_for_server(directory, quiet=True)
+        if not jdk:
+            console.print(
+                "[bold red][ERRO][/bold red] O Java não está instalado ou não está no PATH. Instale-o e tente novamente."
+            )
+            return False
+        java_version = "1.8" if jdk["feature"] == 8 else str(jdk["feature"])
+
+    xmx = xmx or script_xmx(directory)
+    if not xmx:
+        console.print(
+            "[bold red][ERRO][/bold red] Xmx não encontrado no script de inicialização. Informe-o (ex.: --xmx 8G)."
+        )
+        return False
+    try:
+        xmx_mb = memory_to_mb(xmx)
+    except ValueError as e:
+        console.print(f"[bold red][ERRO][/bold red] {e}")
+        return False
+
+    host = detect_host()
+    if xmx_mb > host["memory_mb"]:
+        console.print(
+            f"[bold yellow][AVISO][/bold yellow] O Xmx ({xmx_mb} MB) é maior que a memória da máquina "
+            f"({host['memory_mb']} MB)."
+        )
+    profile = generate_profile(java_version, xmx_mb, host)
+
+    table = Table(
+        title=f"Java {java_version}, Xmx {xmx}, {host['cpus']} CPU(s), "
+        f"{host['numa_nodes']} nó(s) NUMA, THP {host['thp'] or 'indisponível'}"
+    )
+    table.add_column("Flag", style="cyan")
+    table.add_column("Motivo")
+    for section in SECTION_TITLES:
+        for flag, explanation in profile[section]:
+            table.add_row(flag, explanation)
+    console.print(table)
+
+    # O perfil passa pela mesma validação das flags editadas à mão
+    active = [
+        arg
+        for section in SECTION_TITLES
+        for flag, _ in profile[section]
+        if not flag.startswith("#")
+        for arg in flag.split()
+    ]
+    if not print_problems(validate_args(active, java_feature(java_version))):
+        return False
+
+    if write:
+        write_profile(directory, java_version, xmx_mb, profile, host)
+        refresh_start_script(directory)
+        console.print(
+            "[bold green][OK][/bold green] jvm_args.txt gerado com as flags ativas."
+        )
+    return True
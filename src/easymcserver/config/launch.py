@@ -0,0 +1,388 @@
+# Geração do script de inicialização dos servidores Java
+#
+# O script passa o jvm_args.txt para a JVM como arquivo de argumentos
+# (@jvm_args.txt, Java 9+; no Java 8 as flags ativas vão na própria linha)
+# e, opcionalmente, prende o servidor a CPUs (taskset) ou a um nó NUMA
+# (numactl), ajusta a prioridade de CPU (nice) e de disco (ionice) e aumenta
+# o limite de arquivos abertos. As opções ficam em .easymc-launch.json junto
+# com o registro do que foi aplicado (ou ignorado, e por quê); a cada
+# inicialização o próprio script anota em logs/launch.log o comando exato.
+
+import json
+import os
+import re
+import shlex
+import shutil
+import time
+from rich.console import Console
+from rich.table import Table
+from easymcserver.config.cds import (
+    java_index,
+    join_command,
+    launch_flags,
+    script_command,
+)
+from easymcserver.config.jvm_flags import JVM_ARGS_FILE, load_jvm_args
+from easymcserver.system.jdk import default_jdk, describe_jdk, jdk_for_server
+from easymcserver.system.sys_info import get_numa_nodes
+
+console = Console()
+
+LAUNCH_FILE = ".easymc-launch.json"
+LAUNCH_LOG = os.path.join("logs", "launch.log")
+# Java a partir do qual o launcher aceita @arquivo de argumentos
+ARGFILE_FEATURE = 9
+
+_CPU_LIST_RE = re.compile(r"^\d+(-\d+)?(,\d+(-\d+)?)*$")
+# Classes do ionice: nome -> número
+IONICE_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+OPTIONS = ("cpus", "nice", "ionice", "numa_node", "nofile")
+
+
+def _read_config(directory):
+    try:
+        with open(os.path.join(directory, LAUNCH_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_config(directory, config):
+    with open(os.path.join(directory, LAUNCH_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+
+def normalize_options(options: dict) -> dict:
+    """Valida as opções de inicialização; lança ValueError com a mensagem."""
+    result = {}
+    for key, value in (options or {}).items():
+        if key not in OPTIONS:
+            raise ValueError(f"opção de inicialização desconhecida: {key}")
+        if value is None or value == "":
+            continue
+        if key == "cpus":
+            value = str(value).replace(" ", "")
+            if not _CPU_LIST_RE.match(value):
+                raise ValueError(f"lista de CPUs inválida: {value} (ex.: 0-3,8)")
+        elif key == "nice":
+            value = int(value)
+            if not -20 <= value <= 19:
+                raise ValueError("nice deve estar entre -20 e 19")
+        elif key == "ionice":
+            name, _, level = str(value).partition(":")
+            if name not in IONICE_CLASSES:
+                raise ValueError(
+                    f"classe do ionice inválida: {name} (use {', '.join(IONICE_CLASSES)})"
+                )
+            if level and (not level.isdigit() or not 0 <= int(level) <= 7):
+                raise ValueError("o nível do ionice vai de 0 a 7")
+            if name == "idle" and level:
+                raise ValueError("a classe idle do ionice não tem nível")
+        elif key == "numa_node":
+            value = int(value)
+            nodes = get_numa_nodes()
+            if not 0 <= value < nodes:
+                raise ValueError(f"nó NUMA inválido: {value} (a máquina tem {nodes})")
+        elif key == "nofile":
+            value = int(value)
+            if value <= 0:
+                raise ValueError("o limite de arquivos abertos deve ser positivo")
+        result[key] = value
+    return result
+
+
+def _is_root():
+    return hasattr(os, "geteuid") and os.geteuid() == 0
+
+
+def _wrappers_posix(options):
+    """Prefixo do comando (numactl, taskset, nice, ionice) e o registro."""
+    prefix, applied, skipped = [], {}, {}
+
+    def tool(name, args, key, note=None):
+        if not shutil.which(name):
+            skipped[key] = f"{name} não encontrado"
+            return
+        prefix.extend([name] + args)
+        applied[key] = shlex.join([name] + args) + (f" ({note})" if note else "")
+
+    if "numa_node" in options:
+        node = str(options["numa_node"])
+        tool("numactl", [f"--cpunodebind={node}", f"--membind={node}"], "numa_node")
+    if "cpus" in options:
+        note = None
+        if hasattr(os, "sched_getaffinity"):
+            allowed = os.sched_getaffinity(0)
+            wanted = set()
+            for part in options["cpus"].split(","):
+                start, _, end = part.partition("-")
+                wanted.update(range(int(start), int(end or start) + 1))
+            if not wanted <= allowed:
+                note = "há CPUs fora das disponíveis para este processo"
+        tool("taskset", ["-c", options["cpus"]], "cpus", note)
+    if "nice" in options:
+        note = (
+            "prioridade maior exige root"
+            if options["nice"] < 0 and not _is_root()
+            else None
+        )
+        tool("nice", ["-n", str(options["nice"])], "nice", note)
+    if "ionice" in options:
+        name, _, level = options["ionice"].partition(":")
+        args = ["-c", str(IONICE_CLASSES[name])]
+        if level:
+            args += ["-n", level]
+        note = (
+            "a classe realtime exige root"
+            if name == "realtime" and not _is_root()
+            else None
+        )
+        # -t: se o kernel recusar a classe, o servidor inicia mesmo assim
+        tool("ionice", ["-t"] + args, "ionice", note)
+    if "nofile" in options:
+        applied["nofile"] = f"ulimit -n {options['nofile']}"
+        try:
+            import resource
+
+            _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            if (
+                hard != resource.RLIM_INFINITY
+                and options["nofile"] > hard
+                and not _is_root()
+            ):
+                applied["nofile"] += f" (acima do limite rígido {hard}: exige root)"
+        except (ImportError, OSError, ValueError):
+            pass
+    return prefix, applied, skipped
+
+
+def _wrappers_windows(options):
+    """No Windows só a afinidade e a prioridade existem (start /AFFINITY /LOW...)."""
+    prefix, applied, skipped = [], {}, {}
+    flags = []
+    if "cpus" in options:
+        mask = 0
+        for part in options["cpus"].split(","):
+            start, _, end = part.partition("-")
+            for cpu in range(int(start), int(end or start) + 1):
+                mask |= 1 << cpu
+        flags += ["/AFFINITY", f"{mask:X}"]
+        applied["cpus"] = f"/AFFINITY {mask:X}"
+    if "nice" in options:
+        nice = options["nice"]
+        if nice >= 10:
+            priority = "/LOW"
+        elif nice > 0:
+            priority = "/BELOWNORMAL"
+        elif nice <= -10:
+            priority = "/HIGH"
+        elif nice < 0:
+            priority = "/ABOVENORMAL"
+        else:
+            priority = "/NORMAL"
+        flags.append(priority)
+        applied["nice"] = priority
+    for key in ("ionice", "numa_node", "nofile"):
+        if key in options:
+            skipped[key] = "não disponível no Windows"
+    if flags:
+        prefix = ["start", '""', "/B", "/WAIT"] + flags
+    return prefix, applied, skipped
+
+
+def java_executable(directory: str) -> str:
+    """Java do script: "java" ou o JDK instalado que atende à versão do servidor."""
+    jdk = jdk_for_server(directory)
+    default = default_jdk()
+    if not jdk or (
+        default and os.path.realpath(jdk["java"]) == os.path.realpath(default["java"])
+    ):
+        return "java"
+    return jdk["java"]
+
+
+def jvm_args_for(directory: str, java: str):
+    """Como o jvm_args.txt entra no comando: (argumentos, modo)."""
+    model = load_jvm_args(directory)
+    if model is None or not model.active_args():
+        return [], "nenhum"
+    jdk = describe_jdk(java)
+    if jdk and jdk["feature"] < ARGFILE_FEATURE:
+        # O Java 8 não lê arquivos de argumentos: as flags vão na linha
+        return model.active_args(), "inline"
+    return [f"@{JVM_ARGS_FILE}"], "argfile"
+
+
+def build_command(directory: str, xmx: str, xms: str, java: str = None):
+    """Comando da JVM (sem os prefixos): java, memória, CDS, jvm_args.txt e alvo."""
+    # Importação local: utils importa este módulo para montar o script
+    from easymcserver.utils import get_launch_target
+
+    java = java or java_executable(directory)
+    jvm_args, mode = jvm_args_for(directory, java)
+    command = [java, f"-Xmx{xmx}", f"-Xms{xms}"]
+    command += launch_flags(directory, java)
+    command += jvm_args
+    command += get_launch_target(directory).split(" ") + ["nogui"]
+    return command, mode
+
+
+def _echo_escape(text: str) -> str:
+    """Texto seguro dentro de aspas duplas no bash."""
+    return re.sub(r'([\\"$`])', r"\\\1", text)
+
+
+def _bat_escape(text: str) -> str:
+    return re.sub(r"([&|<>^])", r"^\1", text.replace("%", "%%"))
+
+
+def build_start_script(directory: str, xmx: str, xms: str):
+    """Conteúdo do start.sh/start.bat; grava o registro em .easymc-launch.json."""
+    config = _read_config(directory)
+    options = config.get("options", {})
+    java = java_executable(directory)
+    command, mode = build_command(directory, xmx, xms, java)
+    if os.name == "nt":
+        prefix, applied, skipped = _wrappers_windows(options)
+        line = join_command(prefix + command)
+        content = "\n".join(
+            [
+                "@echo off",
+                "rem Gerado pelo EasyMCServer (easymc launch)",
+                'cd /d "%~dp0"',
+                "if not exist logs mkdir logs",
+                f"echo %date% %time% {_bat_escape(line)} >> {LAUNCH_LOG}",
+                line,
+                "pause",
+            ]
+        )
+    else:
+        prefix, applied, skipped = _wrappers_posix(options)
+        line = shlex.join(prefix + command)
+        lines = [
+            "#!/bin/bash",
+            f"# Gerado pelo EasyMCServer (easymc launch). O que foi aplicado fica em {LAUNCH_FILE}",
+            f"# e, a cada inicialização, em {LAUNCH_LOG}.",
+            'cd "$(dirname "$0")" || exit 1',
+        ]
+        if "nofile" in options:
+            nofile = options["nofile"]
+            lines.append(
+                f"ulimit -n {nofile} 2>/dev/null || echo "
+                f'"[AVISO] Não foi possível aumentar o limite de arquivos abertos para {nofile}." >&2'
+            )
+        lines += [
+            "mkdir -p logs",
+            f"echo \"$(date '+%Y-%m-%d %H:%M:%S') pid=$$ nofile=$(ulimit -n) {_echo_escape(line)}\" >> {LAUNCH_LOG}",
+            f"exec {line}",
+        ]
+        content = "\n".join(lines) + "\n"
+
+    config.update(
+        {
+            "options": options,
+            "xmx": xmx,
+            "xms": xms,
+            "jvm_args": mode,
+            "applied": applied,
+            "skipped": skipped,
+            "command": prefix + command,
+            "generated_at": time.time(),
+        }
+    )
+    _write_config(directory, config)
+    return content
+
+
+def _script_memory(directory):
+    """Xmx/Xms do registro ou, em scripts antigos, da linha do java."""
+    config = _read_config(directory)
+    xmx, xms = config.get("xmx"), config.get("xms")
+    for arg in script_command(directory) or []:
+        if arg.startswith("-Xmx") and not xmx:
+            xmx = arg[4:]
+        elif arg.startswith("-Xms") and not xms:
+            xms = arg[4:]
+    return xmx, xms
+
+
+def refresh_start_script(directory: str) -> bool:
+    """Regera o script de um servidor Java já instalado (flags, CDS, prefixos)."""
+    # Importação local: utils importa este módulo para montar o script
+    from easymcserver.utils import create_start_script
+
+    xmx, xms = _script_memory(directory)
+    if not xmx or not xms:
+        return False
+    create_start_script("Java", directory, xmx, xms, quiet=True)
+    return True
+
+
+def launch_command(directory: str):
+    """Comando do script como lista (para executar sem shell) e as opções.
+
+    No Windows o prefixo "start /AFFINITY ..." é um comando do cmd: a lista
+    começa no java e quem executa aplica a afinidade e a prioridade.
+    Retorna (None, {}) se o servidor não tiver script Java.
+    """
+    if not _read_config(directory).get("command") and not refresh_start_script(
+        directory
+    ):
+        return None, {}
+    config = _read_config(directory)
+    command = list(config["command"])
+    if os.name == "nt":
+        command = command[java_index(command) or 0 :]
+    return command, config.get("options", {})
+
+
+def log_launch(directory: str, command, pid: int, nofile=None):
+    """Anota uma inicialização em logs/launch.log, no mesmo formato do script."""
+    os.makedirs(os.path.join(directory, "logs"), exist_ok=True)
+    with open(os.path.join(directory, LAUNCH_LOG), "a", encoding="utf-8") as f:
+        f.write(
+            f"{time.strftime('%Y-%m-%d %H:%M:%S')} pid={pid} nofile={nofile or '?'} "
+            f"{join_command(command)}\n"
+        )
+
+
+def show_launch(directory: str):
+    config = _read_config(directory)
+    table = Table(title="Inicialização do servidor")
+    table.add_column("Opção", style="cyan")
+    table.add_column("Aplicado")
+    for key, value in config.get("applied", {}).items():
+        table.add_row(key, value)
+    for key, reason in config.get("skipped", {}).items():
+        table.add_row(key, f"[bold yellow]ignorado:[/bold yellow] {reason}")
+    table.add_row("jvm_args.txt", config.get("jvm_args", "-"))
+    console.print(table)
+    if config.get("command"):
+        console.print(f"[dim]{join_command(config['command'])}[/dim]")
+
+
+def set_launch_options(directory: str, options: dict, clear: bool = False) -> dict:
+    """Grava as opções (somadas às salvas, ou só elas com `clear`); lança ValueError."""
+    options = normalize_options(options)
+    config = _read_config(directory)
+    current = {} if clear else config.get("options", {})
+    current.update(options)
+    config["options"] = current
+    _write_config(directory, config)
+    return current
+
+
+def configure_launch(directory: str, options: dict = None, clear: bool = False) -> bool:
+    """Atualiza as opções de inicialização do servidor e regera o script."""
+    try:
+        set_launch_options(directory, options, clear)
+    except ValueError as e:
+        console.print(f"[bold red][ERRO][/bold red] {e}")
+        return False
+    if not refresh_start_script(directory):
+        console.print(
+            "[bold red][ERRO][/bold red] Script de inicialização Java não encontrado. Instale o servidor primeiro."
+        )
+        return False
+    show_launch(directory)
+    return True
@@ -1,7 +1,7 @@
 import os
-import subprocess
 from InquirerPy import prompt
 from rich.console import Console
+from easymcserver.system.supervisor import boot_until_done
 
 console = Console()
 
@@ -134,42 +134,49 @@ def server_properties(directory, version=None):
     return
 
 
-def auto_start_stop_java(directory):
+def apply_properties(directory, values: dict):
+    """Grava `values` no server.properties sem perguntar nada (uso não interativo).
 
-    command = "start.bat" if os.name == "nt" else "./start.sh"
-
-    # Iniciamos o processo com pipes para entrada e saída
-    process = subprocess.Popen(
-        command,
-        cwd=directory,
-        shell=True,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-    )
+    Se o arquivo ainda não existir, ele é criado só com essas chaves; o
+    servidor completa as demais na primeira inicialização.
+    """
+    try:
+        from jproperties import Properties
+    except Exception as e:
+        console.print(
+            f"[bold red][ERRO][/bold red] Biblioteca 'jproperties' não está disponível: {e}"
+        )
+        return False
+
+    server_properties_path = os.path.join(directory, "server.properties")
+    configs = Properties()
+    if os.path.exists(server_properties_path):
+        with open(server_properties_path, "rb") as f:
+            configs.load(f)
+
+    for chave, valor in values.items():
+        # Booleanos do TOML viram "true"/"false", como o Minecraft espera
+        configs[chave] = str(valor).lower() if isinstance(valor, bool) else str(valor)
+
+    with open(server_properties_path, "wb") as f:
+        configs.store(f, encoding="utf-8")
+    return True
+
+
+def auto_start_stop_java(directory):
 
     console.print(
         "[bold green][OK][/bold green] Iniciando o servidor para gerar arquivos. Isso pode demorar um pouco..."
     )
 
-    # Loop para monitorar a saída do terminal em tempo real
-    while True:
-        linha = process.stdout.readline()
-        if not linha:
-            break
-
-        # O Minecraft avisa que terminou com a mensagem "Done"
-        if "Done" in linha:
-            console.print(
-                "[bold green][OK][/bold green] Servidor foi carregado e os arquivos foram gerados. Enviando comando 'stop'...\n"
-            )
-
-            # Envia o comando 'stop' seguido de uma quebra de linha
-            process.stdin.write("stop\n")
-            process.stdin.flush()
-            break
+    if boot_until_done(directory) is not None:
+        console.print(
+            "[bold green][OK][/bold green] Servidor foi carregado, os arquivos foram gerados e ele foi parado.\n"
+        )
+    else:
+        console.print(
+            "[bold red][ERRO][/bold red] O servidor não terminou de iniciar (veja logs/latest.log).\n"
+        )
 
 
 if __name__ == "__main__":
@@ -1,3 +1,13 @@
 """Download-related utilities and helpers."""
 
-__all__ = ["server_download", "download_file_with_progress"]
+__all__ = [
+    "server_download",
+    "download_file_with_progress",
+    "ranged_download",
+    "extract_zip",
+    "resolve_server_jar",
+    "resolve_paper",
+    "download_plugins",
+    "fetch_libraries",
+    "cache",
+]
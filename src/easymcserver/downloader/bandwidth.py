@@ -0,0 +1,228 @@
+# Limite de banda compartilhado (token bucket) entre downloads e processos
+#
+# Todos os downloads do processo passam pelo mesmo limitador. O balde de
+# tokens fica em um arquivo no diretório de cache, protegido por um lock de
+# arquivo, então vários `easymc` rodando ao mesmo tempo dividem o mesmo
+# orçamento e não derrubam a conexão dos servidores que já estão no ar.
+
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from easymcserver.downloader.cache import get_cache_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Prioridades: quanto menor, antes é atendido
+HIGH, NORMAL, LOW = 0, 1, 2
+
+# Capacidade do balde, em segundos de taxa (rajada máxima permitida)
+BURST_SECONDS = 0.5
+# Cada leitura limitada pede no máximo essa fração de segundo de taxa
+SLICE_SECONDS = 0.1
+MIN_SLICE = 16 * 1024
+# Processo que não renova seu registro há mais que isso é considerado encerrado
+STALE_AFTER = 2.0
+# Download deste processo que pediu banda há menos que isso ainda está ativo
+ACTIVE_WINDOW = 0.5
+
+_RATE_RE = re.compile(
+    r"^\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?(?:/s)?\s*$", re.IGNORECASE
+)
+_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_rate(text) -> int:
+    """Converte "20M", "512K" ou "1.5MB/s" em bytes por segundo (vazio = sem limite)."""
+    if text in (None, ""):
+        return 0
+    if isinstance(text, (int, float)):
+        return int(text)
+    match = _RATE_RE.match(str(text))
+    if not match:
+        raise ValueError(f"taxa inválida: {text!r} (ex.: 20M, 512K)")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+class _LocalBucket:
+    """Balde só deste processo (quando o arquivo compartilhado não está disponível).
+
+    Um download `outranked` (há outro mais prioritário ativo) só usa a sobra
+    do balde, acima da metade: se o mais prioritário consome toda a taxa, o
+    outro espera; se ele não dá conta de usar a banda, o outro aproveita.
+    """
+
+    def __init__(self):
+        self.tokens = None
+        self.updated = time.monotonic()
+
+    def take(self, want, rate, priority, outranked):
+        now = time.monotonic()
+        burst = max(MIN_SLICE, rate * BURST_SECONDS)
+        if self.tokens is None:
+            self.tokens = burst
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        available = self.tokens - burst / 2 if outranked else self.tokens
+        granted = int(max(0, min(want, available)))
+        self.tokens -= granted
+        return granted
+
+
+class _SharedBucket:
+    """Balde guardado em arquivo e compartilhado por todos os processos do host.
+
+    Cada processo registra a prioridade do download que está esperando; quem
+    tem prioridade menor que a de outro processo ativo também passa a usar só
+    a sobra do balde, como em _LocalBucket.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = str(path) + ".lock"
+        self.pid = str(os.getpid())
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, "a+b") as f:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write(self, state):
+        # Quem escreve está com o lock: não há concorrência no temporário
+        tmp = str(self.path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def take(self, want, rate, priority, outranked):
+        with self._locked():
+            state = self._read()
+            now = time.time()
+            burst = max(MIN_SLICE, rate * BURST_SECONDS)
+            tokens = state.get("tokens", burst)
+            elapsed = max(0.0, now - state.get("updated", now))
+            tokens = min(burst, tokens + elapsed * rate)
+
+            waiters = {
+                pid: entry
+                for pid, entry in state.get("waiters", {}).items()
+                if pid != self.pid and now - entry[1] < STALE_AFTER
+            }
+            best_other = min((entry[0] for entry in waiters.values()), default=LOW)
+            outranked = outranked or priority > best_other
+            available = tokens - burst / 2 if outranked else tokens
+            granted = int(max(0, min(want, available)))
+
+            waiters[self.pid] = [priority, now]
+            self._write(
+                {"tokens": tokens - granted, "updated": now, "waiters": waiters}
+            )
+        return granted
+
+
+class BandwidthLimiter:
+    """Limita a taxa somada de todos os downloads a `rate` bytes por segundo.
+
+    Dentro do processo, o download de maior prioridade (e, entre iguais, o que
+    chegou primeiro) é atendido antes; os outros esperam a vez.
+    """
+
+    def __init__(self, rate: int, shared_path=None):
+        self.rate = rate
+        self.slice_size = max(MIN_SLICE, int(rate * SLICE_SECONDS))
+        self._bucket = _SharedBucket(shared_path) if shared_path else _LocalBucket()
+        self._condition = threading.Condition()
+        self._queue = []
+        self._counter = itertools.count()
+        # prioridade -> último pedido de banda (para saber quem está ativo)
+        self._active = {}
+
+    def acquire(self, n: int, priority: int = NORMAL):
+        """Bloqueia até `n` bytes poderem ser consumidos."""
+        ticket = (priority, next(self._counter))
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+        try:
+            while n > 0:
+                with self._condition:
+                    while self._queue[0] != ticket:
+                        self._condition.wait()
+                    now = time.monotonic()
+                    self._active[priority] = now
+                    outranked = any(
+                        other < priority and now - seen < ACTIVE_WINDOW
+                        for other, seen in self._active.items()
+                    )
+                    try:
+                        granted = self._bucket.take(n, self.rate, priority, outranked)
+                    except OSError:
+                        # Sem acesso ao arquivo compartilhado: segue limitando só este processo
+                        self._bucket = _LocalBucket()
+                        continue
+                n -= granted
+                if n > 0:
+                    # Dorme fora do lock: um download mais prioritário pode passar na frente
+                    time.sleep(min(max(n / self.rate, 0.01), SLICE_SECONDS))
+        finally:
+            with self._condition:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+
+
+_limiter = None
+_configured = False
+_config_lock = threading.Lock()
+
+
+def configure(rate=None):
+    """Define o limite global (bytes/s ou texto como "20M"). 0/None = sem limite."""
+    global _limiter, _configured
+    rate = parse_rate(rate)
+    with _config_lock:
+        if rate <= 0:
+            _limiter = None
+        else:
+            directory = get_cache_dir()
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+                shared_path = directory / "bandwidth.json"
+            except OSError:
+                shared_path = None
+            _limiter = BandwidthLimiter(rate, shared_path)
+        _configured = True
+    return _limiter
+
+
+def get_limiter():
+    """Limitador global, ou None sem limite. Padrão: variável EASYMC_MAX_RATE."""
+    if not _configured:
+        configure(os.environ.get("EASYMC_MAX_RATE"))
+    return _limiter
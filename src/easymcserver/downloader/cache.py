@@ -0,0 +1,254 @@
+# Cache local de artefatos endereçado por conteúdo (SHA-1/SHA-256)
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import zipfile
+from pathlib import Path
+from rich.console import Console
+
+console = Console()
+
+# Limite padrão do cache (pode ser alterado com EASYMC_CACHE_MAX_BYTES)
+DEFAULT_MAX_BYTES = 4 * 1024**3
+
+# Os links do piston-data trazem o SHA-1 do arquivo:
+# https://piston-data.mojang.com/v1/objects/<sha1>/server.jar
+_URL_HASH_RE = re.compile(r"/objects/([0-9a-f]{40}|[0-9a-f]{64})/", re.IGNORECASE)
+
+# O tamanho do digest em hexadecimal identifica o algoritmo
+_ALGORITHMS = {40: "sha1", 64: "sha256", 128: "sha512"}
+
+_index_lock = threading.Lock()
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+
+def get_cache_dir() -> Path:
+    """Retorna o diretório raiz de cache do EasyMCServer."""
+    custom = os.environ.get("EASYMC_CACHE_DIR")
+    if custom:
+        root = Path(custom)
+    elif os.name == "nt":
+        root = Path(os.environ.get("LOCALAPPDATA", Path.home())) / "EasyMCServer"
+    else:
+        root = (
+            Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+            / "easymcserver"
+        )
+    root.mkdir(parents=True, exist_ok=True)
+    return root
+
+
+def get_max_bytes() -> int:
+    try:
+        return int(os.environ.get("EASYMC_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+
+
+def _objects_dir() -> Path:
+    path = get_cache_dir() / "objects"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _url_index_path() -> Path:
+    return get_cache_dir() / "urls.json"
+
+
+def algorithm_for(digest: str):
+    """Descobre o algoritmo (sha1, sha256...) pelo tamanho do digest."""
+    return _ALGORITHMS.get(len(digest or ""))
+
+
+def file_digest(path, algorithm: str = "sha1") -> str:
+    h = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def key_lock(key: str) -> threading.Lock:
+    """Lock por artefato: downloads simultâneos do mesmo arquivo esperam o primeiro."""
+    with _key_locks_guard:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def _load_url_index() -> dict:
+    try:
+        with open(_url_index_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_url_index(index: dict) -> None:
+    tmp = _url_index_path().with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, _url_index_path())
+
+
+def remember_url(url: str, obj) -> None:
+    """Aponta `url` para o objeto `obj` do cache.
+
+    Para links sem hash (Bedrock, plugins sem SHA): só deve ser chamado
+    depois que o arquivo foi validado (ZIP íntegro, extração concluída),
+    senão um download cortado passaria a ser "o conteúdo" da URL.
+    """
+    obj = Path(obj)
+    if not url or obj.parent != _objects_dir():
+        return
+    with _index_lock:
+        index = _load_url_index()
+        index[url] = obj.name
+        _save_url_index(index)
+
+
+def forget_url(url: str) -> None:
+    """Remove `url` do índice e apaga o objeto dela, que se mostrou inválido."""
+    with _index_lock:
+        index = _load_url_index()
+        digest = index.pop(url, None)
+        if digest is None:
+            return
+        _save_url_index(index)
+    try:
+        (_objects_dir() / digest).unlink()
+    except OSError:
+        pass
+
+
+def is_valid_zip(path) -> bool:
+    """True se `path` é um ZIP/JAR com o diretório central íntegro (não cortado)."""
+    try:
+        with zipfile.ZipFile(path):
+            return True
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+
+def digest_for_url(url: str):
+    """Retorna o digest conhecido de uma URL (embutido no link ou já baixado antes)."""
+    match = _URL_HASH_RE.search(url or "")
+    if match:
+        return match.group(1).lower()
+    return _load_url_index().get(url)
+
+
+def lookup(digest: str):
+    """Procura um objeto no cache. Atualiza o atime para a política LRU.
+
+    O mtime fica como está: o inode é o mesmo do server.jar hardlinkado nos
+    servidores, e mudar o mtime mudaria o deles também.
+    """
+    if not digest or not algorithm_for(digest):
+        return None
+    path = _objects_dir() / digest.lower()
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    try:
+        os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+    except OSError:
+        pass
+    return path
+
+
+def link_or_copy(src, dest) -> None:
+    """Cria um hardlink de src em dest; se não for possível, copia."""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        os.link(src, tmp)
+    except OSError:
+        # Outro sistema de arquivos, FAT32, sem permissão etc.
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def fetch_from_cache(digest: str, dest) -> bool:
+    """Materializa um objeto do cache em dest. Retorna False em caso de miss."""
+    cached = lookup(digest)
+    if cached is None:
+        return False
+    link_or_copy(cached, dest)
+    return True
+
+
+def store(src, digest: str = None, url: str = None, verified: bool = False):
+    """Adiciona um arquivo ao cache e retorna o caminho do objeto.
+
+    Se `digest` for informado, o conteúdo é verificado contra ele; caso
+    contrário, o arquivo é indexado pelo seu SHA-1. Quando `url` e `digest`
+    são informados, a URL passa a apontar para o objeto; sem digest nada
+    garante que o arquivo está completo, e quem chama usa remember_url()
+    depois de validá-lo. Use `verified=True` quando o digest já foi calculado
+    durante o download.
+    """
+    algorithm = algorithm_for(digest) if digest else "sha1"
+    if algorithm is None:
+        return None
+    actual = digest.lower() if verified and digest else file_digest(src, algorithm)
+    if digest and actual != digest.lower():
+        console.print(
+            f"[bold red][ERRO][/bold red] Hash inválido para '{src}': esperado {digest}, obtido {actual}."
+        )
+        return None
+
+    target = _objects_dir() / actual
+    if not target.exists():
+        link_or_copy(src, target)
+        if os.name != "nt":
+            # Os objetos são compartilhados por hardlink: não podem ser editados
+            os.chmod(target, 0o444)
+
+    if url and digest:
+        remember_url(url, target)
+
+    evict(get_max_bytes())
+    return target
+
+
+def evict(max_bytes: int) -> int:
+    """Remove os objetos menos usados recentemente até caber em max_bytes.
+
+    Objetos sem hardlinks nos servidores saem primeiro: só apagá-los libera
+    espaço em disco. Os demais continuam ocupando os blocos pelos servidores
+    e só saem depois. Retorna a quantidade de bytes realmente liberados.
+    """
+    entries = []
+    total = 0
+    for path in _objects_dir().iterdir():
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        # Ordem: sem outros links, depois o menos usado (atime, ver lookup)
+        entries.append((st.st_nlink > 1, st.st_atime, st.st_size, path))
+        total += st.st_size
+
+    freed = 0
+    entries.sort()
+    for linked, _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            # Hardlinks já criados nos servidores continuam válidos
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        if not linked:
+            freed += size
+    return freed
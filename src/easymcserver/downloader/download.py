@@ -1,8 +1,15 @@
 import requests
-import io
 import os
+import threading
 import zipfile
+from contextlib import contextmanager
 from pathlib import Path
+from easymcserver.downloader import bandwidth, cache
+from easymcserver.downloader.extract import extract_zip
+from easymcserver.downloader.manifest import resolve_server_jar
+from easymcserver.downloader.paper import download_plugins, resolve_paper
+from easymcserver.downloader.ranged import ranged_download
+from easymcserver.downloader.update import update_in_place
 from rich.console import Console
 from rich.progress import (
     Progress,
@@ -29,10 +36,36 @@ progress_layout = Progress(
     transient=True,
 )
 
+# Downloads em paralelo (ex.: apply_fleet) dividem a mesma barra: só o
+# primeiro a entrar a inicia e só o último a sair a encerra
+_progress_lock = threading.Lock()
+_progress_users = 0
 
-def server_download(server_type, test=False):
+
+@contextmanager
+def shared_progress():
+    """Entra na barra de progresso compartilhada e devolve o objeto Progress."""
+    global _progress_users
+    with _progress_lock:
+        if _progress_users == 0:
+            progress_layout.start()
+        _progress_users += 1
+    try:
+        yield progress_layout
+    finally:
+        with _progress_lock:
+            _progress_users -= 1
+            if _progress_users == 0:
+                progress_layout.stop()
+
+
+def server_download(server_type, test=False, output_dir=None, update=False):
     """Gerencia o download e setup inicial do servidor.
 
+    Com `output_dir`, o diretório não é perguntado ao usuário. Com
+    `update=True`, uma instalação existente é atualizada no lugar: só os
+    arquivos que mudaram são gravados e as configurações/mundos são mantidos.
+
     Nota: faz import local de funções de UI quando necessário para evitar
     importação circular ao reorganizar os pacotes.
     """
@@ -42,10 +75,15 @@ def server_download(server_type, test=False):
         select_dir,
         get_bedrock_download_link,
         get_java_download_link,
+        get_paper_version,
+        get_plugin_links,
+        get_loader_versions,
     )
 
     # Define o diretório de saída com base no tipo de servidor
-    if test:
+    if output_dir is not None:
+        pass
+    elif test:
         test_dir = Path(r"Z:\test")
         if test_dir.exists():
             # usar o diretório de testes já existente
@@ -69,29 +107,108 @@ def server_download(server_type, test=False):
     else:
         output_dir = select_dir(server_type)
 
+    # --- Perguntas específicas de cada tipo ---
+    if server_type == "Bedrock":
+        options = {"url": get_bedrock_download_link()}
+
+    elif server_type == "Vanilla":
+        if test:
+            options = {
+                "url": "https://piston-data.mojang.com/v1/objects/64bb6d763bed0a9f1d632ec347938594144943ed/server.jar"
+            }
+        else:
+            options = {"url": get_java_download_link()}
+
+    elif server_type == "Paper (Otimizado)":
+        options = {
+            "version": get_paper_version(),
+            "plugins": [] if update else get_plugin_links(),
+        }
+
+    elif server_type in ["Fabric (Mods)", "NeoForge (Mods)"]:
+        game_version, loader_version = get_loader_versions(server_type)
+        options = {"version": game_version, "loader_version": loader_version}
+
+    else:
+        console.print(
+            f"[bold red]AVISO:[/bold red] Tipo de servidor '{server_type}' não suportado ainda."
+        )
+        return False
+
+    return install_server(server_type, output_dir, update=update, **options)
+
+
+def install_server(
+    server_type,
+    output_dir,
+    version="latest",
+    loader_version="latest",
+    url=None,
+    plugins=None,
+    update=False,
+):
+    """Instala (ou atualiza) um servidor sem nenhuma pergunta ao usuário.
+
+    `url` tem prioridade sobre `version` (Vanilla) e é obrigatória no Bedrock.
+    Retorna o diretório do servidor ou False em caso de falha. Servidores
+    instalados entram no registro (ver instances.py).
+    """
+    # Importações locais: instances/dedup dependem do pacote downloader
+    from easymcserver.instances import register_instance
+    from easymcserver.system.dedup import break_links
+
+    if update:
+        # Binários compartilhados com outros servidores não podem ser alterados aqui
+        break_links(output_dir)
+
+    result = _install_server(
+        server_type, output_dir, version, loader_version, url, plugins, update
+    )
+    if result:
+        register_instance(result, server_type)
+    return result
+
+
+def _install_server(
+    server_type, output_dir, version, loader_version, url, plugins, update
+):
+
     # --- Lógica Bedrock ---
     if server_type == "Bedrock":
-        link = get_bedrock_download_link()
         filename = "bedrock_server.zip"
 
-        zip_content = download_file_with_progress(link, filename, output_dir)
+        zip_path = download_file_with_progress(
+            url, filename, output_dir, priority=bandwidth.HIGH
+        )
 
-        if zip_content:
+        if zip_path:
             console.print("[cyan]Extraindo arquivos Bedrock...[/cyan]")
             try:
-                # O BytesIO é usado pois o arquivo foi baixado para a memória
-                with zipfile.ZipFile(zip_content, "r") as zip_ref:
-                    zip_ref.extractall(output_dir)
+                # O ZIP fica em disco (ou no cache) e é extraído em paralelo
+                if update:
+                    update_in_place(zip_path, output_dir)
+                else:
+                    extract_zip(zip_path, output_dir)
+                ensure_executable(os.path.join(output_dir, "bedrock_server"))
                 console.print(
                     "[bold green][OK][/bold green] Arquivos Bedrock extraídos."
                 )
+                # Só um ZIP extraído com sucesso passa a ser o conteúdo da URL
+                cache.remember_url(url, zip_path)
                 return output_dir
             except zipfile.BadZipFile:
+                # Um ZIP cortado no cache não pode ser reutilizado nas próximas tentativas
+                cache.forget_url(url)
                 console.print(
                     "[bold red][ERRO][/bold red] O arquivo baixado não é um ZIP válido. Verifique o link."
                 )
             except Exception as e:
                 console.print(f"[bold red]ERRO na extração:[/bold red] {e}")
+            finally:
+                # Uma cópia continua no cache; a do diretório do servidor não é necessária
+                temp_zip = os.path.join(output_dir, filename)
+                if os.path.exists(temp_zip):
+                    os.remove(temp_zip)
             return False  # Falha na extração
         return False  # Falha no download
 
@@ -103,26 +220,72 @@ def server_download(server_type, test=False):
         "Fabric (Mods)",
     ]:
 
-        if server_type == "Vanilla":
-            if test:
-                download_url = "https://piston-data.mojang.com/v1/objects/64bb6d763bed0a9f1d632ec347938594144943ed/server.jar"
+        expected_hash = None
 
+        if server_type == "Vanilla":
+            if url:
+                download_url = url
             else:
-                download_url = get_java_download_link()
+                server = resolve_server_jar(version)
+                if not server:
+                    console.print(
+                        f"[bold red][ERRO][/bold red] Versão do Minecraft '{version}' não encontrada."
+                    )
+                    return False
+                download_url = server["url"]
+                expected_hash = server["sha1"]
 
             filename = "server.jar"
 
-        else:
-            return False  # Tipo não suportado
+        elif server_type == "Paper (Otimizado)":
+            try:
+                build = resolve_paper(version)
+            except Exception as e:
+                console.print(
+                    f"[bold red][ERRO][/bold red] Não foi possível consultar a API do Paper: {e}"
+                )
+                return False
+            if not build:
+                console.print(
+                    "[bold red][ERRO][/bold red] Nenhuma build estável do Paper encontrada para essa versão."
+                )
+                return False
+            console.print(
+                f"[bold green][OK][/bold green] Paper {build['version']} (build {build['build']})."
+            )
+            download_url = build["url"]
+            expected_hash = build["sha256"]
+            filename = "server.jar"
+
+        elif server_type in ["Fabric (Mods)", "NeoForge (Mods)"]:
+            # Importações locais: os instaladores usam download_file_with_progress
+            from easymcserver.downloader.fabric import install_fabric
+            from easymcserver.downloader.neoforge import install_neoforge
+
+            install = (
+                install_fabric if server_type == "Fabric (Mods)" else install_neoforge
+            )
+            try:
+                installed = install(output_dir, version, loader_version)
+            except Exception as e:
+                console.print(
+                    f"[bold red][ERRO][/bold red] Falha ao instalar o {server_type}: {e}"
+                )
+                installed = False
+            if not installed:
+                return False
+            write_eula(output_dir)
+            return output_dir
 
         # --- Download ---
 
-        if download_file_with_progress(download_url, filename, output_dir):
-            # Criar EULA
-            eula_path = os.path.join(output_dir, "eula.txt")
-            with open(eula_path, "w") as f:
-                f.write("eula=true\n")
-            console.print("[bold green][OK][/bold green] EULA aceito automaticamente.")
+        # O jar do servidor vem antes dos plugins no limite de banda
+        if download_file_with_progress(
+            download_url, filename, output_dir, expected_hash, bandwidth.HIGH
+        ):
+            write_eula(output_dir)
+            if plugins:
+                download_plugins(plugins, output_dir)
             return output_dir
         return False  # Falha no download
 
@@ -133,70 +296,157 @@ def server_download(server_type, test=False):
         return False
 
 
-def download_file_with_progress(url: str, filename: str, output_dir: str):
+def write_eula(output_dir):
+    """Cria o eula.txt aceitando o EULA."""
+    eula_path = os.path.join(output_dir, "eula.txt")
+    with open(eula_path, "w") as f:
+        f.write("eula=true\n")
+    console.print("[bold green][OK][/bold green] EULA aceito automaticamente.")
+
+
+def ensure_executable(path):
+    """Garante o bit de execução (ZIPs criados no Windows não guardam permissões)."""
+    if os.name != "nt" and os.path.isfile(path):
+        os.chmod(path, os.stat(path).st_mode | 0o111)
+
+
+def is_up_to_date(path, digest) -> bool:
+    """Verifica se o arquivo em disco já tem o hash esperado."""
+    if not os.path.isfile(path):
+        return False
+    cached = cache.lookup(digest)
+    if cached is not None and os.path.samefile(path, cached):
+        # Hardlink do próprio objeto do cache: nem é preciso ler o arquivo
+        return True
+    return cache.file_digest(path, cache.algorithm_for(digest)) == digest
+
+
+def detect_server_type(directory):
+    """Tipo do servidor em `directory`: o do registro ou, sem ele, pelos arquivos."""
+    # Importação local: instances depende do pacote downloader
+    from easymcserver.instances import instance_type
+
+    registered = instance_type(directory)
+    if registered:
+        return registered
+
+    def exists(*parts):
+        return os.path.exists(os.path.join(directory, *parts))
+
+    if exists("bedrock_server") or exists("bedrock_server.exe"):
+        return "Bedrock"
+    if exists("fabric-server-launch.jar"):
+        return "Fabric (Mods)"
+    if exists("libraries", "net", "neoforged"):
+        return "NeoForge (Mods)"
+    if exists("config", "paper-global.yml"):
+        return "Paper (Otimizado)"
+    return "Vanilla"
+
+
+def update_server(directory):
+    """Atualiza o servidor instalado em `directory` (qualquer tipo suportado)."""
+    server_type = detect_server_type(directory)
+    console.print(f"[cyan]Atualizando o servidor {server_type}...[/cyan]")
+    result = server_download(server_type, output_dir=directory, update=True)
+    if result and server_type != "Bedrock":
+        # Importação local: config/cds usa o launcher do Fabric/NeoForge
+        from easymcserver.config.cds import refresh
+
+        # O jar mudou: as flags de CDS passam a apontar para o arquivo novo
+        refresh(directory)
+    return result
+
+
+def download_file_with_progress(
+    url: str,
+    filename: str,
+    output_dir: str,
+    expected_hash: str = None,
+    priority: int = bandwidth.NORMAL,
+):
     """
     Baixa um arquivo de uma URL e exibe o progresso usando Rich.
-    Retorna True/False para sucesso ou o objeto BytesIO para ZIPs.
+    Retorna True/False para sucesso ou, para ZIPs, o caminho do arquivo baixado.
+
+    Arquivos já baixados antes são servidos pelo cache local (hardlink ou
+    cópia). Nesse caso, para ZIPs é retornado o caminho do arquivo em cache.
+    `priority` só importa quando há limite de banda (ver bandwidth.py).
     """
     full_path = os.path.join(output_dir, filename)
     os.makedirs(output_dir, exist_ok=True)
 
-    console.print(f"[yellow]Baixando: {filename} em '{output_dir}'...[/yellow]")
-    console.print(f"[cyan]URL: {url}[/cyan]")
+    digest = (expected_hash or cache.digest_for_url(url) or "").lower() or None
+
+    # Evita que dois downloads simultâneos do mesmo artefato baixem em dobro
+    with cache.key_lock(digest or url):
+        if (
+            digest
+            and not filename.endswith(".zip")
+            and is_up_to_date(full_path, digest)
+        ):
+            console.print(
+                f"[bold green][OK][/bold green] '{filename}' já está na versão mais recente."
+            )
+            return True
+
+        cached = cache.lookup(digest) if digest else None
+        if cached is not None:
+            if not filename.endswith(".zip"):
+                cache.link_or_copy(cached, full_path)
+            console.print(
+                f"[bold green][OK][/bold green] '{filename}' obtido do cache local."
+            )
+            return str(cached) if filename.endswith(".zip") else True
 
-    try:
-        with progress_layout as progress:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            response = requests.get(url, stream=True, headers=headers, timeout=30)
-            console.print(f"[cyan]Status code: {response.status_code}[/cyan]")
-            if "content-length" in response.headers:
-                console.print(
-                    f"[cyan]Content-Length: {response.headers['content-length']}[/cyan]"
-                )
-            else:
-                console.print("[yellow]No Content-Length header[/yellow]")
-            response.raise_for_status()
+        return _download(url, filename, output_dir, full_path, digest, priority)
 
-            total_size = int(response.headers.get("content-length", 0))
-            if total_size == 0:
-                console.print(
-                    "[yellow]AVISO:[/yellow] Não foi possível determinar o tamanho do arquivo."
-                )
-                total_size = 1024 * 1024 * 100
 
-            download_task = progress.add_task(
-                "Baixando", total=total_size, filename=filename
-            )
+def _download(url, filename, output_dir, full_path, digest, priority):
+    console.print(f"[yellow]Baixando: {filename} em '{output_dir}'...[/yellow]")
+    console.print(f"[cyan]URL: {url}[/cyan]")
 
-            if filename.endswith(".zip"):
-                content = io.BytesIO()
-                f = None
-            else:
-                content = None
-                f = open(full_path, "wb")
+    try:
+        with shared_progress() as progress:
+            download_task = progress.add_task("Baixando", total=None, filename=filename)
 
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    if filename.endswith(".zip"):
-                        content.write(chunk)
-                    else:
-                        f.write(chunk)
-                    progress.update(download_task, advance=len(chunk))
+            def on_progress(done, total):
+                progress.update(download_task, completed=done, total=total)
 
-            if f:
-                f.close()
+            # Várias conexões + .part retomável (ver downloader/ranged.py)
+            try:
+                ranged_download(
+                    url,
+                    full_path,
+                    on_progress=on_progress,
+                    expected_hash=digest,
+                    priority=priority,
+                )
+            finally:
+                # A barra é compartilhada: tarefas antigas não devem reaparecer
+                progress.remove_task(download_task)
 
-            progress.update(download_task, completed=total_size)
-            console.print(f"[bold green][OK][/bold green] '{filename}' baixado.")
+        console.print(f"[bold green][OK][/bold green] '{filename}' baixado.")
 
-            return content if filename.endswith(".zip") else True
+        # Guarda uma cópia no cache para as próximas instalações
+        stored = cache.store(full_path, digest, url, verified=bool(digest))
+        if filename.endswith(".zip"):
+            # Sem hash, quem chama valida o ZIP e indexa a URL (cache.remember_url)
+            return str(stored) if stored else full_path
+        return True
 
+    except ValueError as e:
+        console.print(
+            f"[bold red][ERRO][/bold red] O arquivo '{filename}' está corrompido: {e}"
+        )
+        return False
     except requests.exceptions.RequestException as e:
         console.print(
             f"[bold red]ERRO de Download:[/bold red] Não foi possível baixar '{filename}'. Detalhes: {e}"
         )
+        console.print(
+            "[yellow]O progresso foi salvo; tente novamente para continuar de onde parou.[/yellow]"
+        )
         return False
     except Exception as e:
         console.print(f"[bold red]ERRO:[/bold red] Ocorreu um erro inesperado: {e}")
@@ -0,0 +1,135 @@
+# Extração paralela de arquivos ZIP lidos via mmap
+
+import mmap
+import os
+import shutil
+import stat
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Buffer de cópia por thread: limita o pico de memória da extração
+COPY_BUFFER = 1024 * 1024
+
+
+class _MappedFile:
+    """Adapta um mmap à interface de arquivo esperada pelo zipfile."""
+
+    def __init__(self, mapped: mmap.mmap):
+        self._mm = mapped
+
+    def read(self, n=-1):
+        return self._mm.read(n)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self._mm.seek(offset, whence)
+        return self._mm.tell()
+
+    def tell(self):
+        return self._mm.tell()
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        self._mm.close()
+
+
+def default_workers() -> int:
+    # O zlib libera o GIL ao descompactar, então threads escalam com os núcleos
+    return min(32, os.cpu_count() or 1)
+
+
+def safe_target(output_dir: str, arcname: str):
+    """Converte o nome de um membro em um caminho dentro de output_dir.
+
+    Retorna None para nomes perigosos (absolutos ou com "..").
+    """
+    arcname = arcname.replace("\\", "/")
+    parts = [p for p in arcname.split("/") if p not in ("", ".")]
+    if not parts or ".." in parts or ":" in parts[0]:
+        return None
+    return os.path.join(output_dir, *parts)
+
+
+def unix_mode(info: zipfile.ZipInfo):
+    """Permissões Unix gravadas no ZIP (ex.: bit de execução do bedrock_server)."""
+    mode = (info.external_attr >> 16) & 0o7777
+    if info.create_system == 3 and mode:
+        return mode
+    return None
+
+
+def extract_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, output_dir: str):
+    """Extrai um membro para um arquivo temporário e o move para o destino.
+
+    A troca via os.replace nunca altera o arquivo antigo no lugar, então um
+    arquivo compartilhado por hardlink com outro servidor não é afetado.
+    """
+    target = safe_target(output_dir, info.filename)
+    if target is None:
+        return None
+
+    if info.is_dir():
+        os.makedirs(target, exist_ok=True)
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + ".easymc-tmp"
+    with zf.open(info) as src, open(tmp, "wb") as dst:
+        shutil.copyfileobj(src, dst, COPY_BUFFER)
+
+    mode = unix_mode(info)
+    if mode is not None and os.name != "nt":
+        os.chmod(tmp, stat.S_IMODE(mode))
+    os.replace(tmp, target)
+    return target
+
+
+def extract_zip(zip_path: str, output_dir: str, members=None, workers: int = None):
+    """Extrai `zip_path` em `output_dir` descompactando os membros em paralelo.
+
+    O arquivo é mapeado em memória (mmap) e compartilhado entre as threads;
+    cada uma descompacta um membro por vez em blocos de COPY_BUFFER. Se
+    `members` for informado (lista de ZipInfo ou nomes), extrai apenas eles.
+
+    Retorna a lista de caminhos extraídos.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or default_workers()
+
+    with open(zip_path, "rb") as f:
+        try:
+            source = _MappedFile(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (ValueError, OSError):
+            # Arquivo vazio ou sistema sem suporte a mmap: lê do próprio arquivo
+            source = f
+
+        try:
+            with zipfile.ZipFile(source) as zf:
+                if members is None:
+                    infos = zf.infolist()
+                else:
+                    infos = [
+                        m if isinstance(m, zipfile.ZipInfo) else zf.getinfo(m)
+                        for m in members
+                    ]
+
+                # Diretórios primeiro; arquivos maiores antes para balancear as threads
+                for info in infos:
+                    if info.is_dir():
+                        extract_member(zf, info, output_dir)
+                files = sorted(
+                    (i for i in infos if not i.is_dir()),
+                    key=lambda i: i.compress_size,
+                    reverse=True,
+                )
+
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    extracted = list(
+                        pool.map(lambda i: extract_member(zf, i, output_dir), files)
+                    )
+        finally:
+            if source is not f:
+                source.close()
+
+    return [path for path in extracted if path]
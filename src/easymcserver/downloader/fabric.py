@@ -0,0 +1,155 @@
+# Instalação do Fabric: bibliotecas em paralelo + fabric-server-launch.jar
+
+import os
+import zipfile
+from rich.console import Console
+from easymcserver.downloader import bandwidth
+from easymcserver.downloader.download import download_file_with_progress
+from easymcserver.downloader.http_cache import cached_json
+from easymcserver.downloader.libraries import (
+    fetch_libraries,
+    maven_path,
+    restore_install,
+    snapshot_install,
+)
+from easymcserver.downloader.manifest import resolve_server_jar
+
+console = Console()
+
+FABRIC_META_URL = "https://meta.fabricmc.net/v2"
+META_TTL = 600
+
+LAUNCHER_JAR = "fabric-server-launch.jar"
+# Classe do fabric-loader que lê fabric-server-launcher.properties e carrega o servidor
+LAUNCHER_MAIN_CLASS = "net.fabricmc.loader.impl.launch.server.FabricServerLauncher"
+
+# O que compõe uma instalação pronta do Fabric
+INSTALL_PATHS = ["libraries", LAUNCHER_JAR, "fabric-server-launcher.properties"]
+
+
+def get_latest_loader(game_version: str, meta_url: str = FABRIC_META_URL):
+    """Última versão estável do loader compatível com a versão do jogo."""
+    loaders = cached_json(
+        f"{meta_url}/versions/loader/{game_version}",
+        f"fabric-loaders-{game_version}",
+        ttl=META_TTL,
+    )
+    for entry in loaders:
+        loader = entry.get("loader", entry)
+        if loader.get("stable", True):
+            return loader["version"]
+    return None
+
+
+def get_server_profile(
+    game_version: str, loader_version: str, meta_url: str = FABRIC_META_URL
+):
+    """Perfil do servidor (mainClass + bibliotecas Maven com URL e SHA-1)."""
+    return cached_json(
+        f"{meta_url}/versions/loader/{game_version}/{loader_version}/server/json",
+        f"fabric-profile-{game_version}-{loader_version}",
+        immutable=True,
+    )
+
+
+def profile_libraries(profile: dict):
+    libraries = []
+    for lib in profile.get("libraries", []):
+        path = maven_path(lib["name"])
+        libraries.append(
+            {
+                "path": path,
+                "url": lib.get("url", "https://maven.fabricmc.net/").rstrip("/")
+                + "/"
+                + path,
+                "sha1": lib.get("sha1"),
+            }
+        )
+    return libraries
+
+
+def write_launcher(output_dir: str, profile: dict, libraries):
+    """Gera o fabric-server-launch.jar (mesmo formato do instalador oficial).
+
+    O jar só tem um manifesto com Class-Path apontando para libraries/ e o
+    arquivo fabric-server-launch.properties com a classe principal do Knot.
+    """
+    class_path = " ".join(f"libraries/{lib['path']}" for lib in libraries)
+    manifest = (
+        "Manifest-Version: 1.0\r\n"
+        f"Main-Class: {LAUNCHER_MAIN_CLASS}\r\n"
+        f"{_wrap_manifest_line('Class-Path: ' + class_path)}\r\n\r\n"
+    )
+    jar_path = os.path.join(output_dir, LAUNCHER_JAR)
+    with zipfile.ZipFile(jar_path, "w", zipfile.ZIP_DEFLATED) as jar:
+        jar.writestr("META-INF/MANIFEST.MF", manifest)
+        jar.writestr(
+            "fabric-server-launch.properties",
+            f"launch.mainClass={profile['mainClass']}\n",
+        )
+
+    with open(os.path.join(output_dir, "fabric-server-launcher.properties"), "w") as f:
+        f.write("serverJar=server.jar\n")
+
+
+def _wrap_manifest_line(line: str) -> str:
+    # Linhas do MANIFEST.MF têm no máximo 72 bytes; continuações começam com espaço
+    chunks = [line[:72]]
+    line = line[72:]
+    while line:
+        chunks.append(" " + line[:71])
+        line = line[71:]
+    return "\r\n".join(chunks)
+
+
+def install_fabric(
+    output_dir: str,
+    game_version: str = "latest",
+    loader_version: str = "latest",
+    meta_url: str = FABRIC_META_URL,
+) -> bool:
+    """Instala um servidor Fabric em output_dir.
+
+    Bibliotecas vêm do cache compartilhado; a instalação completa fica guardada
+    por (versão do jogo, versão do loader) e é reaproveitada por outros servidores.
+    """
+    server = resolve_server_jar(game_version)
+    if not server:
+        console.print(
+            f"[bold red][ERRO][/bold red] Versão do Minecraft '{game_version}' não encontrada."
+        )
+        return False
+    game_version = server["id"]
+
+    if not loader_version or loader_version == "latest":
+        loader_version = get_latest_loader(game_version, meta_url)
+        if not loader_version:
+            console.print(
+                f"[bold red][ERRO][/bold red] O Fabric não suporta o Minecraft {game_version}."
+            )
+            return False
+
+    console.print(f"[cyan]Fabric {loader_version} para Minecraft {game_version}[/cyan]")
+
+    # O server.jar vanilla é o jogo que o Fabric carrega
+    if not download_file_with_progress(
+        server["url"], "server.jar", output_dir, server["sha1"], bandwidth.HIGH
+    ):
+        return False
+
+    key = f"{game_version}-{loader_version}"
+    if restore_install("fabric", key, output_dir):
+        console.print(
+            "[bold green][OK][/bold green] Instalação do Fabric reaproveitada do cache."
+        )
+        return True
+
+    profile = get_server_profile(game_version, loader_version, meta_url)
+    libraries = profile_libraries(profile)
+    if not fetch_libraries(libraries, os.path.join(output_dir, "libraries")):
+        return False
+
+    write_launcher(output_dir, profile, libraries)
+    snapshot_install("fabric", key, output_dir, INSTALL_PATHS)
+    console.print("[bold green][OK][/bold green] Fabric instalado.")
+    return True
@@ -0,0 +1,108 @@
+# Cache em disco de respostas JSON com revalidação condicional (ETag/Last-Modified)
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import requests
+from rich.console import Console
+from easymcserver.downloader.cache import get_cache_dir
+from easymcserver.downloader.session import get_session
+
+console = Console()
+
+# Tempo (s) em que uma resposta é considerada fresca sem consultar o servidor
+DEFAULT_TTL = 600
+TIMEOUT = 30
+
+# Respostas já lidas neste processo: url -> (momento da validação, dados)
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _cache_path(name: str):
+    directory = get_cache_dir() / "http"
+    directory.mkdir(parents=True, exist_ok=True)
+    safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", name)
+    return directory / f"{safe_name}.json"
+
+
+def _read_entry(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_entry(path, entry):
+    # Temporário exclusivo: várias threads/processos podem gravar a mesma entrada
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def cached_json(
+    url: str, name: str, ttl: float = DEFAULT_TTL, immutable=False, session=None
+):
+    """Retorna o JSON de `url`, usando o cache local sempre que possível.
+
+    - Dentro do TTL (ou se `immutable`), nada é consultado na rede.
+    - Depois do TTL, faz uma requisição condicional (If-None-Match /
+      If-Modified-Since); um 304 apenas renova a validade do cache.
+    - Sem rede, usa a cópia antiga (se houver) e avisa o usuário.
+    """
+    now = time.time()
+    with _memo_lock:
+        memo = _memo.get(url)
+    if memo and (immutable or now - memo[0] < ttl):
+        return memo[1]
+
+    path = _cache_path(name)
+    entry = _read_entry(path)
+    if entry and entry.get("url") != url:
+        entry = None
+    if entry and (immutable or now - entry.get("fetched_at", 0) < ttl):
+        with _memo_lock:
+            _memo[url] = (entry["fetched_at"], entry["data"])
+        return entry["data"]
+
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    session = session or get_session()
+    try:
+        response = session.get(url, headers=headers, timeout=TIMEOUT)
+        if response.status_code == 304 and entry:
+            entry["fetched_at"] = now
+        else:
+            response.raise_for_status()
+            entry = {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": now,
+                "data": response.json(),
+            }
+        _write_entry(path, entry)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if not entry:
+            raise
+        console.print(
+            f"[bold yellow][AVISO][/bold yellow] Não foi possível atualizar '{name}' ({e}). Usando a cópia local."
+        )
+
+    with _memo_lock:
+        _memo[url] = (entry["fetched_at"], entry["data"])
+    return entry["data"]
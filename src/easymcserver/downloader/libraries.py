@@ -0,0 +1,168 @@
+# Bibliotecas Maven compartilhadas e cache de instalações prontas (loaders de mods)
+
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from easymcserver.downloader import bandwidth, cache
+from easymcserver.downloader.ranged import ranged_download
+from easymcserver.downloader.session import get_session
+
+console = Console()
+
+LIBRARY_WORKERS = 8
+
+# Arquivo que marca uma instalação em cache como completa
+_COMPLETE_MARKER = ".easymc-install.json"
+
+
+def maven_path(coordinate: str) -> str:
+    """Converte "grupo:artefato:versão[:classificador][@ext]" no caminho Maven."""
+    coordinate, _, ext = coordinate.partition("@")
+    parts = coordinate.split(":")
+    group, artifact, version = parts[0], parts[1], parts[2]
+    classifier = f"-{parts[3]}" if len(parts) > 3 else ""
+    return "/".join(
+        [
+            *group.split("."),
+            artifact,
+            version,
+            f"{artifact}-{version}{classifier}.{ext or 'jar'}",
+        ]
+    )
+
+
+def _fetch_library(library: dict, libraries_dir: str, session):
+    dest = os.path.join(libraries_dir, *library["path"].split("/"))
+    digest = library.get("sha1") or cache.digest_for_url(library["url"])
+
+    if os.path.isfile(dest) and (
+        not digest or cache.file_digest(dest, cache.algorithm_for(digest)) == digest
+    ):
+        return "local"
+
+    with cache.key_lock(digest or library["url"]):
+        if digest and cache.fetch_from_cache(digest, dest):
+            return "cache"
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # Muitas bibliotecas pequenas: cedem a banda ao jar do servidor
+        ranged_download(
+            library["url"],
+            dest,
+            session=session,
+            expected_hash=digest,
+            priority=bandwidth.LOW,
+        )
+        stored = cache.store(dest, digest, library["url"], verified=bool(digest))
+        if stored and not digest and cache.is_valid_zip(dest):
+            # Sem hash, a URL só aponta para um JAR íntegro
+            cache.remember_url(library["url"], stored)
+    return "download"
+
+
+def fetch_libraries(libraries, libraries_dir: str, session=None) -> bool:
+    """Baixa (ou liga do cache) uma lista de bibliotecas em paralelo.
+
+    Cada item é um dict com "path" (relativo a libraries_dir), "url" e,
+    opcionalmente, "sha1". Retorna False se alguma falhar.
+    """
+    libraries = [lib for lib in libraries if lib.get("url")]
+    if not libraries:
+        return True
+    session = session or get_session()
+
+    with ThreadPoolExecutor(max_workers=min(LIBRARY_WORKERS, len(libraries))) as pool:
+        futures = [
+            (lib, pool.submit(_fetch_library, lib, libraries_dir, session))
+            for lib in libraries
+        ]
+        sources = {"local": 0, "cache": 0, "download": 0}
+        ok = True
+        for lib, future in futures:
+            try:
+                sources[future.result()] += 1
+            except Exception as e:
+                ok = False
+                console.print(
+                    f"[bold red][ERRO][/bold red] Falha ao obter a biblioteca {lib['path']}: {e}"
+                )
+
+    console.print(
+        f"[bold green][OK][/bold green] Bibliotecas: {sources['download']} baixada(s), "
+        f"{sources['cache']} do cache, {sources['local']} já presente(s)."
+    )
+    return ok
+
+
+def _install_dir(kind: str, key: str):
+    return cache.get_cache_dir() / "installs" / kind / key
+
+
+def _materialize(src, dest):
+    """Jars são imutáveis e podem ser hardlinks; o resto (scripts, configs) é copiado."""
+    if str(src).endswith(".jar"):
+        cache.link_or_copy(src, dest)
+    else:
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copy2(src, dest)
+
+
+def snapshot_install(kind: str, key: str, output_dir: str, paths):
+    """Guarda no cache o resultado de uma instalação (arquivos/pastas em `paths`).
+
+    A cópia é montada numa pasta temporária e só depois, sob o lock da
+    instalação, toma o lugar da anterior: restore_install nunca vê uma
+    instalação pela metade.
+    """
+    target = _install_dir(kind, key)
+    suffix = f"{os.getpid()}.{threading.get_ident()}"
+    building = target.with_name(f"{target.name}.{suffix}.tmp")
+    if building.exists():
+        shutil.rmtree(building)
+
+    files = []
+    for rel in paths:
+        src = os.path.join(output_dir, rel)
+        if os.path.isdir(src):
+            for root, _, names in os.walk(src):
+                for name in names:
+                    files.append(os.path.relpath(os.path.join(root, name), output_dir))
+        elif os.path.isfile(src):
+            files.append(rel)
+
+    for rel in files:
+        _materialize(os.path.join(output_dir, rel), building / rel)
+
+    # O marcador por último: sem ele a instalação não é considerada completa
+    building.mkdir(parents=True, exist_ok=True)
+    with open(building / _COMPLETE_MARKER, "w", encoding="utf-8") as f:
+        json.dump({"kind": kind, "key": key, "files": files}, f)
+
+    old = target.with_name(f"{target.name}.{suffix}.old")
+    with cache.key_lock(f"{kind}:{key}"):
+        if target.exists():
+            os.replace(target, old)
+        os.replace(building, target)
+    if old.exists():
+        shutil.rmtree(old)
+
+
+def restore_install(kind: str, key: str, output_dir: str) -> bool:
+    """Recria uma instalação guardada por snapshot_install. False se não houver."""
+    source = _install_dir(kind, key)
+    # Impede que snapshot_install troque a pasta no meio da cópia
+    with cache.key_lock(f"{kind}:{key}"):
+        try:
+            with open(source / _COMPLETE_MARKER, "r", encoding="utf-8") as f:
+                files = json.load(f)["files"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return False
+
+        for rel in files:
+            src = source / rel
+            if not src.is_file():
+                return False
+            _materialize(src, os.path.join(output_dir, rel))
+    return True
@@ -0,0 +1,89 @@
+# Catálogo de versões do Minecraft Java (version_manifest_v2.json da Mojang)
+
+import threading
+from easymcserver.downloader.http_cache import cached_json, DEFAULT_TTL
+
+MANIFEST_URL = "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
+
+# Apelidos aceitos além do id da versão (ex.: "1.21.4")
+_LATEST_ALIASES = {
+    "latest": "release",
+    "latest release": "release",
+    "latest-release": "release",
+    "release": "release",
+    "latest snapshot": "snapshot",
+    "latest-snapshot": "snapshot",
+    "snapshot": "snapshot",
+}
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+class VersionCatalog:
+    """Índice em memória do manifesto: por id e por tipo (release, snapshot...)."""
+
+    def __init__(self, manifest: dict):
+        self.manifest = manifest
+        self.latest = manifest.get("latest", {})
+        self.by_id = {}
+        self.by_type = {}
+        # O manifesto já vem do mais novo para o mais antigo
+        for entry in manifest.get("versions", []):
+            self.by_id[entry["id"]] = entry
+            self.by_type.setdefault(entry["type"], []).append(entry["id"])
+        self._details = {}
+
+    def resolve(self, spec: str):
+        """Converte "1.21.4", "latest release" etc. na entrada do manifesto."""
+        spec = (spec or "latest").strip()
+        alias = _LATEST_ALIASES.get(spec.lower())
+        if alias:
+            spec = self.latest.get(alias, "")
+        return self.by_id.get(spec)
+
+    def versions(self, release_type: str = "release"):
+        return list(self.by_type.get(release_type, []))
+
+    def details(self, version_id: str) -> dict:
+        """JSON da versão (imutável: a URL do manifesto v2 contém o SHA-1)."""
+        if version_id not in self._details:
+            entry = self.by_id[version_id]
+            self._details[version_id] = cached_json(
+                entry["url"], f"version-{entry['sha1']}", immutable=True
+            )
+        return self._details[version_id]
+
+    def server_download(self, spec: str):
+        """Retorna {id, url, sha1, size, java_version} do server.jar ou None."""
+        entry = self.resolve(spec)
+        if entry is None:
+            return None
+        details = self.details(entry["id"])
+        server = details.get("downloads", {}).get("server")
+        if not server:
+            # Versões muito antigas não têm servidor dedicado
+            return None
+        return {
+            "id": entry["id"],
+            "type": entry["type"],
+            "url": server["url"],
+            "sha1": server["sha1"],
+            "size": server.get("size"),
+            "java_version": details.get("javaVersion", {}).get("majorVersion"),
+        }
+
+
+def get_catalog(ttl: float = DEFAULT_TTL) -> VersionCatalog:
+    """Retorna o catálogo, reconstruindo o índice só quando o manifesto muda."""
+    global _catalog
+    manifest = cached_json(MANIFEST_URL, "version_manifest_v2", ttl=ttl)
+    with _catalog_lock:
+        if _catalog is None or _catalog.manifest is not manifest:
+            _catalog = VersionCatalog(manifest)
+        return _catalog
+
+
+def resolve_server_jar(spec: str):
+    """Atalho: resolve uma versão para o link e o SHA-1 do server.jar."""
+    return get_catalog().server_download(spec)
@@ -0,0 +1,221 @@
+# Espelhos (mirrors): fontes alternativas para o mesmo artefato
+#
+# As fontes vêm de um arquivo TOML do usuário, por hash do artefato ou por
+# prefixo de URL. Antes de baixar, cada fonte é medida com uma pequena
+# requisição Range (latência e vazão); o ranking fica em cache por RANK_TTL
+# segundos e o download usa a mais rápida, caindo para as outras se falhar.
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+import requests
+from rich.console import Console
+from easymcserver.downloader.cache import get_cache_dir
+from easymcserver.downloader.session import get_session
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.10
+    import tomli as tomllib
+
+console = Console()
+
+# Validade do ranking medido (s)
+RANK_TTL = 15 * 60
+# Quantidade de bytes baixada de cada fonte para medir a vazão
+PROBE_BYTES = 256 * 1024
+# (conexão, leitura): uma fonte lenta para responder já perde a disputa
+PROBE_TIMEOUT = (3, 10)
+PROBE_WORKERS = 8
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+\d+-\d+/(\d+)")
+
+_config = {"key": None, "data": {}}
+_ranking_lock = threading.Lock()
+
+
+def get_config_path() -> Path:
+    """Arquivo de espelhos: EASYMC_MIRRORS ou o diretório de configuração do usuário."""
+    override = os.environ.get("EASYMC_MIRRORS")
+    if override:
+        return Path(override).expanduser()
+    if os.name == "nt":
+        root = Path(os.environ.get("APPDATA", Path.home())) / "EasyMCServer"
+    else:
+        root = (
+            Path(os.environ.get("XDG_CONFIG_HOME", Path.home() / ".config"))
+            / "easymcserver"
+        )
+    return root / "mirrors.toml"
+
+
+def load_config():
+    """Lê o arquivo de espelhos (relido só quando muda).
+
+    [artifacts]
+    "<sha1 ou sha256>" = ["https://espelho-1/arquivo.jar", ...]
+
+    [prefixes]
+    "https://piston-data.mojang.com/" = ["https://espelho.exemplo/mojang/"]
+    """
+    path = get_config_path()
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return {}
+    if _config["key"] != (str(path), mtime):
+        try:
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            console.print(
+                f"[bold yellow][AVISO][/bold yellow] Arquivo de espelhos ignorado ({path}): {e}"
+            )
+            data = {}
+        data["artifacts"] = {k.lower(): v for k, v in data.get("artifacts", {}).items()}
+        _config.update(key=(str(path), mtime), data=data)
+    return _config["data"]
+
+
+def candidate_urls(url: str, digest: str = None):
+    """A URL original seguida dos espelhos configurados para ela.
+
+    Espelhos por prefixo só valem quando o hash é conhecido: o conteúdo de
+    uma fonte de terceiros sempre precisa ser verificado.
+    """
+    config = load_config()
+    urls = [url]
+    if digest:
+        urls += config.get("artifacts", {}).get(digest.lower(), [])
+        for prefix, replacements in config.get("prefixes", {}).items():
+            if url.startswith(prefix):
+                urls += [r + url[len(prefix) :] for r in replacements]
+    return list(dict.fromkeys(urls))
+
+
+def probe_source(url: str, session=None):
+    """Mede latência (até o primeiro byte) e vazão de uma fonte.
+
+    Retorna {"url", "latency", "throughput", "size"} ou None se a fonte falhar
+    ou não aceitar Range (necessário para trocar de fonte no meio do download).
+    """
+    session = session or get_session()
+    started = time.perf_counter()
+    try:
+        with session.get(
+            url,
+            headers={
+                "Range": f"bytes=0-{PROBE_BYTES - 1}",
+                "Accept-Encoding": "identity",
+            },
+            stream=True,
+            timeout=PROBE_TIMEOUT,
+        ) as response:
+            if response.status_code != 206:
+                return None
+            match = _CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+            if not match:
+                return None
+            received = 0
+            first_byte = None
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if first_byte is None:
+                    first_byte = time.perf_counter()
+                received += len(chunk)
+            finished = time.perf_counter()
+    except requests.exceptions.RequestException:
+        return None
+
+    first_byte = first_byte or finished
+    transfer_time = max(finished - first_byte, 1e-6)
+    return {
+        "url": url,
+        "latency": first_byte - started,
+        "throughput": received / transfer_time if received > 1 else 0.0,
+        "size": int(match.group(1)),
+    }
+
+
+def _estimated_time(result):
+    """Tempo estimado para baixar o arquivo inteiro dessa fonte."""
+    if not result["throughput"]:
+        return float("inf")
+    return result["latency"] + result["size"] / result["throughput"]
+
+
+def _ranking_path():
+    return get_cache_dir() / "mirrors-ranking.json"
+
+
+def _read_rankings():
+    try:
+        with open(_ranking_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_rankings(rankings):
+    path = _ranking_path()
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(rankings, f)
+    os.replace(tmp, path)
+
+
+def rank_sources(url: str, digest: str = None, session=None):
+    """Fontes para `url`, da mais rápida para a mais lenta.
+
+    Sem espelhos configurados, retorna só [url] (nada é medido). Fontes que
+    falham na medição ou têm tamanho diferente da maioria ficam de fora; a
+    URL original sempre entra, no mínimo como última opção.
+    """
+    urls = candidate_urls(url, digest)
+    if len(urls) == 1:
+        return urls
+
+    key = (digest or url).lower()
+    now = time.time()
+    with _ranking_lock:
+        cached = _read_rankings().get(key)
+    if (
+        cached
+        and now - cached["probed_at"] < RANK_TTL
+        and sorted(cached["candidates"]) == sorted(urls)
+    ):
+        return cached["ranking"]
+
+    session = session or get_session()
+    with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(urls))) as pool:
+        results = [r for r in pool.map(lambda u: probe_source(u, session), urls) if r]
+
+    if results:
+        sizes = [r["size"] for r in results]
+        size = max(set(sizes), key=sizes.count)
+        results = [r for r in results if r["size"] == size]
+    results.sort(key=_estimated_time)
+    ranking = [r["url"] for r in results]
+    if url not in ranking:
+        ranking.append(url)
+
+    if results and results[0]["url"] != url:
+        best = results[0]
+        console.print(
+            f"[cyan]Usando o espelho {urlparse(best['url']).netloc} "
+            f"({best['latency'] * 1000:.0f} ms, {best['throughput'] / 1024**2:.1f} MB/s).[/cyan]"
+        )
+
+    with _ranking_lock:
+        rankings = _read_rankings()
+        # Remove medições vencidas para o arquivo não crescer sem limite
+        rankings = {
+            k: v for k, v in rankings.items() if now - v["probed_at"] < RANK_TTL
+        }
+        rankings[key] = {"probed_at": now, "candidates": urls, "ranking": ranking}
+        _write_rankings(rankings)
+    return ranking
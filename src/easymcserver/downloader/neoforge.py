@@ -0,0 +1,176 @@
+# Instalação do NeoForge: pré-carrega as bibliotecas do instalador em paralelo
+
+import json
+import os
+import subprocess
+import zipfile
+from rich.console import Console
+from easymcserver.downloader import bandwidth
+from easymcserver.downloader.download import download_file_with_progress
+from easymcserver.downloader.http_cache import cached_json
+from easymcserver.downloader.libraries import (
+    fetch_libraries,
+    restore_install,
+    snapshot_install,
+)
+from easymcserver.downloader.manifest import resolve_server_jar
+from easymcserver.system.jdk import jdk_for_version
+
+console = Console()
+
+NEOFORGE_MAVEN_URL = "https://maven.neoforged.net"
+ARTIFACT_PATH = "net/neoforged/neoforge"
+VERSIONS_TTL = 600
+
+# O que compõe uma instalação pronta do NeoForge
+INSTALL_PATHS = ["libraries", "run.sh", "run.bat", "user_jvm_args.txt"]
+
+
+def mc_version_for(neoforge_version: str) -> str:
+    """21.1.77 -> 1.21.1; 21.0.10 -> 1.21 (o NeoForge segue a versão do jogo)."""
+    major, minor = neoforge_version.split(".")[:2]
+    return f"1.{major}" if minor == "0" else f"1.{major}.{minor}"
+
+
+def get_neoforge_versions(maven_url: str = NEOFORGE_MAVEN_URL):
+    data = cached_json(
+        f"{maven_url}/api/maven/versions/releases/{ARTIFACT_PATH}",
+        "neoforge-versions",
+        ttl=VERSIONS_TTL,
+    )
+    return data.get("versions", [])
+
+
+def resolve_neoforge(
+    game_version: str, neoforge_version: str = "latest", maven_url=NEOFORGE_MAVEN_URL
+):
+    """Escolhe a versão do NeoForge (a mais nova estável para o jogo, por padrão)."""
+    if neoforge_version and neoforge_version != "latest":
+        return neoforge_version
+    versions = [v for v in get_neoforge_versions(maven_url) if "beta" not in v]
+    if game_version and game_version != "latest":
+        versions = [v for v in versions if mc_version_for(v) == game_version]
+
+    def key(v):
+        return tuple(int(p) for p in v.split(".") if p.isdigit())
+
+    return max(versions, key=key) if versions else None
+
+
+def installer_libraries(installer_path: str):
+    """Bibliotecas declaradas no install_profile.json e no version.json do instalador."""
+    libraries = {}
+    with zipfile.ZipFile(installer_path) as jar:
+        for name in ("install_profile.json", "version.json"):
+            try:
+                data = json.loads(jar.read(name))
+            except KeyError:
+                continue
+            for lib in data.get("libraries", []):
+                artifact = lib.get("downloads", {}).get("artifact")
+                # Sem URL: o arquivo é gerado pelos processadores (patch/remap)
+                if artifact and artifact.get("url"):
+                    libraries[artifact["path"]] = {
+                        "path": artifact["path"],
+                        "url": artifact["url"],
+                        "sha1": artifact.get("sha1"),
+                    }
+    return list(libraries.values())
+
+
+def install_neoforge(
+    output_dir: str,
+    game_version: str = "latest",
+    neoforge_version: str = "latest",
+    java: str = None,
+    maven_url: str = NEOFORGE_MAVEN_URL,
+) -> bool:
+    """Instala um servidor NeoForge em output_dir.
+
+    Antes de rodar o instalador oficial (que aplica os patches), as bibliotecas
+    e o server.jar vanilla são obtidos em paralelo do cache compartilhado; o
+    instalador encontra os arquivos com o SHA-1 correto e não os baixa de novo.
+    O resultado final fica em cache por versão do NeoForge. O instalador
+    roda com `java` ou, por padrão, com o JDK exigido pela versão do Minecraft.
+    """
+    version = resolve_neoforge(game_version, neoforge_version, maven_url)
+    if not version:
+        console.print(
+            f"[bold red][ERRO][/bold red] Nenhuma versão do NeoForge encontrada para o Minecraft {game_version}."
+        )
+        return False
+    game_version = mc_version_for(version)
+    console.print(f"[cyan]NeoForge {version} para Minecraft {game_version}[/cyan]")
+
+    if restore_install("neoforge", version, output_dir):
+        console.print(
+            "[bold green][OK][/bold green] Instalação do NeoForge reaproveitada do cache."
+        )
+        return True
+
+    if java is None:
+        jdk = jdk_for_version(game_version)
+        if not jdk:
+            return False
+        java = jdk["java"]
+
+    installer_name = f"neoforge-{version}-installer.jar"
+    installer_url = f"{maven_url}/releases/{ARTIFACT_PATH}/{version}/{installer_name}"
+    if not download_file_with_progress(
+        installer_url, installer_name, output_dir, priority=bandwidth.HIGH
+    ):
+        return False
+    installer_path = os.path.join(output_dir, installer_name)
+    libraries_dir = os.path.join(output_dir, "libraries")
+
+    try:
+        # server.jar vanilla no caminho que o instalador espera
+        server = resolve_server_jar(game_version)
+        if server:
+            download_file_with_progress(
+                server["url"],
+                f"server-{game_version}.jar",
+                os.path.join(libraries_dir, "net", "minecraft", "server", game_version),
+                server["sha1"],
+                bandwidth.HIGH,
+            )
+        fetch_libraries(installer_libraries(installer_path), libraries_dir)
+
+        console.print("[cyan]Executando o instalador do NeoForge...[/cyan]")
+        result = subprocess.run(
+            [java, "-jar", installer_name, "--install-server", "."],
+            cwd=output_dir,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            console.print(
+                f"[bold red][ERRO][/bold red] O instalador do NeoForge falhou:\n{result.stdout[-2000:]}"
+            )
+            return False
+    except FileNotFoundError:
+        console.print(
+            "[bold red][ERRO][/bold red] O Java não está instalado ou não está no PATH. Instale-o e tente novamente."
+        )
+        return False
+    finally:
+        for leftover in (installer_path, installer_path + ".log"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    snapshot_install("neoforge", version, output_dir, INSTALL_PATHS)
+    console.print("[bold green][OK][/bold green] NeoForge instalado.")
+    return True
+
+
+def neoforge_args_file(output_dir: str):
+    """Arquivo de argumentos gerado pelo instalador (unix_args.txt ou win_args.txt)."""
+    base = os.path.join(output_dir, "libraries", *ARTIFACT_PATH.split("/"))
+    if not os.path.isdir(base):
+        return None
+    args_name = "win_args.txt" if os.name == "nt" else "unix_args.txt"
+    for version in sorted(os.listdir(base), reverse=True):
+        path = os.path.join(base, version, args_name)
+        if os.path.isfile(path):
+            return os.path.relpath(path, output_dir)
+    return None
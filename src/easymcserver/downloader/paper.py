@@ -0,0 +1,144 @@
+# Instalação do Paper via API de builds (fill.papermc.io) e download de plugins
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+import requests
+from rich.console import Console
+from easymcserver.downloader import bandwidth, cache
+from easymcserver.downloader.http_cache import cached_json
+from easymcserver.downloader.ranged import ranged_download
+from easymcserver.downloader.session import get_session
+
+console = Console()
+
+PAPER_API_URL = "https://fill.papermc.io/v3"
+PROJECT = "paper"
+
+# Lista de builds muda com frequência; a de versões, raramente
+BUILDS_TTL = 600
+VERSIONS_TTL = 3600
+
+# Downloads de plugins em paralelo (todos pela mesma sessão)
+PLUGIN_WORKERS = 8
+
+_RELEASE_RE = re.compile(r"^\d+(\.\d+)*$")
+
+
+def _version_key(version: str):
+    return tuple(int(p) for p in version.split("."))
+
+
+def get_paper_versions(api_url: str = PAPER_API_URL):
+    """Lista as versões estáveis do Minecraft suportadas, da mais nova para a mais antiga."""
+    data = cached_json(
+        f"{api_url}/projects/{PROJECT}", f"{PROJECT}-versions", ttl=VERSIONS_TTL
+    )
+    versions = data.get("versions", {})
+    if isinstance(versions, dict):
+        # v3: {"1.21": ["1.21.4", ...], ...}
+        versions = [v for group in versions.values() for v in group]
+    releases = [v for v in versions if _RELEASE_RE.match(v)]
+    return sorted(releases, key=_version_key, reverse=True)
+
+
+def get_latest_stable_build(version: str, api_url: str = PAPER_API_URL):
+    """Retorna {version, build, name, url, sha256} da última build STABLE ou None."""
+    builds = cached_json(
+        f"{api_url}/projects/{PROJECT}/versions/{version}/builds",
+        f"{PROJECT}-builds-{version}",
+        ttl=BUILDS_TTL,
+    )
+    stable = [b for b in builds if str(b.get("channel", "")).upper() == "STABLE"]
+    if not stable:
+        return None
+    build = max(stable, key=lambda b: b["id"])
+    download = build["downloads"]["server:default"]
+    return {
+        "version": version,
+        "build": build["id"],
+        "name": download["name"],
+        "url": download["url"],
+        "sha256": download["checksums"]["sha256"],
+    }
+
+
+def resolve_paper(version: str = "latest", api_url: str = PAPER_API_URL):
+    """Resolve "latest" ou uma versão específica para a última build estável."""
+    if version and version.lower() != "latest":
+        return get_latest_stable_build(version, api_url)
+    # A versão mais nova pode ainda não ter build estável
+    for candidate in get_paper_versions(api_url):
+        build = get_latest_stable_build(candidate, api_url)
+        if build:
+            return build
+    return None
+
+
+def _plugin_filename(plugin: dict) -> str:
+    if plugin.get("name"):
+        return plugin["name"]
+    name = unquote(os.path.basename(urlparse(plugin["url"]).path))
+    return name if name.endswith(".jar") else f"{name or 'plugin'}.jar"
+
+
+def _fetch_plugin(plugin: dict, plugins_dir: str, session):
+    filename = _plugin_filename(plugin)
+    dest = os.path.join(plugins_dir, filename)
+    digest = (
+        plugin.get("sha256")
+        or plugin.get("sha1")
+        or cache.digest_for_url(plugin["url"])
+    )
+
+    with cache.key_lock(digest or plugin["url"]):
+        if digest and cache.fetch_from_cache(digest, dest):
+            return filename, "cache"
+        # Plugins cedem a banda ao jar do servidor
+        ranged_download(
+            plugin["url"],
+            dest,
+            session=session,
+            expected_hash=digest,
+            priority=bandwidth.LOW,
+        )
+        stored = cache.store(dest, digest, plugin["url"], verified=bool(digest))
+        if stored and not digest and cache.is_valid_zip(dest):
+            # Sem hash, a URL só aponta para um JAR íntegro
+            cache.remember_url(plugin["url"], stored)
+    return filename, "download"
+
+
+def download_plugins(plugins, output_dir: str, session=None) -> bool:
+    """Baixa uma lista de plugins em paralelo para `output_dir/plugins`.
+
+    Cada item pode ser uma URL ou um dict com "url" e, opcionalmente,
+    "name" e "sha256"/"sha1" para verificação.
+    """
+    plugins = [{"url": p} if isinstance(p, str) else dict(p) for p in plugins or []]
+    if not plugins:
+        return True
+
+    plugins_dir = os.path.join(output_dir, "plugins")
+    os.makedirs(plugins_dir, exist_ok=True)
+    session = session or get_session()
+
+    ok = True
+    with ThreadPoolExecutor(max_workers=min(PLUGIN_WORKERS, len(plugins))) as pool:
+        futures = [
+            (plugin, pool.submit(_fetch_plugin, plugin, plugins_dir, session))
+            for plugin in plugins
+        ]
+        for plugin, future in futures:
+            try:
+                filename, source = future.result()
+                console.print(
+                    f"[bold green][OK][/bold green] Plugin '{filename}' ({source})."
+                )
+            except (requests.exceptions.RequestException, ValueError, OSError) as e:
+                ok = False
+                console.print(
+                    f"[bold red][ERRO][/bold red] Falha ao baixar o plugin {plugin['url']}: {e}"
+                )
+    return ok
@@ -0,0 +1,375 @@
+# Download em múltiplas conexões (HTTP Range) com retomada via arquivo .part
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from easymcserver.downloader import bandwidth, cache
+from easymcserver.downloader.mirrors import rank_sources
+from easymcserver.downloader.session import get_session
+from easymcserver.downloader.transfer import Throttle, copy_response
+
+# Quantidade de conexões simultâneas por arquivo
+DEFAULT_SEGMENTS = 4
+# Arquivos menores que isso (por segmento) não valem a divisão
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+# Tentativas por segmento antes de desistir (sempre retomando do ponto atual)
+MAX_RETRIES = 3
+# Intervalo mínimo entre gravações do arquivo de estado
+STATE_FLUSH_INTERVAL = 1.0
+TIMEOUT = 30
+# Fonte que não aceita a conexão nesse tempo é trocada pela próxima
+CONNECT_TIMEOUT = 5
+# Sem compressão: os offsets do Range valem para os bytes do arquivo
+_IDENTITY = {"Accept-Encoding": "identity"}
+# Bloco usado para completar o hash a partir do disco
+_HASH_BLOCK = 1024 * 1024
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+\d+-\d+/(\d+)")
+
+
+def probe(url: str, session=None):
+    """Descobre o tamanho do arquivo e se o servidor aceita requisições Range.
+
+    Retorna (tamanho, aceita_range, validador). O tamanho é 0 se desconhecido;
+    o validador (ETag ou Last-Modified) serve para saber se um .part antigo
+    ainda corresponde ao mesmo arquivo.
+    """
+    session = session or get_session()
+    with session.get(
+        url,
+        headers={"Range": "bytes=0-0"},
+        stream=True,
+        timeout=(CONNECT_TIMEOUT, TIMEOUT),
+    ) as response:
+        response.raise_for_status()
+        validator = response.headers.get("ETag") or response.headers.get(
+            "Last-Modified"
+        )
+        if response.status_code == 206:
+            match = _CONTENT_RANGE_RE.match(response.headers.get("Content-Range", ""))
+            if match:
+                return int(match.group(1)), True, validator
+        # 200: o servidor ignorou o Range e mandaria o arquivo inteiro
+        return int(response.headers.get("Content-Length", 0)), False, validator
+
+
+def _state_path(part_path: str) -> str:
+    return part_path + ".json"
+
+
+def _load_state(part_path, url, size, validator):
+    """Carrega o progresso salvo, se ele ainda for válido para este arquivo."""
+    try:
+        with open(_state_path(part_path), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if (
+        state.get("url") != url
+        or state.get("size") != size
+        or state.get("validator") != validator
+        or not os.path.exists(part_path)
+        or os.path.getsize(part_path) != size
+    ):
+        return None
+    return state
+
+
+def _save_state(part_path, state):
+    tmp = _state_path(part_path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, _state_path(part_path))
+
+
+def _split(size: int, segments: int):
+    segments = max(1, min(segments, size // MIN_SEGMENT_SIZE))
+    step = size // segments
+    ranges = []
+    for i in range(segments):
+        start = i * step
+        end = size - 1 if i == segments - 1 else start + step - 1
+        # [início, fim, bytes já gravados]
+        ranges.append([start, end, 0])
+    return ranges
+
+
+class _Transfer:
+    """Estado compartilhado entre as threads de um download segmentado.
+
+    O hash é calculado em fluxo pelo primeiro segmento (que chega em ordem);
+    o restante do arquivo é lido do disco só no final, em finish_hash().
+
+    `sources` são URLs do mesmo arquivo, da preferida para a última opção.
+    Quando uma falha, todos os segmentos passam para a próxima e continuam
+    do byte em que pararam.
+    """
+
+    def __init__(
+        self,
+        sources,
+        part_path,
+        state,
+        on_progress,
+        session,
+        hasher=None,
+        priority=bandwidth.NORMAL,
+    ):
+        self.sources = list(sources)
+        self.source = 0
+        self.part_path = part_path
+        self.state = state
+        self.report = Throttle(on_progress)
+        self.session = session
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+        self.done = sum(seg[2] for seg in state["segments"])
+        self.hasher = hasher
+        self.priority = priority
+        # Bytes do início do arquivo já incluídos no hash
+        self.hashed = 0
+
+    def advance(self, segment, n):
+        with self.lock:
+            segment[2] += n
+            self.done += n
+            now = time.monotonic()
+            if now - self.last_flush >= STATE_FLUSH_INTERVAL:
+                _save_state(self.part_path, self.state)
+                self.last_flush = now
+        self.report(self.done, self.state["size"])
+
+    def failover(self, url) -> bool:
+        """Troca de fonte depois de uma falha em `url`. False se não houver outra."""
+        with self.lock:
+            if len(self.sources) == 1:
+                return False
+            if self.sources[self.source] == url:
+                self.source = (self.source + 1) % len(self.sources)
+            return True
+
+    def _hash_from_disk(self, end):
+        with open(self.part_path, "rb") as f:
+            f.seek(self.hashed)
+            while self.hashed < end:
+                block = f.read(min(_HASH_BLOCK, end - self.hashed))
+                if not block:
+                    break
+                self.hasher.update(block)
+                self.hashed += len(block)
+
+    def fetch_segment(self, segment):
+        attempt = 0
+        while segment[0] + segment[2] <= segment[1]:
+            offset = segment[0] + segment[2]
+            in_order = self.hasher is not None and segment[0] == 0
+            url = self.sources[self.source]
+            try:
+                if in_order:
+                    # Retomada: o que já estava no .part entra no hash antes
+                    self._hash_from_disk(offset)
+                with self.session.get(
+                    url,
+                    headers={"Range": f"bytes={offset}-{segment[1]}", **_IDENTITY},
+                    stream=True,
+                    timeout=(CONNECT_TIMEOUT, TIMEOUT),
+                ) as response:
+                    if response.status_code != 206:
+                        raise requests.exceptions.HTTPError(
+                            f"Resposta inesperada para Range: {response.status_code}"
+                        )
+                    # Sem buffer: o estado salvo nunca fica à frente do que está no disco
+                    with open(self.part_path, "r+b", buffering=0) as f:
+                        f.seek(offset)
+                        written = copy_response(
+                            response,
+                            f,
+                            limit=segment[1] + 1 - offset,
+                            on_bytes=lambda n: self.advance(segment, n),
+                            hashers=[self.hasher] if in_order else (),
+                            priority=self.priority,
+                        )
+                    if in_order:
+                        self.hashed += written
+            except (requests.exceptions.RequestException, OSError):
+                if in_order:
+                    # Não dá para saber o que entrou no hash: recalcula do disco no final
+                    self.hasher = None
+                attempt += 1
+                if attempt > MAX_RETRIES * len(self.sources):
+                    raise
+                # Com outra fonte disponível, tenta nela na hora; senão espera um pouco
+                if not self.failover(url) or attempt % len(self.sources) == 0:
+                    time.sleep(min(2**attempt, 10))
+
+    def finish_hash(self):
+        """Hash do arquivo completo, ou None se precisar ser recalculado do zero."""
+        if self.hasher is None:
+            return None
+        self._hash_from_disk(self.state["size"])
+        return self.hasher.hexdigest()
+
+
+def _single_stream(
+    sources,
+    part_path,
+    size,
+    on_progress,
+    session,
+    hasher=None,
+    priority=bandwidth.NORMAL,
+):
+    """Fallback para servidores sem Accept-Ranges: uma conexão, do zero.
+
+    Se uma fonte falhar, a próxima é tentada (também do zero).
+    """
+    report = Throttle(on_progress)
+
+    for index, url in enumerate(sources):
+        done = 0
+        attempt_hasher = hasher.copy() if hasher else None
+
+        def advance(n):
+            nonlocal done
+            done += n
+            report(done, size or done)
+
+        try:
+            with session.get(
+                url,
+                headers=_IDENTITY,
+                stream=True,
+                timeout=(CONNECT_TIMEOUT, TIMEOUT),
+            ) as response:
+                response.raise_for_status()
+                with open(part_path, "wb", buffering=0) as f:
+                    written = copy_response(
+                        response,
+                        f,
+                        on_bytes=advance,
+                        hashers=[attempt_hasher] if attempt_hasher else (),
+                        priority=priority,
+                    )
+                if size and written != size:
+                    raise requests.exceptions.ConnectionError(
+                        f"Download incompleto: {written} de {size} bytes"
+                    )
+        except requests.exceptions.RequestException:
+            if index == len(sources) - 1:
+                raise
+            continue
+        report(done, size or done, force=True)
+        return attempt_hasher.hexdigest() if attempt_hasher else None
+
+
+def _probe_any(sources, session):
+    """probe() na primeira fonte que responder; ela passa a ser a preferida."""
+    for index, url in enumerate(sources):
+        try:
+            size, accepts_ranges, validator = probe(url, session)
+        except requests.exceptions.RequestException:
+            if index == len(sources) - 1:
+                raise
+            continue
+        preferred = [url] + sources[:index] + sources[index + 1 :]
+        return preferred, (size, accepts_ranges, validator)
+
+
+def ranged_download(
+    url: str,
+    dest: str,
+    segments: int = DEFAULT_SEGMENTS,
+    on_progress=None,
+    session=None,
+    expected_hash: str = None,
+    priority: int = bandwidth.NORMAL,
+    use_mirrors: bool = True,
+) -> str:
+    """Baixa `url` em `dest` usando várias conexões HTTP Range.
+
+    O progresso fica em `dest + ".part"` e no arquivo de estado
+    `dest + ".part.json"`; se o download for interrompido, a próxima chamada
+    continua de onde parou. Se o servidor não suportar Range, baixa com uma
+    única conexão. `on_progress(baixado, total)` é chamado no máximo a cada
+    transfer.PROGRESS_INTERVAL segundos (e sempre ao terminar).
+
+    Com `expected_hash`, o arquivo só é movido para `dest` se o hash conferir;
+    caso contrário o .part é descartado e um ValueError é lançado. O hash é
+    calculado durante a transferência sempre que possível.
+
+    Se houver limite de banda (EASYMC_MAX_RATE), `priority` decide quem é
+    atendido primeiro entre os downloads simultâneos.
+
+    Com `use_mirrors` e espelhos configurados para o artefato (ver
+    mirrors.py), baixa da fonte mais rápida e troca de fonte no meio do
+    download se ela falhar, sem recomeçar do zero.
+
+    Retorna o caminho final. Erros de rede são propagados (RequestException).
+    """
+    session = session or get_session()
+    part_path = dest + ".part"
+
+    if use_mirrors:
+        sources = rank_sources(url, expected_hash, session)
+    else:
+        sources = [url]
+    sources, (size, accepts_ranges, validator) = _probe_any(sources, session)
+    # Espelhos têm validadores diferentes; com hash, ele identifica o arquivo
+    if expected_hash:
+        validator = expected_hash.lower()
+    algorithm = cache.algorithm_for(expected_hash) if expected_hash else None
+    hasher = hashlib.new(algorithm) if algorithm else None
+
+    if not accepts_ranges or size == 0:
+        actual = _single_stream(
+            sources, part_path, size, on_progress, session, hasher, priority
+        )
+    else:
+        state = _load_state(part_path, url, size, validator)
+        if state is None:
+            state = {
+                "url": url,
+                "size": size,
+                "validator": validator,
+                "segments": _split(size, segments),
+            }
+            # Reserva o espaço do arquivo inteiro para as threads gravarem por offset
+            with open(part_path, "wb") as f:
+                f.truncate(size)
+            _save_state(part_path, state)
+
+        transfer = _Transfer(
+            sources, part_path, state, on_progress, session, hasher, priority
+        )
+        transfer.report(transfer.done, size, force=True)
+
+        pending = [seg for seg in state["segments"] if seg[0] + seg[2] <= seg[1]]
+        try:
+            if pending:
+                with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+                    # list() propaga a exceção de qualquer segmento
+                    list(pool.map(transfer.fetch_segment, pending))
+        finally:
+            # Mesmo em caso de falha, o progresso fica salvo para retomar depois
+            _save_state(part_path, state)
+        transfer.report(size, size, force=True)
+        actual = transfer.finish_hash() if hasher else None
+
+    if os.path.exists(_state_path(part_path)):
+        os.remove(_state_path(part_path))
+
+    if expected_hash:
+        actual = actual or cache.file_digest(part_path, algorithm)
+        if actual != expected_hash.lower():
+            os.remove(part_path)
+            raise ValueError(
+                f"hash não confere (esperado {expected_hash}, obtido {actual})"
+            )
+
+    os.replace(part_path, dest)
+    return dest
@@ -0,0 +1,31 @@
+# Sessão HTTP compartilhada (pool de conexões) para os downloads
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Conexões mantidas abertas por host (uma por segmento/download simultâneo)
+POOL_SIZE = 16
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def new_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def get_session() -> requests.Session:
+    """Retorna a sessão compartilhada pelo processo (criada sob demanda)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
@@ -0,0 +1,131 @@
+# Laço de cópia HTTP -> disco com pouco custo por byte
+#
+# Em vez de iter_content() (um objeto bytes novo a cada bloco), o corpo da
+# resposta é lido com readinto() direto em um buffer reutilizável, com blocos
+# que crescem enquanto a rede acompanha. O hash pode ser calculado no mesmo
+# laço e o progresso é repassado no máximo a cada PROGRESS_INTERVAL segundos.
+
+import time
+import requests
+import urllib3
+from easymcserver.downloader import bandwidth
+
+MIN_READ_SIZE = 64 * 1024
+MAX_READ_SIZE = 4 * 1024 * 1024
+# Leituras mais rápidas que isso dobram o bloco; mais lentas que SLOW_READ o reduzem
+FAST_READ = 0.05
+SLOW_READ = 0.25
+# Intervalo mínimo entre atualizações da barra de progresso
+PROGRESS_INTERVAL = 0.1
+
+
+def body_reader(response):
+    """Função readinto(buffer) para o corpo de uma resposta `stream=True`.
+
+    Sem Content-Encoding, lê direto do http.client (sem cópias intermediárias);
+    caso contrário usa o urllib3, que descomprime o conteúdo. Nos dois casos,
+    uma conexão encerrada antes do Content-Length lança ConnectionError (o
+    http.client só retornaria 0, como no fim normal do corpo).
+    """
+    raw = response.raw
+    fp = getattr(raw, "_fp", None)
+    encoding = response.headers.get("Content-Encoding", "identity").lower()
+    if encoding in ("", "identity") and hasattr(fp, "readinto"):
+        length = response.headers.get("Content-Length", "")
+        remaining = int(length) if length.isdigit() else None
+
+        def readinto(buffer):
+            nonlocal remaining
+            n = fp.readinto(buffer)
+            if n and remaining is not None:
+                remaining -= n
+            elif not n and len(buffer) and remaining:
+                raise requests.exceptions.ConnectionError(
+                    f"Conexão encerrada com {remaining} bytes faltando"
+                )
+            if not n and fp.isclosed():
+                # Corpo lido até o fim: a conexão volta para o pool (keep-alive)
+                raw.release_conn()
+            return n
+
+        return readinto
+
+    def readinto(buffer):
+        try:
+            return raw.readinto(buffer)
+        except urllib3.exceptions.HTTPError as e:
+            # Ex.: ProtocolError do urllib3 para corpo incompleto
+            raise requests.exceptions.ConnectionError(e) from e
+
+    return readinto
+
+
+class Throttle:
+    """Repassa o progresso para `callback` no máximo a cada `interval` segundos."""
+
+    def __init__(self, callback, interval: float = PROGRESS_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self.last = 0.0
+
+    def __call__(self, done, total, force=False):
+        if not self.callback:
+            return
+        now = time.monotonic()
+        if force or now - self.last >= self.interval:
+            self.last = now
+            self.callback(done, total)
+
+
+def copy_response(
+    response, f, limit=None, on_bytes=None, hashers=(), priority=bandwidth.NORMAL
+) -> int:
+    """Copia o corpo de `response` para o arquivo `f` (aberto com buffering=0).
+
+    - `limit`: para depois de gravar essa quantidade de bytes.
+    - `on_bytes(n)`: chamado depois de cada bloco efetivamente gravado.
+    - `hashers`: objetos hashlib atualizados com os mesmos bytes gravados.
+    - `priority`: prioridade no limite de banda global (ver bandwidth.py).
+
+    Retorna o total de bytes gravados.
+    """
+    readinto = body_reader(response)
+    expected = limit or int(response.headers.get("Content-Length") or MAX_READ_SIZE)
+    buffer = memoryview(bytearray(max(1, min(expected, MAX_READ_SIZE))))
+    read_size = MIN_READ_SIZE
+    total = 0
+    limiter = bandwidth.get_limiter()
+
+    while limit is None or total < limit:
+        want = min(read_size, len(buffer))
+        if limiter:
+            # Leituras pequenas mantêm a taxa estável e a vez dos outros downloads
+            want = min(want, limiter.slice_size)
+        if limit is not None:
+            want = min(want, limit - total)
+        started = time.monotonic()
+        n = readinto(buffer[:want])
+        if not n:
+            break
+        elapsed = time.monotonic() - started
+        if limiter:
+            limiter.acquire(n, priority)
+
+        view = buffer[:n]
+        for hasher in hashers:
+            hasher.update(view)
+        while view:
+            written = f.write(view)
+            view = view[written:]
+            total += written
+            if on_bytes:
+                on_bytes(written)
+
+        # Blocos grandes quando a rede é rápida; pequenos quando é lenta, para o
+        # progresso (e o estado de retomada) continuar avançando com frequência
+        if n == want and elapsed < FAST_READ:
+            read_size = min(read_size * 2, MAX_READ_SIZE)
+        elif elapsed > SLOW_READ:
+            read_size = max(read_size // 2, MIN_READ_SIZE)
+
+    return total
@@ -0,0 +1,101 @@
+# Atualização incremental: só reescreve os arquivos que mudaram
+
+import os
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from easymcserver.downloader.extract import (
+    default_workers,
+    extract_zip,
+    safe_target,
+)
+
+console = Console()
+
+# Configurações do usuário: só são extraídas se ainda não existirem
+PROTECTED_FILES = {
+    "server.properties",
+    "allowlist.json",
+    "whitelist.json",
+    "permissions.json",
+    "ops.json",
+    "banned-players.json",
+    "banned-ips.json",
+    "usercache.json",
+    "eula.txt",
+    "jvm_args.txt",
+}
+
+# Mundos e conteúdos do usuário nunca são alterados por uma atualização
+PROTECTED_DIRS = {
+    "worlds",
+    "world",
+    "world_nether",
+    "world_the_end",
+    "plugins",
+    "mods",
+    "config",
+    "logs",
+}
+
+
+def is_protected(arcname: str) -> bool:
+    parts = [p for p in arcname.replace("\\", "/").split("/") if p]
+    if not parts:
+        return False
+    return parts[0] in PROTECTED_DIRS or (
+        len(parts) == 1 and parts[0] in PROTECTED_FILES
+    )
+
+
+def file_crc32(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def _needs_update(info: zipfile.ZipInfo, output_dir: str) -> bool:
+    target = safe_target(output_dir, info.filename)
+    if target is None:
+        return False
+    if not os.path.isfile(target):
+        # Arquivos novos (inclusive configurações ausentes) são sempre criados
+        return True
+    if is_protected(info.filename):
+        return False
+    if os.path.getsize(target) != info.file_size:
+        return True
+    # Mesmo tamanho: compara o CRC32 do diretório central com o arquivo em disco
+    return file_crc32(target) != info.CRC
+
+
+def changed_members(zip_path: str, output_dir: str, workers: int = None):
+    """Lista os membros do ZIP que diferem dos arquivos em output_dir."""
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = [i for i in zf.infolist() if not i.is_dir()]
+
+    with ThreadPoolExecutor(max_workers=workers or default_workers()) as pool:
+        flags = list(pool.map(lambda i: _needs_update(i, output_dir), infos))
+    return [info for info, changed in zip(infos, flags) if changed]
+
+
+def update_in_place(zip_path: str, output_dir: str):
+    """Atualiza uma instalação existente com o conteúdo de zip_path.
+
+    Retorna (arquivos gravados, arquivos mantidos).
+    """
+    changed = changed_members(zip_path, output_dir)
+    with zipfile.ZipFile(zip_path) as zf:
+        total = sum(1 for i in zf.infolist() if not i.is_dir())
+
+    if changed:
+        extract_zip(zip_path, output_dir, members=[i.filename for i in changed])
+
+    console.print(
+        f"[bold green][OK][/bold green] {len(changed)} arquivo(s) atualizado(s), "
+        f"{total - len(changed)} mantido(s)."
+    )
+    return len(changed), total - len(changed)
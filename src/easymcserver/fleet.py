@@ -0,0 +1,182 @@
+# Provisionamento declarativo de vários servidores a partir de um arquivo TOML
+
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from rich.table import Table
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.10
+    import tomli as tomllib
+
+from easymcserver.config.jvm_args import apply_jvm_flags, format_java_version_string
+from easymcserver.config.launch import normalize_options, set_launch_options
+from easymcserver.config.properties import apply_properties
+from easymcserver.downloader.download import install_server
+from easymcserver.system.jdk import jdk_for_server, version_line
+from easymcserver.utils import create_start_script
+
+console = Console()
+
+DEFAULT_WORKERS = 4
+
+# Nomes aceitos no arquivo -> nomes usados pelo instalador
+SERVER_TYPES = {
+    "vanilla": "Vanilla",
+    "paper": "Paper (Otimizado)",
+    "fabric": "Fabric (Mods)",
+    "neoforge": "NeoForge (Mods)",
+    "bedrock": "Bedrock",
+}
+
+_MEMORY_RE = re.compile(r"^\d+[MG]$", re.IGNORECASE)
+
+
+def load_fleet(path: str):
+    """Lê o arquivo de frota e retorna a lista de servidores (já com os padrões)."""
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+
+    defaults = data.get("defaults", {})
+    base_dir = os.path.dirname(os.path.abspath(path))
+    servers = []
+    for index, entry in enumerate(data.get("server", []), start=1):
+        spec = {**defaults, **entry}
+        spec["properties"] = {
+            **defaults.get("properties", {}),
+            **entry.get("properties", {}),
+        }
+        spec["launch"] = {**defaults.get("launch", {}), **entry.get("launch", {})}
+        spec.setdefault("name", f"server-{index}")
+
+        server_type = str(spec.get("type", "")).lower()
+        if server_type not in SERVER_TYPES:
+            raise ValueError(
+                f"'{spec['name']}': tipo '{spec.get('type')}' inválido "
+                f"(use {', '.join(SERVER_TYPES)})."
+            )
+        if server_type == "bedrock" and not spec.get("url"):
+            raise ValueError(f"'{spec['name']}': servidores Bedrock precisam de 'url'.")
+        for key in ("xmx", "xms"):
+            if spec.get(key) and not _MEMORY_RE.match(str(spec[key])):
+                raise ValueError(f"'{spec['name']}': {key} inválido ({spec[key]}).")
+        if not spec.get("directory"):
+            raise ValueError(f"'{spec['name']}': 'directory' é obrigatório.")
+        try:
+            normalize_options(spec["launch"])
+        except ValueError as e:
+            raise ValueError(f"'{spec['name']}': launch: {e}.") from None
+
+        # Caminhos relativos são relativos ao próprio arquivo de frota
+        spec["directory"] = os.path.join(base_dir, spec["directory"])
+        spec["server_type"] = SERVER_TYPES[server_type]
+        servers.append(spec)
+
+    names = [s["name"] for s in servers]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise ValueError(f"Nomes repetidos: {', '.join(sorted(duplicates))}.")
+    return servers
+
+
+def server_java_version(directory: str) -> str:
+    """Versão do Java do servidor no formato do jvm_args.txt ("1.8", "21"...)."""
+    jdk = jdk_for_server(directory, quiet=True)
+    # Versões sem flags pré-definidas usam as do Java 21
+    return (jdk and format_java_version_string(version_line(jdk))) or "21"
+
+
+def provision(spec: dict) -> dict:
+    """Instala e configura um servidor da frota. Nunca lança exceção."""
+    started = time.perf_counter()
+    result = {"name": spec["name"], "directory": spec["directory"], "ok": False}
+    try:
+        output_dir = install_server(
+            spec["server_type"],
+            spec["directory"],
+            version=str(spec.get("version", "latest")),
+            loader_version=str(spec.get("loader_version", "latest")),
+            url=spec.get("url"),
+            plugins=spec.get("plugins"),
+            update=bool(spec.get("update", False)),
+        )
+        if not output_dir:
+            result["error"] = "falha na instalação"
+            return result
+
+        if spec.get("properties"):
+            apply_properties(output_dir, spec["properties"])
+
+        if spec["server_type"] == "Bedrock":
+            create_start_script("Bedrock", output_dir)
+        else:
+            # Afinidade de CPU e prioridades entram no script gerado logo abaixo
+            set_launch_options(output_dir, spec["launch"], clear=True)
+            create_start_script(
+                "Java",
+                output_dir,
+                str(spec.get("xmx", "4G")).upper(),
+                str(spec.get("xms", "1G")).upper(),
+            )
+            if not apply_jvm_flags(
+                output_dir,
+                spec.get("jvm_flags", []),
+                str(spec.get("java_version") or server_java_version(output_dir)),
+                gc_log=bool(spec.get("gc_log", False)),
+                nmt=bool(spec.get("nmt", False)),
+            ):
+                result["error"] = "flags da JVM inválidas (ver jvm_args.txt)"
+                return result
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def apply_fleet(path: str, workers: int = DEFAULT_WORKERS) -> bool:
+    """Provisiona todos os servidores do arquivo em paralelo e mostra o resumo.
+
+    Downloads do mesmo artefato não são repetidos: o primeiro servidor baixa e
+    os demais esperam e usam o cache local (ver downloader/cache.py).
+    """
+    try:
+        servers = load_fleet(path)
+    except (OSError, ValueError, tomllib.TOMLDecodeError) as e:
+        console.print(f"[bold red][ERRO][/bold red] Arquivo de frota inválido: {e}")
+        return False
+
+    console.print(
+        f"[cyan]Provisionando {len(servers)} servidor(es) com até {workers} em paralelo...[/cyan]"
+    )
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(provision, servers))
+    total = time.perf_counter() - started
+
+    table = Table(title="Resumo do provisionamento")
+    table.add_column("Servidor")
+    table.add_column("Tipo")
+    table.add_column("Diretório")
+    table.add_column("Tempo", justify="right")
+    table.add_column("Status")
+    for spec, result in zip(servers, results):
+        status = (
+            "[bold green]OK[/bold green]"
+            if result["ok"]
+            else f"[bold red]ERRO[/bold red] {result.get('error', '')}"
+        )
+        table.add_row(
+            spec["name"],
+            f"{spec['server_type']} {spec.get('version', '')}".strip(),
+            spec["directory"],
+            f"{result['seconds']:.2f}s",
+            status,
+        )
+    console.print(table)
+    console.print(f"Tempo total: [cyan]{total:.2f}s[/cyan]")
+    return all(r["ok"] for r in results)
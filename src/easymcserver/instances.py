@@ -0,0 +1,69 @@
+# Registro dos servidores instalados por este computador
+#
+# Cada instalação bem-sucedida (menu, `easymc apply` ou atualização) entra
+# aqui. Outras rotinas que atuam em todos os servidores da máquina, como a
+# deduplicação de binários, usam essa lista.
+
+import json
+import os
+import threading
+import time
+from easymcserver.downloader.cache import get_cache_dir
+
+_lock = threading.Lock()
+
+
+def _registry_path():
+    return get_cache_dir() / "instances.json"
+
+
+def _read():
+    try:
+        with open(_registry_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write(instances):
+    path = _registry_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(instances, f, indent=2)
+    os.replace(tmp, path)
+
+
+def register_instance(directory: str, server_type: str):
+    """Adiciona (ou atualiza) um servidor no registro."""
+    directory = os.path.abspath(directory)
+    with _lock:
+        instances = _read()
+        entry = instances.get(directory, {"installed_at": time.time()})
+        entry.update({"type": server_type, "updated_at": time.time()})
+        instances[directory] = entry
+        _write(instances)
+
+
+def unregister_instance(directory: str):
+    with _lock:
+        instances = _read()
+        if instances.pop(os.path.abspath(directory), None) is not None:
+            _write(instances)
+
+
+def instance_type(directory: str):
+    """Tipo registrado do servidor em `directory` (ex.: "Fabric (Mods)"), ou None."""
+    with _lock:
+        entry = _read().get(os.path.abspath(directory))
+    return entry.get("type") if entry else None
+
+
+def list_instances():
+    """Servidores registrados que ainda existem: {diretório: informações}."""
+    with _lock:
+        instances = _read()
+        existing = {d: e for d, e in instances.items() if os.path.isdir(d)}
+        if len(existing) != len(instances):
+            _write(existing)
+    return existing
@@ -1,7 +1,441 @@
+import argparse
 from easymcserver.ui.menus import main_menu
 
 
-def main(test: bool = False):
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="easymc",
+        description="Instala e configura servidores de Minecraft. Sem argumentos, abre o menu interativo.",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    apply_parser = subparsers.add_parser(
+        "apply", help="Provisiona os servidores descritos em um arquivo TOML"
+    )
+    apply_parser.add_argument("spec", help="Arquivo de frota (ex.: fleet.toml)")
+    apply_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=4,
+        help="Quantidade de servidores provisionados ao mesmo tempo (padrão: 4)",
+    )
+    apply_parser.add_argument(
+        "--max-rate",
+        help="Limite de banda somado de todos os downloads (ex.: 20M, 512K por segundo)",
+    )
+
+    dedup_parser = subparsers.add_parser(
+        "dedup",
+        help="Liga binários idênticos (server.jar, bedrock_server, bibliotecas) entre servidores",
+    )
+    dedup_parser.add_argument(
+        "directories",
+        nargs="*",
+        help="Diretórios de servidor (padrão: todos os servidores registrados)",
+    )
+    dedup_parser.add_argument(
+        "--mode",
+        choices=["auto", "reflink", "hardlink"],
+        default="auto",
+        help="auto usa reflink quando o sistema de arquivos suporta e hardlink nos demais casos",
+    )
+    dedup_parser.add_argument(
+        "--dry-run", action="store_true", help="Só mostra quanto seria recuperado"
+    )
+
+    cds_parser = subparsers.add_parser(
+        "cds",
+        help="Gera o arquivo CDS do servidor para acelerar a inicialização (Java 13+)",
+    )
+    cds_parser.add_argument("directory", help="Diretório do servidor Java")
+    cds_parser.add_argument(
+        "--java",
+        help="Executável do Java (padrão: o do script de inicialização)",
+    )
+    cds_parser.add_argument(
+        "--disable", action="store_true", help="Remove as flags de CDS do script"
+    )
+
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Compara o tempo de inicialização do servidor com perfis de flags da JVM",
+    )
+    bench_parser.add_argument("directory", help="Diretório do servidor Java")
+    bench_parser.add_argument(
+        "-p",
+        "--profile",
+        action="append",
+        dest="profiles",
+        help='Perfil a medir: nome padrão (atual, g1, g1-perf, zgc, zgc-gen, shenandoah) ou "nome=flags". Pode repetir',
+    )
+    bench_parser.add_argument(
+        "-n", "--runs", type=int, default=5, help="Boots por perfil (padrão: 5)"
+    )
+    bench_parser.add_argument(
+        "--warmup",
+        type=int,
+        default=1,
+        help="Boots descartados antes das medições (padrão: 1)",
+    )
+    bench_parser.add_argument(
+        "--java",
+        help="Executável do Java (padrão: o do script de inicialização)",
+    )
+    bench_parser.add_argument(
+        "-o", "--output", help="Arquivo JSON para salvar as medições"
+    )
+
+    compare_parser = subparsers.add_parser(
+        "bench-compare", help="Compara resultados salvos por easymc bench"
+    )
+    compare_parser.add_argument("results", nargs="+", help="Arquivos JSON")
+
+    profile_parser = subparsers.add_parser(
+        "profile",
+        help="Gera um jvm_args.txt com flags calculadas para esta máquina (CPUs, Xmx, NUMA, THP)",
+    )
+    profile_parser.add_argument("directory", help="Diretório do servidor Java")
+    profile_parser.add_argument(
+        "--xmx", help="Heap máximo (padrão: o -Xmx do script de inicialização)"
+    )
+    profile_parser.add_argument(
+        "--java-version",
+        help="Versão do Java (ex.: 1.8, 17, 21; padrão: a do java no PATH)",
+    )
+    profile_parser.add_argument(
+        "--dry-run", action="store_true", help="Só mostra as flags, sem gravar"
+    )
+
+    plan_parser = subparsers.add_parser(
+        "plan",
+        help="Estima a memória real da JVM (heap + fora do heap) e recomenda Xmx/Xms",
+    )
+    plan_parser.add_argument("directory", help="Diretório do servidor Java")
+    plan_parser.add_argument(
+        "--xmx", help="Xmx a avaliar (padrão: o do script de inicialização)"
+    )
+    plan_parser.add_argument(
+        "--gc",
+        choices=["g1", "parallel", "serial", "shenandoah", "zgc", "zgc-gen"],
+        help="Coletor de lixo (padrão: o ativo no jvm_args.txt, ou G1)",
+    )
+    plan_parser.add_argument(
+        "--java-version", help="Versão do Java (padrão: a do java no PATH)"
+    )
+    calibration = plan_parser.add_mutually_exclusive_group()
+    calibration.add_argument(
+        "--nmt",
+        help="Calibra o modelo com a saída de jcmd <pid> VM.native_memory summary",
+    )
+    calibration.add_argument(
+        "--pid",
+        type=int,
+        help="Calibra o modelo medindo o servidor em execução (NMT ativado)",
+    )
+
+    gclog_parser = subparsers.add_parser(
+        "gclog",
+        help="Analisa o log de GC: percentis de pausa, taxa de alocação e heap após GC",
+    )
+    gclog_parser.add_argument(
+        "path", help="Diretório do servidor ou arquivo de log (ex.: logs/gc.log)"
+    )
+    gclog_parser.add_argument(
+        "-f",
+        "--follow",
+        action="store_true",
+        help="Continua acompanhando o log do servidor em execução",
+    )
+    gclog_parser.add_argument(
+        "--threshold",
+        type=float,
+        help="Pausas acima disso (ms) são contadas (padrão: MaxGCPauseMillis do servidor ou 50)",
+    )
+    gclog_parser.add_argument(
+        "--json", action="store_true", help="Mostra o resumo em JSON"
+    )
+
+    nmt_parser = subparsers.add_parser(
+        "nmt",
+        help="Acompanha a memória nativa (NMT) do servidor em execução e aponta vazamentos",
+    )
+    nmt_parser.add_argument("directory", help="Diretório do servidor Java")
+    nmt_parser.add_argument(
+        "--pid", type=int, help="PID da JVM (padrão: a que roda no diretório)"
+    )
+    nmt_parser.add_argument(
+        "--interval",
+        type=int,
+        default=60,
+        help="Segundos entre as amostras (padrão: 60)",
+    )
+    nmt_parser.add_argument(
+        "--count", type=int, help="Quantidade de amostras (padrão: até Ctrl+C)"
+    )
+    nmt_parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Só mostra o relatório das amostras já coletadas",
+    )
+
+    jdks_parser = subparsers.add_parser(
+        "jdks",
+        help="Lista os JDKs instalados e qual Java cada servidor deve usar",
+    )
+    jdks_parser.add_argument(
+        "directory",
+        nargs="?",
+        help="Diretório do servidor (mostra o Java exigido pela versão do Minecraft)",
+    )
+
+    flags_parser = subparsers.add_parser(
+        "flags",
+        help="Valida as flags ativas do jvm_args.txt com o JDK do servidor",
+    )
+    flags_parser.add_argument("directory", help="Diretório do servidor Java")
+
+    launch_parser = subparsers.add_parser(
+        "launch",
+        help="Regera o script de inicialização com jvm_args.txt, afinidade de CPU e prioridades",
+    )
+    launch_parser.add_argument("directory", help="Diretório do servidor Java")
+    launch_parser.add_argument(
+        "--cpus", help="CPUs onde o servidor pode rodar (ex.: 2-5,8), via taskset"
+    )
+    launch_parser.add_argument(
+        "--nice", type=int, help="Prioridade de CPU, de -20 (maior) a 19 (menor)"
+    )
+    launch_parser.add_argument(
+        "--ionice",
+        help="Prioridade de disco: idle, best-effort[:0-7] ou realtime[:0-7]",
+    )
+    launch_parser.add_argument(
+        "--numa-node", type=int, help="Prende CPU e memória a um nó NUMA (numactl)"
+    )
+    launch_parser.add_argument(
+        "--nofile", type=int, help="Limite de arquivos abertos (ulimit -n)"
+    )
+    launch_parser.add_argument(
+        "--clear",
+        action="store_true",
+        help="Descarta as opções salvas antes de aplicar as novas",
+    )
+
+    hugepages_parser = subparsers.add_parser(
+        "hugepages",
+        help="Detecta páginas grandes (THP/hugetlbfs) e ativa a flag certa no jvm_args.txt",
+    )
+    hugepages_parser.add_argument("directory", help="Diretório do servidor Java")
+    hugepages_parser.add_argument(
+        "--xmx", help="Heap a considerar (padrão: o Xmx do script de inicialização)"
+    )
+    hugepages_parser.add_argument(
+        "--dry-run", action="store_true", help="Só mostra a recomendação, sem gravar"
+    )
+    hugepages_parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Confere se o heap do servidor em execução recebeu páginas grandes",
+    )
+    hugepages_parser.add_argument(
+        "--pid", type=int, help="PID da JVM (padrão: a que roda no diretório)"
+    )
+
+    run_parser = subparsers.add_parser(
+        "run",
+        help="Executa e supervisiona servidores (reinicia após quedas, para com Ctrl+C)",
+    )
+    run_parser.add_argument(
+        "directories", nargs="*", help="Diretórios dos servidores a executar"
+    )
+    run_parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Executa todos os servidores instalados por este computador",
+    )
+    run_parser.add_argument(
+        "--no-restart", action="store_true", help="Não reinicia servidores que caírem"
+    )
+    run_parser.add_argument(
+        "--startup-timeout",
+        type=float,
+        default=600,
+        help='Segundos para o servidor chegar ao "Done" (padrão: 600)',
+    )
+    run_parser.add_argument(
+        "--stop-timeout",
+        type=float,
+        default=120,
+        help='Segundos para o "stop" salvar o mundo antes do SIGTERM (padrão: 120)',
+    )
+    run_parser.add_argument(
+        "--report",
+        type=float,
+        help="Mostra o TPS, os atrasos e os jogadores de cada servidor a cada N segundos",
+    )
+
+    ticks_parser = subparsers.add_parser(
+        "ticks",
+        help='TPS, atrasos ("Can\'t keep up"), watchdog, jogadores e saves pelo latest.log',
+    )
+    ticks_parser.add_argument(
+        "directories", nargs="+", help="Diretórios dos servidores"
+    )
+    ticks_parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Continua lendo os logs e atualiza a tabela até Ctrl+C",
+    )
+    ticks_parser.add_argument(
+        "--window",
+        type=float,
+        default=60,
+        help="Janela (s) do TPS e dos atrasos recentes (padrão: 60)",
+    )
+    ticks_parser.add_argument(
+        "--json", action="store_true", help="Mostra o resumo em JSON"
+    )
+    return parser
+
+
+def main(test: bool = False, argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.command == "apply":
+        # Importação local: o modo interativo não precisa carregar o TOML
+        from easymcserver.fleet import apply_fleet
+
+        if args.max_rate:
+            from easymcserver.downloader import bandwidth
+
+            try:
+                bandwidth.configure(args.max_rate)
+            except ValueError as e:
+                build_parser().error(str(e))
+        raise SystemExit(0 if apply_fleet(args.spec, args.workers) else 1)
+
+    if args.command == "dedup":
+        from easymcserver.system.dedup import run_dedup
+
+        raise SystemExit(
+            0 if run_dedup(args.directories, args.mode, args.dry_run) else 1
+        )
+
+    if args.command == "cds":
+        from easymcserver.config import cds
+
+        if args.disable:
+            cds.disable(args.directory)
+            raise SystemExit(0)
+        raise SystemExit(0 if cds.train(args.directory, args.java) else 1)
+
+    if args.command == "bench":
+        from easymcserver.config.benchmark import run_benchmark
+
+        ok = run_benchmark(
+            args.directory,
+            args.profiles,
+            args.runs,
+            args.warmup,
+            args.java,
+            args.output,
+        )
+        raise SystemExit(0 if ok else 1)
+
+    if args.command == "bench-compare":
+        from easymcserver.config.benchmark import compare_results
+
+        raise SystemExit(0 if compare_results(args.results) else 1)
+
+    if args.command == "profile":
+        from easymcserver.config.jvm_profile import generate_jvm_profile
+
+        ok = generate_jvm_profile(
+            args.directory, args.xmx, args.java_version, not args.dry_run
+        )
+        raise SystemExit(0 if ok else 1)
+
+    if args.command == "plan":
+        from easymcserver.system.footprint import run_plan
+
+        ok = run_plan(
+            args.directory, args.xmx, args.gc, args.java_version, args.nmt, args.pid
+        )
+        raise SystemExit(0 if ok else 1)
+
+    if args.command == "gclog":
+        from easymcserver.config.gc_log import analyze_gc_log
+
+        ok = analyze_gc_log(args.path, args.follow, args.threshold, args.json)
+        raise SystemExit(0 if ok else 1)
+
+    if args.command == "nmt":
+        from easymcserver.system.nmt import collect_nmt
+
+        ok = collect_nmt(
+            args.directory, args.interval, args.count, args.pid, args.report
+        )
+        raise SystemExit(0 if ok else 1)
+
+    if args.command == "jdks":
+        from easymcserver.system.jdk import list_jdks
+
+        raise SystemExit(0 if list_jdks(args.directory) else 1)
+
+    if args.command == "flags":
+        from easymcserver.config.jvm_flags import check_jvm_args
+
+        raise SystemExit(0 if check_jvm_args(args.directory) else 1)
+
+    if args.command == "launch":
+        from easymcserver.config.launch import configure_launch
+
+        options = {
+            "cpus": args.cpus,
+            "nice": args.nice,
+            "ionice": args.ionice,
+            "numa_node": args.numa_node,
+            "nofile": args.nofile,
+        }
+        ok = configure_launch(args.directory, options, args.clear)
+        raise SystemExit(0 if ok else 1)
+
+    if args.command == "hugepages":
+        from easymcserver.system import hugepages
+
+        if args.verify:
+            ok = hugepages.verify_large_pages(args.directory, args.pid)
+        else:
+            ok = hugepages.configure_large_pages(
+                args.directory, args.xmx, not args.dry_run
+            )
+        raise SystemExit(0 if ok else 1)
+
+    if args.command == "run":
+        from easymcserver.instances import list_instances
+        from easymcserver.system.supervisor import supervise
+
+        directories = list(args.directories)
+        if args.all:
+            directories += [d for d in list_instances() if d not in directories]
+        if not directories:
+            build_parser().error("informe os diretórios dos servidores ou use --all")
+        ok = supervise(
+            directories,
+            not args.no_restart,
+            args.startup_timeout,
+            args.stop_timeout,
+            args.report,
+        )
+        raise SystemExit(0 if ok else 1)
+
+    if args.command == "ticks":
+        from easymcserver.system.ticks import analyze_ticks
+
+        ok = analyze_ticks(args.directories, args.follow, args.window, args.json)
+        raise SystemExit(0 if ok else 1)
+
     main_menu(test=test)
 
 
@@ -5,6 +5,24 @@ __all__ = [
     "get_memory_config_xmx",
     "get_memory_config_xms",
     "check_java_installed",
+    "discover_jdks",
+    "jdk_for_server",
     "check_sys_architecture",
     "check_box64_installed",
+    "get_cpu_count",
+    "get_numa_nodes",
+    "get_thp_mode",
+    "detect_hugepages",
+    "recommend_large_pages",
+    "get_limits",
+    "effective_memory",
+    "effective_cpus",
+    "plan_memory",
+    "check_xmx",
+    "parse_nmt_summary",
+    "run_dedup",
+    "supervise",
+    "boot_until_done",
+    "analyze_ticks",
+    "break_links",
 ]
@@ -0,0 +1,240 @@
+# Limites de cgroup (v1 e v2): memória, swap e CPU efetivos em contêineres
+#
+# Dentro de um contêiner Docker/LXC, psutil e os.cpu_count() enxergam a
+# máquina inteira. O limite real é o do cgroup do processo: memory.max ou
+# memory.limit_in_bytes, swap, cpu.max ou cfs_quota e o cpuset. Os limites
+# são lidos do cgroup do processo até a raiz montada, e vale o menor de
+# todos (um cgroup pai limitado também limita os filhos).
+
+import math
+import os
+import psutil
+
+# Valores acima disso significam "sem limite" (o v1 usa 2^63 arredondado para página)
+_UNLIMITED = 2**60
+
+_limits = None
+
+
+def _read(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _parse_mountinfo(mountinfo_file):
+    """{controlador: (raiz, ponto de montagem)}; o v2 fica na chave ""."""
+    mounts = {}
+    try:
+        with open(mountinfo_file, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return mounts
+    for line in lines:
+        left, sep, right = line.partition(" - ")
+        if not sep:
+            continue
+        fields, fs = left.split(), right.split()
+        if len(fields) < 5 or len(fs) < 3:
+            continue
+        root, mount_point = fields[3], fields[4]
+        if fs[0] == "cgroup2":
+            mounts.setdefault("", (root, mount_point))
+        elif fs[0] == "cgroup":
+            for option in fs[2].split(","):
+                mounts.setdefault(option, (root, mount_point))
+    return mounts
+
+
+def _parse_cgroup(cgroup_file):
+    """{controlador: caminho do cgroup}; o v2 fica na chave ""."""
+    paths = {}
+    content = _read(cgroup_file) or ""
+    for line in content.splitlines():
+        parts = line.split(":", 2)
+        if len(parts) != 3:
+            continue
+        _, controllers, path = parts
+        for controller in controllers.split(",") if controllers else [""]:
+            paths[controller] = path
+    return paths
+
+
+def _directories(controller, paths, mounts):
+    """Diretórios do cgroup do processo até a raiz montada (do mais interno)."""
+    if controller not in paths or controller not in mounts:
+        return []
+    root, mount_point = mounts[controller]
+    rel = os.path.relpath(paths[controller], root)
+    # Com namespace de cgroup o caminho pode estar fora da montagem
+    if rel.startswith(".."):
+        rel = "."
+    directory = os.path.normpath(os.path.join(mount_point, rel))
+    directories = [directory]
+    while directory != mount_point and directory.startswith(mount_point):
+        directory = os.path.dirname(directory)
+        directories.append(directory)
+    return directories
+
+
+def _smallest(directories, name, parse):
+    values = [parse(_read(os.path.join(d, name))) for d in directories]
+    values = [v for v in values if v is not None]
+    return min(values) if values else None
+
+
+def _bytes_limit(text):
+    if not text or text == "max":
+        return None
+    try:
+        value = int(text)
+    except ValueError:
+        return None
+    return value if value < _UNLIMITED else None
+
+
+def _cpu_max(text):
+    """cpu.max do v2: "200000 100000" -> 2.0 CPUs; "max 100000" -> None."""
+    if not text:
+        return None
+    quota, _, period = text.partition(" ")
+    if quota == "max":
+        return None
+    return int(quota) / int(period or 100000)
+
+
+def count_cpus(cpu_list):
+    """Quantidade de CPUs em uma lista do cpuset ("0-3,8" -> 5)."""
+    if not cpu_list:
+        return None
+    total = 0
+    for part in cpu_list.split(","):
+        start, _, end = part.partition("-")
+        total += int(end or start) - int(start) + 1
+    return total
+
+
+def read_limits(cgroup_file="/proc/self/cgroup", mountinfo_file="/proc/self/mountinfo"):
+    """Limites do cgroup do processo.
+
+    Retorna {"version", "memory", "memory_usage", "swap", "cpu_quota",
+    "cpuset"}; cada limite é None quando não há limite (ou fora do Linux).
+    `memory_usage` desconta o cache de arquivos inativo, como o docker stats.
+    """
+    limits = {
+        "version": None,
+        "memory": None,
+        "memory_usage": None,
+        "swap": None,
+        "cpu_quota": None,
+        "cpuset": None,
+    }
+    paths = _parse_cgroup(cgroup_file)
+    mounts = _parse_mountinfo(mountinfo_file)
+    if not paths or not mounts:
+        return limits
+
+    memory_v1 = _directories("memory", paths, mounts)
+    v2 = _directories("", paths, mounts)
+    if memory_v1:
+        limits["version"] = 1
+        limits["memory"] = _smallest(memory_v1, "memory.limit_in_bytes", _bytes_limit)
+        memsw = _smallest(memory_v1, "memory.memsw.limit_in_bytes", _bytes_limit)
+        if memsw is not None and limits["memory"] is not None:
+            # memsw é memória + swap
+            limits["swap"] = max(0, memsw - limits["memory"])
+        usage = _bytes_limit(_read(os.path.join(memory_v1[0], "memory.usage_in_bytes")))
+        stat_file = os.path.join(memory_v1[0], "memory.stat")
+        inactive_key = "total_inactive_file"
+    elif v2 and os.path.exists(os.path.join(v2[0], "memory.max")):
+        limits["version"] = 2
+        limits["memory"] = _smallest(v2, "memory.max", _bytes_limit)
+        limits["swap"] = _smallest(v2, "memory.swap.max", _bytes_limit)
+        usage = _bytes_limit(_read(os.path.join(v2[0], "memory.current")))
+        stat_file = os.path.join(v2[0], "memory.stat")
+        inactive_key = "inactive_file"
+    else:
+        usage = None
+
+    if usage is not None:
+        inactive = 0
+        for line in (_read(stat_file) or "").splitlines():
+            key, _, value = line.partition(" ")
+            if key == inactive_key:
+                inactive = int(value)
+        limits["memory_usage"] = max(0, usage - inactive)
+
+    cpu_v1 = _directories("cpu", paths, mounts)
+    if cpu_v1:
+        limits["version"] = limits["version"] or 1
+        quotas = []
+        for d in cpu_v1:
+            quota = _read(os.path.join(d, "cpu.cfs_quota_us"))
+            period = _read(os.path.join(d, "cpu.cfs_period_us"))
+            if quota and period and int(quota) > 0:
+                quotas.append(int(quota) / int(period))
+        limits["cpu_quota"] = min(quotas) if quotas else None
+    elif v2:
+        limits["cpu_quota"] = _smallest(v2, "cpu.max", _cpu_max)
+
+    cpuset_dirs = _directories("cpuset", paths, mounts) or v2
+    for d in cpuset_dirs:
+        cpus = count_cpus(
+            _read(os.path.join(d, "cpuset.effective_cpus"))
+            or _read(os.path.join(d, "cpuset.cpus.effective"))
+            or _read(os.path.join(d, "cpuset.cpus"))
+        )
+        if cpus:
+            limits["cpuset"] = cpus
+            break
+    return limits
+
+
+def get_limits():
+    """Limites do cgroup deste processo (lidos uma vez)."""
+    global _limits
+    if _limits is None:
+        _limits = read_limits()
+    return _limits
+
+
+def effective_memory() -> int:
+    """Memória total utilizável (bytes): a da máquina ou o limite do cgroup."""
+    total = psutil.virtual_memory().total
+    limit = get_limits()["memory"]
+    return min(total, limit) if limit else total
+
+
+def effective_available_memory() -> int:
+    """Memória disponível (bytes), descontando o que o cgroup já usa."""
+    available = psutil.virtual_memory().available
+    limits = get_limits()
+    if limits["memory"] and limits["memory_usage"] is not None:
+        return max(0, min(available, limits["memory"] - limits["memory_usage"]))
+    return available
+
+
+def effective_swap():
+    """Swap utilizável (bytes): a da máquina ou o limite do cgroup."""
+    total = psutil.swap_memory().total
+    limit = get_limits()["swap"]
+    return min(total, limit) if limit is not None else total
+
+
+def effective_cpus(affinity: int) -> int:
+    """CPUs utilizáveis: afinidade, cpuset e cota do cgroup (arredondada para cima)."""
+    limits = get_limits()
+    cpus = affinity
+    if limits["cpuset"]:
+        cpus = min(cpus, limits["cpuset"])
+    if limits["cpu_quota"]:
+        cpus = min(cpus, max(1, math.ceil(limits["cpu_quota"])))
+    return cpus
+
+
+def is_limited() -> bool:
+    """True se o cgroup limita a memória abaixo da memória da máquina."""
+    limit = get_limits()["memory"]
+    return bool(limit) and limit < psutil.virtual_memory().total
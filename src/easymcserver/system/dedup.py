@@ -0,0 +1,273 @@
+# Deduplicação de binários idênticos entre os diretórios de servidor
+#
+# server.jar, bedrock_server e as bibliotecas são iguais em todos os
+# servidores da mesma versão. Cópias idênticas viram reflinks (cópia sob
+# demanda, quando o sistema de arquivos suporta) ou hardlinks. O manifesto
+# guarda o que foi ligado e como, para que uma atualização quebre o vínculo
+# antes de escrever em um arquivo compartilhado.
+
+import fnmatch
+import json
+import os
+import shutil
+import stat
+import threading
+from rich.console import Console
+from easymcserver.downloader.cache import file_digest, get_cache_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+console = Console()
+
+# Arquivos que nunca são alterados pelo servidor em execução
+IMMUTABLE_PATTERNS = [
+    "server.jar",
+    "bedrock_server",
+    "bedrock_server.exe",
+    "fabric-server-launch.jar",
+    "libraries/*.jar",
+    "plugins/*.jar",
+    "mods/*.jar",
+]
+# Arquivos menores que isso não compensam
+MIN_SIZE = 64 * 1024
+DIGEST_ALGORITHM = "sha256"
+
+# ioctl(FICLONE) do Linux: o destino passa a compartilhar os blocos da origem
+_FICLONE = 0x40049409
+
+_manifest_lock = threading.Lock()
+
+
+def _manifest_path():
+    return get_cache_dir() / "dedup.json"
+
+
+def load_manifest():
+    """{caminho: {"digest", "size", "method"}} dos arquivos já deduplicados."""
+    try:
+        with open(_manifest_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_manifest(manifest):
+    path = _manifest_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, path)
+
+
+def is_immutable(rel_path: str) -> bool:
+    rel_path = rel_path.replace(os.sep, "/")
+    for pattern in IMMUTABLE_PATTERNS:
+        if "/" in pattern:
+            # libraries/*.jar vale para qualquer profundidade dentro de libraries/
+            top, name = pattern.split("/", 1)
+            if rel_path.startswith(top + "/") and fnmatch.fnmatch(
+                os.path.basename(rel_path), name
+            ):
+                return True
+        elif rel_path == pattern:
+            return True
+    return False
+
+
+def candidate_files(directory: str):
+    """Arquivos imutáveis do servidor em `directory` (caminhos absolutos)."""
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = [d for d in dirs if not os.path.islink(os.path.join(root, d))]
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                continue
+            if is_immutable(os.path.relpath(path, directory)):
+                yield path
+
+
+def _reflink(src: str, tmp: str) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as s, open(tmp, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        shutil.copystat(src, tmp)
+        return True
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+
+def _same_exec_bits(a: int, b: int) -> bool:
+    """Hardlink herda as permissões da cópia canônica: exige os mesmos bits de execução."""
+    return (a & 0o111) == (b & 0o111)
+
+
+def _replace_with_link(canonical: str, duplicate: str, mode: str, perms: int):
+    """Troca `duplicate` (permissões `perms`) por um vínculo com `canonical`.
+
+    O reflink é um inode novo e fica com as permissões do arquivo trocado.
+    Retorna o método usado.
+    """
+    tmp = duplicate + ".easymc-dedup"
+    method = None
+    if mode in ("auto", "reflink") and _reflink(canonical, tmp):
+        os.chmod(tmp, perms)
+        method = "reflink"
+    elif mode in ("auto", "hardlink") and _same_exec_bits(
+        stat.S_IMODE(os.stat(canonical).st_mode), perms
+    ):
+        try:
+            os.link(canonical, tmp)
+            method = "hardlink"
+        except OSError:
+            pass
+    if method:
+        # Troca atômica: o servidor nunca vê o arquivo ausente ou pela metade
+        os.replace(tmp, duplicate)
+    return method
+
+
+def deduplicate(directories, mode: str = "auto", dry_run: bool = False):
+    """Liga arquivos imutáveis idênticos entre os diretórios de servidor.
+
+    `mode`: "auto" (reflink e, se não der, hardlink), "reflink" ou "hardlink".
+    Só arquivos com o mesmo tamanho e sistema de arquivos são comparados por
+    hash; as permissões não entram na comparação (ver _replace_with_link).
+    Retorna (bytes recuperados, arquivos ligados).
+    """
+    by_key = {}
+    for directory in directories:
+        for path in candidate_files(directory):
+            st = os.stat(path)
+            if st.st_size < MIN_SIZE:
+                continue
+            by_key.setdefault((st.st_dev, st.st_size), []).append((path, st))
+
+    manifest = load_manifest()
+    reclaimed = 0
+    linked = 0
+    for (_, size), files in by_key.items():
+        # Mesmo inode = já são o mesmo arquivo
+        inodes = {}
+        for path, st in files:
+            inodes.setdefault(st.st_ino, (st, []))[1].append(path)
+        if len(inodes) < 2:
+            continue
+
+        by_digest = {}
+        for st, paths in inodes.values():
+            digest = file_digest(paths[0], DIGEST_ALGORITHM)
+            by_digest.setdefault(digest, []).append((st, paths))
+
+        for digest, groups in by_digest.items():
+            if len(groups) < 2:
+                continue
+            # O inode com mais nomes (inclusive fora dos servidores, como o
+            # cache) vira a cópia canônica: menos trocas, mais espaço liberado
+            groups.sort(key=lambda g: (g[0].st_nlink, len(g[1])), reverse=True)
+            canonical_st, (canonical, *_) = groups[0]
+            canonical_perms = stat.S_IMODE(canonical_st.st_mode)
+            for st, paths in groups[1:]:
+                perms = stat.S_IMODE(st.st_mode)
+                if (
+                    dry_run
+                    and mode == "hardlink"
+                    and not _same_exec_bits(canonical_perms, perms)
+                ):
+                    continue
+                replaced = 0
+                for path in paths:
+                    if not dry_run:
+                        method = _replace_with_link(canonical, path, mode, perms)
+                        if not method:
+                            continue
+                        manifest[path] = {
+                            "digest": digest,
+                            "size": size,
+                            "method": method,
+                        }
+                    replaced += 1
+                linked += replaced
+                # O inode só é liberado quando todos os nomes dele são trocados;
+                # hardlinks fora dos diretórios (cache, snapshots) o mantêm
+                if replaced == len(paths) == st.st_nlink:
+                    reclaimed += size
+            if not dry_run:
+                manifest.setdefault(
+                    canonical, {"digest": digest, "size": size, "method": "canonical"}
+                )
+
+    if not dry_run:
+        with _manifest_lock:
+            current = load_manifest()
+            current.update(manifest)
+            _save_manifest(current)
+    return reclaimed, linked
+
+
+def break_links(directory: str) -> int:
+    """Dá a `directory` cópias próprias dos arquivos hardlinkados.
+
+    Deve ser chamado antes de qualquer rotina que possa escrever em um desses
+    arquivos no lugar (instaladores, atualizações), para que a escrita não
+    altere os outros servidores. Reflinks já são cópia sob demanda e ficam
+    como estão. Retorna quantos arquivos foram separados.
+    """
+    directory = os.path.abspath(directory)
+    with _manifest_lock:
+        manifest = load_manifest()
+        paths = [p for p in manifest if p.startswith(directory + os.sep)]
+        broken = 0
+        for path in paths:
+            entry = manifest.pop(path)
+            if entry["method"] == "reflink" or not os.path.isfile(path):
+                continue
+            if os.stat(path).st_nlink > 1:
+                tmp = path + ".easymc-dedup"
+                shutil.copy2(path, tmp)
+                os.replace(tmp, path)
+                broken += 1
+        if paths:
+            _save_manifest(manifest)
+    return broken
+
+
+def run_dedup(directories=None, mode: str = "auto", dry_run: bool = False) -> bool:
+    """Deduplica os servidores registrados (ou `directories`) e mostra o resultado."""
+    if not directories:
+        # Importação local: o registro fica no pacote principal
+        from easymcserver.instances import list_instances
+
+        directories = list(list_instances())
+    directories = [os.path.abspath(d) for d in directories if os.path.isdir(d)]
+    if not directories:
+        console.print(
+            "[bold yellow][AVISO][/bold yellow] Nenhum servidor registrado para deduplicar."
+        )
+        return False
+
+    console.print(
+        f"[cyan]Procurando arquivos idênticos em {len(directories)} servidor(es)...[/cyan]"
+    )
+    try:
+        reclaimed, linked = deduplicate(directories, mode, dry_run)
+    except OSError as e:
+        console.print(f"[bold red][ERRO][/bold red] Falha na deduplicação: {e}")
+        return False
+
+    if dry_run:
+        summary = f"{linked} arquivo(s) seriam ligados, {reclaimed / 1024**2:.1f} MB seriam recuperados."
+    else:
+        summary = (
+            f"{linked} arquivo(s) ligados, {reclaimed / 1024**2:.1f} MB recuperados."
+        )
+    console.print(f"[bold green][OK][/bold green] {summary}")
+    return True
@@ -0,0 +1,501 @@
+# Planejamento de memória: quanto a JVM usa de verdade para um dado Xmx
+#
+# O processo do servidor ocupa bem mais que o Xmx: metaspace (classes),
+# code cache (JIT), pilhas das threads, buffers diretos da rede, estruturas
+# do coletor de lixo e memória interna da JVM. Além disso, o sistema
+# operacional precisa de cache de páginas para os arquivos do mundo, e outros
+# servidores da mesma máquina já ocupam parte da memória. O planejador soma
+# tudo isso, recusa configurações que levariam a swap (ou ao OOM killer num
+# contêiner) e recomenda Xmx/Xms. Os valores padrão do modelo podem ser
+# substituídos por uma medição real do NMT (system/nmt.py).
+
+import json
+import os
+import psutil
+from rich.console import Console
+from rich.table import Table
+from easymcserver.system.cgroup import effective_memory, effective_swap, is_limited
+from easymcserver.system.jdk import jdk_for_server
+from easymcserver.system.nmt import committed, parse_nmt_summary, read_nmt_summary
+from easymcserver.system.sys_info import get_cpu_count
+
+console = Console()
+
+MB = 1024**2
+
+# Arquivo no diretório do servidor com a calibração medida pelo NMT
+CALIBRATION_FILE = ".easymc-footprint.json"
+
+# Estimativas padrão (MB) do que fica fora do heap
+METASPACE_MB = {"vanilla": 96, "modded": 320}
+METASPACE_PER_JAR_MB = 1.5
+CODE_CACHE_MB = 128
+# Parte da pilha de cada thread que chega a ser usada (a reserva é 1 MB)
+THREAD_STACK_MB = 0.5
+BASE_THREADS = 40
+DIRECT_MEMORY_MB = 64
+DIRECT_MEMORY_PER_PLAYER_MB = 0.5
+JVM_INTERNAL_MB = 64
+# Estruturas do coletor (remembered sets, card table, bitmaps) em fração do heap (JDK 18+)
+GC_OVERHEAD = {
+    "g1": 0.05,
+    "parallel": 0.03,
+    "serial": 0.02,
+    "shenandoah": 0.04,
+    "zgc": 0.03,
+    "zgc-gen": 0.05,
+}
+# Antes do JDK 18 os remembered sets do G1 ocupavam bem mais memória nativa
+G1_LEGACY_OVERHEAD = 0.08
+G1_COMPACT_FEATURE = 18
+# Antes do JDK 16 (metaspace elástico, JEP 387) o metaspace fragmenta mais
+METASPACE_LEGACY_FACTOR = 1.25
+METASPACE_ELASTIC_FEATURE = 16
+# Memória nativa que o NMT não enxerga (fragmentação do malloc, bibliotecas)
+NATIVE_SLACK = 0.10
+
+# Fora de contêiner, o sistema e os outros programas também precisam de memória
+OS_RESERVE_MB = 768
+# Cache de páginas desejável para os arquivos do mundo (fração do tamanho)
+PAGE_CACHE_FRACTION = 0.25
+PAGE_CACHE_MIN_MB = 256
+PAGE_CACHE_MAX_MB = 2048
+# Passo das recomendações de Xmx
+XMX_STEP_MB = 256
+
+
+# --- Servidor -------------------------------------------------------------
+
+
+def _active_flags(directory):
+    # Importação local: config depende de system
+    from easymcserver.config.jvm_flags import load_jvm_args
+
+    model = load_jvm_args(directory)
+    return model.active_args() if model else []
+
+
+def detect_gc(directory: str, java_feature: int = 21) -> str:
+    """Coletor ativo no jvm_args.txt do servidor (padrão: G1)."""
+    flags = _active_flags(directory)
+    if "-XX:+UseZGC" in flags:
+        # O ZGC geracional é o padrão a partir do JDK 23
+        if "-XX:+ZGenerational" in flags or java_feature >= 23:
+            return "zgc-gen"
+        return "zgc"
+    for flag, gc in (
+        ("-XX:+UseShenandoahGC", "shenandoah"),
+        ("-XX:+UseParallelGC", "parallel"),
+        ("-XX:+UseSerialGC", "serial"),
+    ):
+        if flag in flags:
+            return gc
+    return "g1"
+
+
+def _count_jars(directory):
+    total = 0
+    for folder in ("mods", "plugins"):
+        try:
+            total += sum(
+                n.endswith(".jar") for n in os.listdir(os.path.join(directory, folder))
+            )
+        except OSError:
+            pass
+    return total
+
+
+def _max_players(directory):
+    try:
+        with open(
+            os.path.join(directory, "server.properties"), "r", encoding="utf-8"
+        ) as f:
+            for line in f:
+                if line.startswith("max-players="):
+                    return int(line.split("=", 1)[1])
+    except (OSError, ValueError):
+        pass
+    return 20
+
+
+def world_size(directory: str) -> int:
+    """Tamanho (bytes) das pastas de mundo (as que têm level.dat)."""
+    total = 0
+    try:
+        entries = os.listdir(directory)
+    except OSError:
+        return 0
+    for entry in entries:
+        world = os.path.join(directory, entry)
+        if not os.path.isfile(os.path.join(world, "level.dat")):
+            continue
+        for root, _, names in os.walk(world):
+            for name in names:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+    return total
+
+
+def other_instances_usage(exclude: str = None):
+    """Memória (bytes) usada pelos outros servidores registrados em execução.
+
+    Só contam a JVM e o bedrock_server: shells, editores e `tail -f` com o
+    diretório do servidor como cwd não são o servidor. Usa o PSS quando
+    possível: o ZGC mapeia o heap mais de uma vez e o RSS contaria a mesma
+    memória várias vezes.
+    """
+    # Importação local: o registro fica no pacote principal
+    from easymcserver.instances import list_instances
+
+    directories = [
+        d
+        for d in list_instances()
+        if not exclude or os.path.abspath(d) != os.path.abspath(exclude)
+    ]
+    if not directories:
+        return 0, []
+    total = 0
+    running = []
+    for process in psutil.process_iter(["pid", "name", "cwd"]):
+        cwd = process.info.get("cwd")
+        name = (process.info.get("name") or "").lower()
+        if not cwd or not ("java" in name or name.startswith("bedrock_server")):
+            continue
+        directory = next(
+            (d for d in directories if cwd == d or cwd.startswith(d + os.sep)), None
+        )
+        if not directory:
+            continue
+        try:
+            try:
+                used = process.memory_full_info().pss
+            except (psutil.AccessDenied, AttributeError):
+                used = process.memory_info().rss
+        except psutil.NoSuchProcess:
+            continue
+        total += used
+        running.append((directory, process.info["pid"], used))
+    return total, running
+
+
+# --- Calibração -----------------------------------------------------------
+
+# Categorias do NMT que já têm um item próprio no modelo
+_MODELED_CATEGORIES = (
+    "Java Heap",
+    "Class",
+    "Metaspace",
+    "Code",
+    "Thread",
+    "GC",
+    "Other",
+)
+
+
+def calibration_from_nmt(summary, xmx_mb: int):
+    """Valores do modelo medidos em um servidor real (resumo do NMT)."""
+    threads = summary["threads"] or 1
+    return {
+        "xmx_mb": xmx_mb,
+        "metaspace_mb": committed(summary, "Class", "Metaspace") / MB,
+        "code_mb": committed(summary, "Code") / MB,
+        "thread_mb": committed(summary, "Thread") / MB / threads,
+        "threads": threads,
+        "gc_ratio": committed(summary, "GC") / MB / xmx_mb,
+        "direct_mb": committed(summary, "Other") / MB,
+        # Demais categorias: símbolos, compilador, arenas, o próprio NMT...
+        "internal_mb": sum(
+            v["committed"]
+            for name, v in summary["categories"].items()
+            if name not in _MODELED_CATEGORIES
+        )
+        / MB,
+    }
+
+
+def load_calibration(directory: str):
+    try:
+        with open(
+            os.path.join(directory, CALIBRATION_FILE), "r", encoding="utf-8"
+        ) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def calibrate(directory: str, nmt_text: str, xmx_mb: int):
+    """Grava a calibração do servidor a partir da saída do NMT. Retorna None se inválida."""
+    summary = parse_nmt_summary(nmt_text)
+    if not summary:
+        return None
+    calibration = calibration_from_nmt(summary, xmx_mb)
+    with open(os.path.join(directory, CALIBRATION_FILE), "w", encoding="utf-8") as f:
+        json.dump(calibration, f, indent=2)
+    return calibration
+
+
+# --- Estimativa -----------------------------------------------------------
+
+
+def estimate_footprint(
+    xmx_mb: int,
+    gc: str = "g1",
+    java_feature: int = 21,
+    jars: int = 0,
+    max_players: int = 20,
+    cpus: int = None,
+    calibration=None,
+):
+    """Memória estimada (MB) de cada parte do processo da JVM para `xmx_mb`.
+
+    Retorna um dicionário com as partes, o "total" (memória física) e o
+    "reported_rss" (o que top/ps mostram: com o ZGC não geracional o heap
+    aparece três vezes, embora ocupe a memória física uma vez só).
+    `java_feature` ajusta o G1 (mais caro antes do JDK 18) e o metaspace
+    (mais fragmentado antes do JDK 16) quando não há calibração.
+    """
+    cpus = cpus or get_cpu_count()
+    if calibration:
+        threads = calibration["threads"]
+        parts = {
+            "heap": xmx_mb,
+            "metaspace": calibration["metaspace_mb"],
+            "code_cache": calibration["code_mb"],
+            "threads": calibration["thread_mb"] * threads,
+            "gc": calibration["gc_ratio"] * xmx_mb,
+            "direct": calibration["direct_mb"],
+            "jvm_internal": calibration["internal_mb"],
+        }
+    else:
+        modded = "modded" if jars else "vanilla"
+        # Threads de GC e do JIT, e as da rede (Netty usa 2 por CPU)
+        threads = BASE_THREADS + 3 * cpus
+        metaspace = METASPACE_MB[modded] + METASPACE_PER_JAR_MB * jars
+        if java_feature < METASPACE_ELASTIC_FEATURE:
+            metaspace *= METASPACE_LEGACY_FACTOR
+        gc_ratio = GC_OVERHEAD.get(gc, GC_OVERHEAD["g1"])
+        if gc == "g1" and java_feature < G1_COMPACT_FEATURE:
+            gc_ratio = G1_LEGACY_OVERHEAD
+        parts = {
+            "heap": xmx_mb,
+            "metaspace": metaspace,
+            "code_cache": CODE_CACHE_MB,
+            "threads": THREAD_STACK_MB * threads,
+            "gc": gc_ratio * xmx_mb,
+            "direct": DIRECT_MEMORY_MB + DIRECT_MEMORY_PER_PLAYER_MB * max_players,
+            "jvm_internal": JVM_INTERNAL_MB,
+        }
+    native = sum(v for k, v in parts.items() if k != "heap")
+    parts["native_slack"] = native * NATIVE_SLACK
+    parts["total"] = sum(parts.values())
+    multi_mapped = 2 * xmx_mb if gc == "zgc" else 0
+    parts["reported_rss"] = parts["total"] + multi_mapped
+    return parts
+
+
+def page_cache_reserve(directory: str) -> float:
+    """Cache de páginas (MB) recomendado para os arquivos do mundo."""
+    wanted = world_size(directory) / MB * PAGE_CACHE_FRACTION
+    return min(PAGE_CACHE_MAX_MB, max(PAGE_CACHE_MIN_MB, wanted))
+
+
+def plan_memory(
+    directory: str,
+    xmx_mb: int = None,
+    gc: str = None,
+    java_feature: int = 21,
+    calibration=None,
+):
+    """Planeja a memória do servidor em `directory`.
+
+    Retorna {"estimate", "budget", "hard_budget", "page_cache", "others",
+    "fits", "swaps", "recommended_xmx_mb", ...}. `hard_budget` é o máximo
+    antes de swap/OOM; `budget` também deixa o cache de páginas do mundo.
+    """
+    gc = gc or detect_gc(directory, java_feature)
+    if calibration is None:
+        calibration = load_calibration(directory)
+    jars = _count_jars(directory)
+    players = _max_players(directory)
+    cpus = get_cpu_count()
+
+    others, running = other_instances_usage(exclude=directory)
+    total = effective_memory() / MB
+    os_reserve = 0 if is_limited() else OS_RESERVE_MB
+    hard_budget = total - os_reserve - others / MB
+    page_cache = page_cache_reserve(directory)
+    budget = hard_budget - page_cache
+
+    def estimate(xmx):
+        return estimate_footprint(
+            xmx, gc, java_feature, jars, players, cpus, calibration
+        )
+
+    # Maior Xmx (em passos) que ainda deixa o cache de páginas livre
+    recommended = 0
+    xmx = XMX_STEP_MB
+    while estimate(xmx)["total"] <= budget:
+        recommended = xmx
+        xmx += XMX_STEP_MB
+
+    plan = {
+        "gc": gc,
+        "memory_total_mb": total,
+        "os_reserve_mb": os_reserve,
+        "others_mb": others / MB,
+        "others_running": running,
+        "page_cache_mb": page_cache,
+        "hard_budget_mb": hard_budget,
+        "budget_mb": budget,
+        "swap_mb": effective_swap() / MB,
+        "calibrated": bool(calibration),
+        "recommended_xmx_mb": recommended,
+        # Servidor com AlwaysPreTouch: Xms = Xmx evita redimensionar o heap
+        "recommended_xms_mb": recommended,
+    }
+    if xmx_mb:
+        plan["estimate"] = estimate(xmx_mb)
+        plan["swaps"] = plan["estimate"]["total"] > hard_budget
+        plan["fits"] = plan["estimate"]["total"] <= budget
+    return plan
+
+
+def _mb(value):
+    return f"{value:,.0f} MB"
+
+
+def format_size(mb: int) -> str:
+    """Tamanho no formato do -Xmx: 4096 -> "4G", 3328 -> "3328M"."""
+    return f"{mb // 1024}G" if mb % 1024 == 0 else f"{mb}M"
+
+
+def check_xmx(
+    directory: str, xmx_mb: int, gc: str = None, java_feature: int = 21, plan=None
+):
+    """Avisa sobre o Xmx e retorna False se ele levaria a swap (ou OOM)."""
+    plan = plan or plan_memory(directory, xmx_mb, gc, java_feature)
+    estimate = plan["estimate"]
+    if plan["swaps"]:
+        consequence = (
+            "o processo seria encerrado pelo OOM killer"
+            if plan["swap_mb"] == 0
+            else "o sistema passaria a usar swap"
+        )
+        console.print(
+            f"[bold red][ERRO][/bold red] Com Xmx {format_size(xmx_mb)} a JVM usaria cerca de "
+            f"[cyan]{_mb(estimate['total'])}[/cyan], mas só há [cyan]{_mb(plan['hard_budget_mb'])}[/cyan] "
+            f"livres: {consequence}. Xmx recomendado: [cyan]{format_size(plan['recommended_xmx_mb'])}[/cyan]."
+        )
+        return False
+    if not plan["fits"]:
+        console.print(
+            f"[bold yellow][AVISO][/bold yellow] Com Xmx {format_size(xmx_mb)} sobra pouco cache de "
+            f"páginas para o mundo (recomendado: {_mb(plan['page_cache_mb'])}). "
+            f"Xmx recomendado: {format_size(plan['recommended_xmx_mb'])}."
+        )
+    return True
+
+
+def run_plan(
+    directory: str,
+    xmx: str = None,
+    gc: str = None,
+    java_version=None,
+    nmt_file: str = None,
+    pid: int = None,
+) -> bool:
+    """Mostra o plano de memória do servidor (e calibra pelo NMT, se pedido)."""
+    # Importação local: config depende de system
+    from easymcserver.config.jvm_profile import java_feature, memory_to_mb, script_xmx
+
+    if java_version is None:
+        jdk = jdk_for_server(directory, quiet=True)
+        feature = jdk["feature"] if jdk else 21
+    else:
+        feature = java_feature(java_version)
+    xmx = xmx or script_xmx(directory)
+    try:
+        xmx_mb = memory_to_mb(xmx) if xmx else None
+    except ValueError as e:
+        console.print(f"[bold red][ERRO][/bold red] {e}")
+        return False
+
+    if nmt_file or pid:
+        if not xmx_mb:
+            console.print(
+                "[bold red][ERRO][/bold red] Informe o Xmx com que o resumo do NMT foi medido (--xmx)."
+            )
+            return False
+        if pid:
+            text = read_nmt_summary(pid)
+        else:
+            try:
+                with open(nmt_file, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except OSError as e:
+                console.print(f"[bold red][ERRO][/bold red] {e}")
+                return False
+        if not text or not calibrate(directory, text, xmx_mb):
+            console.print(
+                "[bold red][ERRO][/bold red] Resumo do NMT inválido. Inicie o servidor com "
+                "-XX:NativeMemoryTracking=summary e use jcmd <pid> VM.native_memory summary."
+            )
+            return False
+        console.print(
+            "[bold green][OK][/bold green] Modelo calibrado com a medição do NMT."
+        )
+
+    plan = plan_memory(directory, xmx_mb, gc, feature)
+    table = Table(
+        title=f"Memória — GC {plan['gc']}, Java {feature}"
+        + (" (calibrado pelo NMT)" if plan["calibrated"] else "")
+    )
+    table.add_column("Item", style="cyan")
+    table.add_column("MB", justify="right")
+    table.add_row("Memória utilizável", _mb(plan["memory_total_mb"]))
+    if plan["os_reserve_mb"]:
+        table.add_row("Reserva do sistema", f"-{_mb(plan['os_reserve_mb'])}")
+    for directory_, pid_, used in plan["others_running"]:
+        table.add_row(
+            f"Servidor {os.path.basename(directory_)} (pid {pid_})",
+            f"-{_mb(used / MB)}",
+        )
+    table.add_row("Cache de páginas do mundo", f"-{_mb(plan['page_cache_mb'])}")
+    table.add_row("[bold]Disponível para a JVM[/bold]", _mb(plan["budget_mb"]))
+    if "estimate" in plan:
+        labels = {
+            "heap": "Heap (Xmx)",
+            "metaspace": "Metaspace (classes)",
+            "code_cache": "Code cache (JIT)",
+            "threads": "Pilhas das threads",
+            "gc": "Estruturas do GC",
+            "direct": "Buffers diretos (rede)",
+            "jvm_internal": "Interno da JVM",
+            "native_slack": "Nativo não rastreado",
+        }
+        table.add_section()
+        for key, label in labels.items():
+            table.add_row(label, _mb(plan["estimate"][key]))
+        table.add_row("[bold]Total estimado[/bold]", _mb(plan["estimate"]["total"]))
+        if plan["estimate"]["reported_rss"] != plan["estimate"]["total"]:
+            table.add_row(
+                "RSS mostrado por top/ps (ZGC mapeia o heap 3 vezes)",
+                _mb(plan["estimate"]["reported_rss"]),
+            )
+    console.print(table)
+
+    recommended = plan["recommended_xmx_mb"]
+    if recommended:
+        console.print(
+            f"Recomendado: [cyan]-Xmx{format_size(recommended)} -Xms{format_size(plan['recommended_xms_mb'])}[/cyan]"
+        )
+    else:
+        console.print(
+            "[bold red][ERRO][/bold red] Não há memória livre suficiente para um servidor nesta máquina."
+        )
+        return False
+    if xmx_mb:
+        return check_xmx(directory, xmx_mb, plan=plan)
+    return True
@@ -0,0 +1,398 @@
+# Páginas grandes (huge pages) para o heap da JVM
+#
+# Com páginas de 2 MB (ou 1 GB) no lugar das de 4 KB, um heap de 8-16 GB
+# precisa de milhares de entradas na TLB em vez de milhões, e o servidor
+# perde menos tempo com falhas de TLB. Há dois caminhos no Linux:
+#   - páginas explícitas (hugetlbfs): reservadas pelo administrador em
+#     vm.nr_hugepages; a JVM usa com -XX:+UseLargePages. Garantidas, mas
+#     a memória reservada fica indisponível para o resto do sistema;
+#   - Transparent Huge Pages (THP): o kernel junta páginas sozinho; a JVM
+#     pede com -XX:+UseTransparentHugePages (modos "always" e "madvise").
+# Nenhuma das duas é garantida só pela flag: sem páginas livres a JVM segue
+# com páginas de 4 KB, por isso a verificação depois do boot lê o log
+# -Xlog:pagesize e o /proc/<pid>/smaps do heap.
+
+import math
+import os
+import re
+from rich.console import Console
+from rich.table import Table
+from easymcserver.config.jvm_flags import (
+    JVM_ARGS_FILE,
+    load_jvm_args,
+    print_problems,
+    validate_jvm_args,
+)
+from easymcserver.config.launch import refresh_start_script
+from easymcserver.system.jdk import jdk_for_server
+from easymcserver.system.nmt import find_server_pid
+from easymcserver.system.sys_info import get_thp_mode
+
+console = Console()
+
+THP_DIR = "/sys/kernel/mm/transparent_hugepage"
+HUGEPAGES_DIR = "/sys/kernel/mm/hugepages"
+# Log de tamanho de página da JVM (Java 9+), lido pela verificação
+PAGESIZE_LOG = "logs/pagesize.log"
+PAGESIZE_LOG_FLAG = f"-Xlog:pagesize:file={PAGESIZE_LOG}"
+# Opções que escolhem o tipo de página; só a recomendada fica ativa
+LARGE_PAGE_OPTIONS = (
+    "UseLargePages",
+    "UseTransparentHugePages",
+    "LargePageSizeInBytes",
+)
+# -XX:LargePageSizeInBytes só escolhe um tamanho diferente do padrão do kernel a partir do JDK 17
+PAGE_SIZE_FEATURE = 17
+# Páginas base do kernel (x86_64/arm64 com 4 KB)
+BASE_PAGE_KB = 4
+# Parte do heap em THP para considerar que o kernel atendeu o pedido
+MIN_THP_COVERAGE = 0.5
+
+_POOL_RE = re.compile(r"^hugepages-(\d+)kB$")
+_HEAP_PAGESIZE_RE = re.compile(r"Heap:.*?page_size=(\d+)([KMG])", re.IGNORECASE)
+_SIZE_UNITS = {"K": 1, "M": 1024, "G": 1024**2}
+
+
+def _read(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _bracketed(text):
+    """Valor ativo de um arquivo do sysfs no formato "always [madvise] never"."""
+    match = re.search(r"\[([^\]]+)\]", text or "")
+    return match.group(1) if match else None
+
+
+def default_hugepage_kb():
+    """Tamanho padrão das páginas explícitas (Hugepagesize do /proc/meminfo)."""
+    for line in (_read("/proc/meminfo") or "").splitlines():
+        if line.startswith("Hugepagesize:"):
+            return int(line.split()[1])
+    return None
+
+
+def hugetlb_pools():
+    """Reservas de páginas explícitas por tamanho: [{size_kb, total, free, reserved}]."""
+    pools = []
+    try:
+        names = os.listdir(HUGEPAGES_DIR)
+    except OSError:
+        return pools
+    for name in names:
+        match = _POOL_RE.match(name)
+        if not match:
+            continue
+        values = {}
+        for key, filename in (
+            ("total", "nr_hugepages"),
+            ("free", "free_hugepages"),
+            ("reserved", "resv_hugepages"),
+        ):
+            text = _read(os.path.join(HUGEPAGES_DIR, name, filename))
+            values[key] = int(text) if text and text.isdigit() else 0
+        pools.append({"size_kb": int(match.group(1)), **values})
+    return sorted(pools, key=lambda p: p["size_kb"])
+
+
+def memlock_limit():
+    """Limite de memória travada (ulimit -l) em bytes; None se ilimitado ou desconhecido."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    soft, _ = resource.getrlimit(resource.RLIMIT_MEMLOCK)
+    return None if soft == resource.RLIM_INFINITY else soft
+
+
+def detect_hugepages():
+    """Estado das páginas grandes da máquina."""
+    size = _read(os.path.join(THP_DIR, "hpage_pmd_size"))
+    return {
+        "thp": get_thp_mode(),
+        "thp_defrag": _bracketed(_read(os.path.join(THP_DIR, "defrag"))),
+        "thp_size_kb": int(size) // 1024 if size and size.isdigit() else None,
+        "default_size_kb": default_hugepage_kb(),
+        "pools": hugetlb_pools(),
+        "memlock": memlock_limit(),
+    }
+
+
+def _size_flag(size_kb):
+    """Tamanho no formato das flags da JVM: 4K, 2M, 1G."""
+    if size_kb % 1024**2 == 0:
+        return f"{size_kb // 1024**2}G"
+    if size_kb % 1024 == 0:
+        return f"{size_kb // 1024}M"
+    return f"{size_kb}K"
+
+
+def recommend_large_pages(xmx_mb: int, info=None, feature: int = 17):
+    """Flags de páginas grandes para um heap de `xmx_mb`.
+
+    Retorna {"kind": "explicit" | "thp" | None, "flags": [...], "reason": str}.
+    Páginas explícitas só são recomendadas se a reserva livre couber o heap
+    inteiro; caso contrário, THP quando o kernel permite.
+    """
+    info = info or detect_hugepages()
+    default_kb = info.get("default_size_kb")
+    # Do maior tamanho para o menor: páginas de 1 GB poupam ainda mais a TLB
+    for pool in sorted(info.get("pools") or [], key=lambda p: -p["size_kb"]):
+        size_kb = pool["size_kb"]
+        if size_kb != default_kb and feature < PAGE_SIZE_FEATURE:
+            continue
+        needed = math.ceil(xmx_mb * 1024 / size_kb)
+        usable = pool["free"] - pool["reserved"]
+        if pool["total"] == 0 or usable < needed:
+            continue
+        flags = ["-XX:+UseLargePages"]
+        if size_kb != default_kb:
+            flags.append(f"-XX:LargePageSizeInBytes={_size_flag(size_kb)}")
+        return {
+            "kind": "explicit",
+            "flags": flags,
+            "reason": f"Heap em páginas explícitas de {_size_flag(size_kb)}B "
+            f"({usable} livres, {needed} necessárias): menos falhas de TLB",
+        }
+
+    if info.get("thp") in ("always", "madvise"):
+        return {
+            "kind": "thp",
+            "flags": ["-XX:+UseTransparentHugePages"],
+            "reason": f"Heap em páginas de 2 MB (THP do kernel em modo {info['thp']}): menos falhas de TLB",
+        }
+
+    size_kb = default_kb or 2048
+    needed = math.ceil(xmx_mb * 1024 / size_kb)
+    return {
+        "kind": None,
+        "flags": [],
+        "reason": f"THP {info.get('thp') or 'indisponível'} e sem páginas explícitas livres para o heap "
+        f"(reserve com: sysctl -w vm.nr_hugepages={needed})",
+    }
+
+
+def apply_large_pages(model, recommendation, feature: int):
+    """Troca as flags de página do jvm_args.txt (JvmArgsFile) pelas recomendadas."""
+    for flag in model.flags():
+        if any(name in LARGE_PAGE_OPTIONS for name, _, _ in flag.options):
+            flag.active = False
+    for flag in recommendation["flags"]:
+        model.add(flag, "memory")
+    if recommendation["flags"] and feature >= 9:
+        # Registra o tamanho de página que a JVM conseguiu de fato
+        model.add(PAGESIZE_LOG_FLAG, "others")
+    return model
+
+
+# --- Verificação ------------------------------------------------------------
+
+
+def _size_kb(number, unit):
+    return int(number) * _SIZE_UNITS[unit.upper()]
+
+
+def read_pagesize_log(directory: str):
+    """Página do heap (KB) e avisos do log -Xlog:pagesize, ou None sem log."""
+    text = _read(os.path.join(directory, PAGESIZE_LOG))
+    if text is None:
+        return None
+    heap_kb = None
+    warnings = []
+    for line in text.splitlines():
+        match = _HEAP_PAGESIZE_RE.search(line)
+        if match:
+            heap_kb = _size_kb(*match.groups())
+        elif "[warning]" in line:
+            warnings.append(line.split("]")[-1].strip())
+    return {"heap_page_kb": heap_kb, "warnings": warnings}
+
+
+def _parse_smaps(text):
+    """Blocos do /proc/<pid>/smaps: [{path, size_kb, rss_kb, ...}]."""
+    mappings = []
+    current = None
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        if re.match(r"^[0-9a-f]+-[0-9a-f]+$", parts[0]):
+            current = {"path": " ".join(parts[5:]), "fields": {}}
+            mappings.append(current)
+        elif current is not None and parts[0].endswith(":") and len(parts) >= 2:
+            if parts[1].isdigit():
+                current["fields"][parts[0][:-1]] = int(parts[1])
+    return mappings
+
+
+def heap_mapping(pid: int):
+    """Páginas do mapeamento do heap (o maior anônimo) no /proc/<pid>/smaps."""
+    text = _read(f"/proc/{pid}/smaps")
+    if not text:
+        return None
+    candidates = [
+        m
+        for m in _parse_smaps(text)
+        # Páginas explícitas aparecem como /anon_hugepage; o ZGC usa memfd:java_heap
+        if not m["path"] or "anon_hugepage" in m["path"] or "java_heap" in m["path"]
+    ]
+    if not candidates:
+        return None
+    heap = max(candidates, key=lambda m: m["fields"].get("Size", 0))
+    fields = heap["fields"]
+    return {
+        "size_kb": fields.get("Size", 0),
+        "rss_kb": fields.get("Rss", 0),
+        "page_kb": fields.get("KernelPageSize", BASE_PAGE_KB),
+        "thp_kb": fields.get("AnonHugePages", 0),
+        "hugetlb_kb": fields.get("Private_Hugetlb", 0)
+        + fields.get("Shared_Hugetlb", 0),
+    }
+
+
+def large_pages_in_use(mapping):
+    """ "explicit", "thp" ou None a partir do mapeamento do heap."""
+    if not mapping:
+        return None
+    if mapping["page_kb"] > BASE_PAGE_KB or mapping["hugetlb_kb"]:
+        return "explicit"
+    if mapping["rss_kb"] and mapping["thp_kb"] / mapping["rss_kb"] >= MIN_THP_COVERAGE:
+        return "thp"
+    return None
+
+
+def verify_large_pages(directory: str, pid: int = None) -> bool:
+    """Confere, com o servidor rodando, se o heap recebeu páginas grandes."""
+    pid = pid or find_server_pid(directory)
+    if not pid:
+        console.print(
+            "[bold red][ERRO][/bold red] Nenhum servidor Java em execução nesse diretório (use --pid)."
+        )
+        return False
+
+    log = read_pagesize_log(directory)
+    mapping = heap_mapping(pid)
+    kind = large_pages_in_use(mapping)
+
+    table = Table(title=f"Páginas do heap (PID {pid})")
+    table.add_column("Fonte", style="cyan")
+    table.add_column("Resultado")
+    if log and log["heap_page_kb"]:
+        table.add_row(
+            PAGESIZE_LOG, f"página do heap: {_size_flag(log['heap_page_kb'])}B"
+        )
+    if mapping:
+        detail = (
+            f"página {mapping['page_kb']} KB, {mapping['size_kb'] // 1024} MB mapeados"
+        )
+        if mapping["hugetlb_kb"]:
+            detail += f", {mapping['hugetlb_kb'] // 1024} MB em páginas explícitas"
+        if mapping["rss_kb"]:
+            detail += (
+                f", {mapping['thp_kb'] // 1024} de {mapping['rss_kb'] // 1024} MB "
+                "residentes em THP"
+            )
+        table.add_row(f"/proc/{pid}/smaps", detail)
+    console.print(table)
+    for warning in (log or {}).get("warnings", []):
+        console.print(f"[bold yellow][AVISO][/bold yellow] JVM: {warning}")
+
+    if kind == "explicit":
+        console.print(
+            "[bold green][OK][/bold green] O heap está em páginas explícitas."
+        )
+        return True
+    if kind == "thp":
+        console.print(
+            "[bold green][OK][/bold green] O heap está em Transparent Huge Pages."
+        )
+        return True
+    if mapping is None:
+        console.print(
+            f"[bold red][ERRO][/bold red] Não foi possível ler /proc/{pid}/smaps (permissão?)."
+        )
+        return False
+    console.print(
+        "[bold yellow][AVISO][/bold yellow] O heap está em páginas de 4 KB. Confira se há páginas livres "
+        "(easymc hugepages <diretório>) e se a flag está ativa no jvm_args.txt."
+    )
+    return False
+
+
+# --- Configuração -------------------------------------------------------------
+
+
+def _describe(info):
+    table = Table(title="Páginas grandes nesta máquina")
+    table.add_column("Item", style="cyan")
+    table.add_column("Valor")
+    thp = info["thp"] or "indisponível"
+    if info["thp_defrag"]:
+        thp += f" (defrag {info['thp_defrag']})"
+    table.add_row("Transparent Huge Pages", thp)
+    for pool in info["pools"]:
+        default = " (padrão)" if pool["size_kb"] == info["default_size_kb"] else ""
+        table.add_row(
+            f"Páginas de {_size_flag(pool['size_kb'])}B{default}",
+            f"{pool['total']} reservadas, {pool['free']} livres, {pool['reserved']} comprometidas",
+        )
+    memlock = info["memlock"]
+    table.add_row(
+        "memlock (ulimit -l, só usado com -XX:+UseSHM)",
+        "ilimitado" if memlock is None else f"{memlock // 1024} KB",
+    )
+    console.print(table)
+
+
+def configure_large_pages(directory: str, xmx: str = None, write: bool = True) -> bool:
+    """Mostra o estado das páginas grandes e grava a recomendação no jvm_args.txt."""
+    # Importação local: config/jvm_profile.py importa este módulo
+    from easymcserver.config.jvm_profile import memory_to_mb, script_xmx
+
+    xmx = xmx or script_xmx(directory)
+    if not xmx:
+        console.print(
+            "[bold red][ERRO][/bold red] Xmx não encontrado no script de inicialização. Informe-o (ex.: --xmx 8G)."
+        )
+        return False
+    try:
+        xmx_mb = memory_to_mb(xmx)
+    except ValueError as e:
+        console.print(f"[bold red][ERRO][/bold red] {e}")
+        return False
+    jdk = jdk_for_server(directory, quiet=True)
+    feature = jdk["feature"] if jdk else 17
+
+    info = detect_hugepages()
+    _describe(info)
+    recommendation = recommend_large_pages(xmx_mb, info, feature)
+    if recommendation["kind"]:
+        console.print(
+            f"[bold green][OK][/bold green] {' '.join(recommendation['flags'])}: {recommendation['reason']}."
+        )
+    else:
+        console.print(f"[bold yellow][AVISO][/bold yellow] {recommendation['reason']}.")
+    if not write:
+        return True
+
+    model = load_jvm_args(directory)
+    if model is None:
+        console.print(
+            f"[bold red][ERRO][/bold red] {JVM_ARGS_FILE} não encontrado em {directory}. "
+            "Gere-o pelo menu ou com easymc profile."
+        )
+        return False
+    apply_large_pages(model, recommendation, feature)
+    if not print_problems(validate_jvm_args(model, jdk, feature)):
+        return False
+    os.makedirs(os.path.join(directory, "logs"), exist_ok=True)
+    model.save(os.path.join(directory, JVM_ARGS_FILE))
+    refresh_start_script(directory)
+    console.print(
+        f"[bold green][OK][/bold green] {JVM_ARGS_FILE} atualizado. Depois de iniciar o servidor, "
+        "confira com: easymc hugepages <diretório> --verify"
+    )
+    return True
@@ -0,0 +1,385 @@
+# Descoberta de JDKs instalados e escolha do Java de cada servidor
+#
+# Procura o java no PATH, no JAVA_HOME, em /usr/lib/jvm (e equivalentes do
+# macOS/Windows) e nas instalações do SDKMAN. A versão vem do arquivo
+# `release` da instalação, sem iniciar uma JVM; só quando ele não existe o
+# `java -version` é executado. O resultado fica em cache no disco, com a
+# data de modificação do executável: atualizar o JDK invalida a entrada.
+#
+# Cada versão do Minecraft exige um Java mínimo (8 até a 1.16, 16 na 1.17,
+# 17 da 1.18 à 1.20.4 e 21 a partir da 1.20.5); modpacks antigos só rodam
+# no Java 8. O servidor usa o JDK instalado que atende à sua versão.
+
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import zipfile
+from rich.console import Console
+from easymcserver.downloader.cache import get_cache_dir
+
+console = Console()
+
+CACHE_FILE = "jdks.json"
+
+# (versão mínima do Minecraft, Java exigido), da mais nova para a mais antiga
+MC_JAVA_REQUIREMENTS = [
+    ((1, 20, 5), 21),
+    ((1, 18), 17),
+    ((1, 17), 16),
+    ((0,), 8),
+]
+# Versões do Minecraft que aceitam um Java mais novo que o exigido
+# (as anteriores, e seus modpacks, costumam quebrar fora do Java 8)
+NEWER_JAVA_OK_FEATURE = 16
+
+_JAVA_EXE = "java.exe" if os.name == "nt" else "java"
+# java version "1.8.0_392", openjdk version "21.0.2" 2024-01-16, openjdk 25 2025-09-16
+_VERSION_RE = re.compile(
+    r'(?:version\s+"|^\S+\s+)(\d+(?:[._]\d+)*)[^"\s]*', re.MULTILINE
+)
+_MC_VERSION_RE = re.compile(r"^(\d+)\.(\d+)(?:\.(\d+))?")
+
+_lock = threading.Lock()
+_memory_cache = {}
+
+
+def parse_version(text: str):
+    """Versão do Java em uma saída de `java -version` ou em JAVA_VERSION.
+
+    Retorna (feature, versão) — ("1.8.0_392" -> 8, "21.0.2" -> 21) — ou
+    (None, None) se não houver versão no texto.
+    """
+    if not text:
+        return None, None
+    text = text.strip()
+    match = _VERSION_RE.search(text) if not text[0].isdigit() else None
+    version = match.group(1) if match else text.strip('"').split()[0]
+    parts = re.split(r"[._+-]", version)
+    try:
+        feature = int(parts[1] if parts[0] == "1" and len(parts) > 1 else parts[0])
+    except ValueError:
+        return None, None
+    return feature, version
+
+
+def read_release(home: str) -> dict:
+    """Conteúdo do arquivo `release` de uma instalação do Java ({} se não houver)."""
+    values = {}
+    try:
+        with open(os.path.join(home, "release"), "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return values
+    for line in lines:
+        key, sep, value = line.partition("=")
+        if sep:
+            values[key.strip()] = value.strip().strip('"')
+    return values
+
+
+def java_home(java: str) -> str:
+    """Diretório da instalação a partir do executável (bin/java)."""
+    home = os.path.dirname(os.path.dirname(os.path.realpath(java)))
+    # No Java 8 o java pode ser o do JRE embutido (jdk/jre/bin/java)
+    if os.path.basename(home) == "jre" and not os.path.exists(
+        os.path.join(home, "release")
+    ):
+        home = os.path.dirname(home)
+    return home
+
+
+def _probe(java: str, home: str):
+    """Descreve o JDK lendo o `release` ou, sem ele, executando o java."""
+    release = read_release(home)
+    feature, version = parse_version(release.get("JAVA_VERSION", ""))
+    if feature:
+        return {
+            "feature": feature,
+            "version": version,
+            "runtime": release.get("JAVA_RUNTIME_VERSION", version),
+            "vendor": release.get("IMPLEMENTOR", ""),
+            "arch": release.get("OS_ARCH", ""),
+        }
+    try:
+        result = subprocess.run(
+            [java, "-version"], capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    # A saída de java -version vai para stderr
+    output = result.stderr or result.stdout
+    feature, version = parse_version(output)
+    if result.returncode != 0 or not feature:
+        return None
+    return {
+        "feature": feature,
+        "version": version,
+        "runtime": version,
+        "vendor": output.splitlines()[0].split()[0],
+        "arch": "",
+    }
+
+
+def _cache_path():
+    return get_cache_dir() / CACHE_FILE
+
+
+def _load_cache():
+    try:
+        with open(_cache_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_cache(entries):
+    path = _cache_path()
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _stamp(path: str, home: str):
+    """Identifica a versão instalada: executável e `release` (mtime e tamanho)."""
+    stamp = []
+    for file in (path, os.path.join(home, "release")):
+        try:
+            st = os.stat(file)
+            stamp.append([st.st_mtime_ns, st.st_size])
+        except OSError:
+            stamp.append(None)
+    return stamp
+
+
+def describe_jdk(java: str):
+    """Informações do JDK de um executável do java (ou None se não for válido).
+
+    Retorna {"java", "home", "feature", "version", "runtime", "vendor",
+    "arch"}. O resultado fica em cache pelo caminho real do executável.
+    """
+    resolved = shutil.which(java) if not os.path.isabs(java) else java
+    if not resolved or not os.path.isfile(resolved):
+        return None
+    real = os.path.realpath(resolved)
+    home = java_home(real)
+    stamp = _stamp(real, home)
+    with _lock:
+        cached = _memory_cache.get(real)
+        if cached and cached["stamp"] == stamp:
+            return dict(cached["info"], java=resolved)
+        entries = _load_cache()
+        entry = entries.get(real)
+        if not entry or entry.get("stamp") != stamp:
+            info = _probe(real, home)
+            if not info:
+                return None
+            entry = {"stamp": stamp, "info": dict(info, home=home)}
+            entries[real] = entry
+            _save_cache(entries)
+        _memory_cache[real] = entry
+    return dict(entry["info"], java=resolved)
+
+
+def _candidates():
+    """Executáveis do java nos lugares onde os JDKs costumam ser instalados."""
+    paths = []
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if directory:
+            paths.append(os.path.join(directory, _JAVA_EXE))
+    if os.environ.get("JAVA_HOME"):
+        paths.append(os.path.join(os.environ["JAVA_HOME"], "bin", _JAVA_EXE))
+
+    sdkman = os.environ.get("SDKMAN_DIR", os.path.expanduser("~/.sdkman"))
+    patterns = [
+        "/usr/lib/jvm/*",
+        "/usr/java/*",
+        "/opt/java/*",
+        "/opt/jdk*",
+        "/Library/Java/JavaVirtualMachines/*/Contents/Home",
+        os.path.expanduser("~/.jdks/*"),
+        os.path.join(sdkman, "candidates", "java", "*"),
+    ]
+    if os.name == "nt":
+        for root in (os.environ.get("ProgramFiles"), os.environ.get("ProgramW6432")):
+            if root:
+                for vendor in ("Java", "Eclipse Adoptium", "Microsoft", "Zulu"):
+                    patterns.append(os.path.join(root, vendor, "*"))
+    for pattern in patterns:
+        for home in sorted(glob.glob(pattern)):
+            paths.append(os.path.join(home, "bin", _JAVA_EXE))
+    return [p for p in paths if os.path.isfile(p) and os.access(p, os.X_OK)]
+
+
+def discover_jdks():
+    """JDKs instalados, sem repetição, do Java mais novo para o mais antigo."""
+    found = {}
+    for java in _candidates():
+        real = os.path.realpath(java)
+        if real in found:
+            continue
+        info = describe_jdk(java)
+        if info:
+            found[real] = info
+    return sorted(found.values(), key=lambda j: (-j["feature"], j["java"]))
+
+
+def default_jdk():
+    """JDK do `java` no PATH (ou None)."""
+    return describe_jdk(_JAVA_EXE)
+
+
+def version_line(jdk) -> str:
+    """Descrição curta, no formato da primeira linha de `java -version`."""
+    vendor = f" ({jdk['vendor']})" if jdk.get("vendor") else ""
+    return f'java version "{jdk["version"]}"{vendor}'
+
+
+# --- Versão do Minecraft -> Java -------------------------------------------
+
+
+def required_java(mc_version: str):
+    """Java mínimo para uma versão do Minecraft ("1.20.4" -> 17), ou None."""
+    match = _MC_VERSION_RE.match(str(mc_version or "").strip())
+    if not match:
+        # Snapshots ("24w14a") e versões desconhecidas
+        return None
+    version = tuple(int(p) for p in match.groups() if p is not None)
+    for minimum, feature in MC_JAVA_REQUIREMENTS:
+        if version >= minimum:
+            return feature
+    return None
+
+
+def _version_from_jar(jar: str):
+    """(versão do Minecraft, Java exigido) gravados dentro do server.jar."""
+    try:
+        with zipfile.ZipFile(jar) as zf:
+            names = set(zf.namelist())
+            if "version.json" in names:
+                data = json.loads(zf.read("version.json"))
+                return data.get("id"), data.get("java_version")
+            # Paperclip: "hash	1.21.4-R0.1-SNAPSHOT	paper-1.21.4.jar"
+            if "META-INF/versions.list" in names:
+                line = zf.read("META-INF/versions.list").decode().splitlines()[0]
+                return line.split("\t")[1].split("-")[0], None
+    except (OSError, zipfile.BadZipFile, ValueError, IndexError, KeyError):
+        pass
+    return None, None
+
+
+def server_java_requirement(directory: str):
+    """Versão do Minecraft do servidor e o Java exigido (None quando desconhecidos)."""
+    # Importação local: o downloader importa o pacote system
+    from easymcserver.downloader.neoforge import neoforge_args_file
+
+    args_file = neoforge_args_file(directory)
+    if args_file:
+        # NeoForge 21.1.77 roda no Minecraft 1.21.1; 20.4.x no 1.20.4
+        neoforge = os.path.basename(os.path.dirname(args_file))
+        major, _, minor = neoforge.partition(".")
+        mc_version = f"1.{major}.{minor.split('.')[0]}".removesuffix(".0")
+        return mc_version, required_java(mc_version)
+
+    mc_version, feature = _version_from_jar(os.path.join(directory, "server.jar"))
+    return mc_version, feature or required_java(mc_version)
+
+
+def select_jdk(feature: int, jdks=None):
+    """Melhor JDK para o Java exigido: o da mesma versão ou o mais próximo acima.
+
+    Minecraft antigo (Java 8) só aceita outra versão se não houver Java 8.
+    Retorna (jdk, exato) ou (None, False).
+    """
+    jdks = discover_jdks() if jdks is None else jdks
+    exact = [j for j in jdks if j["feature"] == feature]
+    if exact:
+        return exact[0], True
+    newer = sorted(
+        (j for j in jdks if j["feature"] > feature), key=lambda j: j["feature"]
+    )
+    return (newer[0], False) if newer else (None, False)
+
+
+def jdk_for_server(directory: str, quiet: bool = False):
+    """JDK que o servidor em `directory` deve usar (o do PATH se a versão for desconhecida)."""
+    mc_version, feature = server_java_requirement(directory)
+    return _jdk_for(mc_version, feature, quiet)
+
+
+def jdk_for_version(mc_version: str, quiet: bool = False):
+    """JDK para uma versão do Minecraft (ex.: para rodar um instalador), ou None."""
+    return _jdk_for(mc_version, required_java(mc_version), quiet)
+
+
+def _jdk_for(mc_version, feature, quiet):
+    if not feature:
+        return default_jdk()
+    default = default_jdk()
+    if default and default["feature"] == feature:
+        return default
+    jdk, exact = select_jdk(feature)
+    if not jdk:
+        if not quiet:
+            console.print(
+                f"[bold red][ERRO][/bold red] O Minecraft {mc_version} exige o Java {feature}, "
+                "que não foi encontrado. Instale-o e tente novamente."
+            )
+        return None
+    if not exact and not quiet:
+        level = (
+            "[bold yellow][AVISO][/bold yellow]"
+            if feature >= NEWER_JAVA_OK_FEATURE
+            else "[bold red][AVISO][/bold red]"
+        )
+        console.print(
+            f"{level} O Minecraft {mc_version} exige o Java {feature}; usando o Java "
+            f"{jdk['feature']} ({jdk['java']})."
+        )
+    return jdk
+
+
+def list_jdks(directory: str = None) -> bool:
+    """Mostra os JDKs encontrados e, com `directory`, qual o servidor usará."""
+    # Importação local: a tabela só é usada aqui
+    from rich.table import Table
+
+    jdks = discover_jdks()
+    if not jdks:
+        console.print(
+            "[bold red][ERRO][/bold red] Nenhum Java encontrado (PATH, JAVA_HOME, /usr/lib/jvm, SDKMAN)."
+        )
+        return False
+    chosen = jdk_for_server(directory) if directory else default_jdk()
+    table = Table(title="JDKs encontrados")
+    table.add_column("Java", justify="right")
+    table.add_column("Versão")
+    table.add_column("Fornecedor")
+    table.add_column("Executável")
+    for jdk in jdks:
+        selected = chosen and os.path.realpath(jdk["java"]) == os.path.realpath(
+            chosen["java"]
+        )
+        table.add_row(
+            (
+                f"[bold green]→[/bold green] {jdk['feature']}"
+                if selected
+                else str(jdk["feature"])
+            ),
+            jdk["version"],
+            jdk["vendor"],
+            jdk["java"],
+        )
+    console.print(table)
+    if directory:
+        mc_version, feature = server_java_requirement(directory)
+        if mc_version:
+            console.print(f"Minecraft {mc_version}: exige o Java {feature or '?'}.")
+    return True
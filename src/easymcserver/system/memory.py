@@ -1,19 +1,39 @@
 from psutil import virtual_memory
 from InquirerPy import prompt
 from rich.console import Console
+from easymcserver.system.cgroup import (
+    effective_available_memory,
+    effective_memory,
+    get_limits,
+    is_limited,
+)
 
 console = Console()
 
 
 def get_sys_memory():
-    """Obtém informações de memória do sistema."""
+    """Obtém informações de memória do sistema (ou do limite do contêiner)."""
     mem_info = virtual_memory()
-    total_ram_gb = round(mem_info.total / (1024**3), 2)
-    available_ram_gb = round(mem_info.available / (1024**3), 2)
-    used_ram_gb = round(mem_info.used / (1024**3), 2)
+    total_ram_gb = round(effective_memory() / (1024**3), 2)
+    available_ram_gb = round(effective_available_memory() / (1024**3), 2)
+    if is_limited() and get_limits()["memory_usage"] is not None:
+        used_ram_gb = round(get_limits()["memory_usage"] / (1024**3), 2)
+    else:
+        used_ram_gb = round(mem_info.used / (1024**3), 2)
     return total_ram_gb, available_ram_gb, used_ram_gb
 
 
+def _fitting_choices(choices):
+    """Só as opções que cabem na memória utilizável (ao menos a menor delas)."""
+    total_ram_gb, _, _ = get_sys_memory()
+    fitting = [
+        c
+        for c in choices
+        if float(c[:-1]) / (1024 if c.endswith("M") else 1) <= total_ram_gb
+    ]
+    return fitting or choices[:1]
+
+
 def get_memory_config_xmx(custom: bool = False):
     if custom:
         """Pergunta a alocação máxima de memória (Xmx) - Customizado."""
@@ -34,7 +54,7 @@ def get_memory_config_xmx(custom: bool = False):
                 "type": "list",
                 "name": "memory_xmx",
                 "message": "Quantidade máxima de memória (Xmx):",
-                "choices": ["2G", "4G", "8G", "16G"],
+                "choices": _fitting_choices(["2G", "4G", "8G", "16G"]),
             }
         ]
         return validate_mem_config(prompt(questions)["memory_xmx"])
@@ -60,7 +80,7 @@ def get_memory_config_xms(custom: bool = False):
                 "type": "list",
                 "name": "memory_xms",
                 "message": "Quantidade mínima de memória (Xms):",
-                "choices": ["512M", "1G", "2G", "4G"],
+                "choices": _fitting_choices(["512M", "1G", "2G", "4G"]),
             }
         ]
         return validate_mem_config(prompt(questions)["memory_xms"])
@@ -95,9 +115,14 @@ def validate_mem_config(value: str):
         )
         return False, None
     except MemoryError:
-        console.print(
-            f"[bold red][ERRO][/bold red] A quantidade de memória alocada para a JVM excede o total disponível no sistema ([cyan]{total_ram_gb} GB[/cyan])."
-        )
+        if is_limited():
+            console.print(
+                f"[bold red][ERRO][/bold red] A quantidade de memória alocada para a JVM excede o limite do contêiner (cgroup) ([cyan]{total_ram_gb} GB[/cyan])."
+            )
+        else:
+            console.print(
+                f"[bold red][ERRO][/bold red] A quantidade de memória alocada para a JVM excede o total disponível no sistema ([cyan]{total_ram_gb} GB[/cyan])."
+            )
         return False, None
 
     if unit == "G":
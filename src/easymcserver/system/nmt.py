@@ -0,0 +1,384 @@
+# Native Memory Tracking (NMT) da JVM
+#
+# Com -XX:NativeMemoryTracking=summary, `jcmd <pid> VM.native_memory summary`
+# mostra quanto a JVM reservou e usa (committed) em cada categoria: heap,
+# metaspace, code cache, threads, GC... É a medição real do que fica fora do
+# heap, usada para calibrar o planejador de memória (system/footprint.py) e
+# para acompanhar o servidor ao longo do tempo (easymc nmt).
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import time
+import psutil
+from rich.console import Console
+from rich.table import Table
+
+_UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+_TOTAL_RE = re.compile(
+    r"^Total: reserved=(\d+)(B|KB|MB|GB), committed=(\d+)(B|KB|MB|GB)", re.MULTILINE
+)
+_CATEGORY_RE = re.compile(
+    r"^-\s+(.+?) \(reserved=(\d+)(B|KB|MB|GB), committed=(\d+)(B|KB|MB|GB)\)",
+    re.MULTILINE,
+)
+_THREADS_RE = re.compile(r"\(thread #(\d+)\)")
+_CLASSES_RE = re.compile(r"\(classes #(\d+)\)")
+
+
+def _bytes(value, unit):
+    return int(value) * _UNITS[unit]
+
+
+def parse_nmt_summary(text: str):
+    """Converte a saída do VM.native_memory summary em um dicionário.
+
+    Retorna {"total": {"reserved", "committed"}, "categories": {nome:
+    {"reserved", "committed"}}, "threads", "classes"} com valores em bytes,
+    ou None se o texto não for um resumo do NMT (ex.: NMT desativado).
+    """
+    total = _TOTAL_RE.search(text)
+    if not total:
+        return None
+    categories = {}
+    for match in _CATEGORY_RE.finditer(text):
+        name = match.group(1).strip()
+        categories[name] = {
+            "reserved": _bytes(*match.group(2, 3)),
+            "committed": _bytes(*match.group(4, 5)),
+        }
+    threads = _THREADS_RE.search(text)
+    classes = _CLASSES_RE.search(text)
+    return {
+        "total": {
+            "reserved": _bytes(*total.group(1, 2)),
+            "committed": _bytes(*total.group(3, 4)),
+        },
+        "categories": categories,
+        "threads": int(threads.group(1)) if threads else None,
+        "classes": int(classes.group(1)) if classes else None,
+    }
+
+
+def read_nmt_summary(pid: int, jcmd: str = "jcmd"):
+    """Executa o jcmd no processo `pid` e retorna a saída (ou None)."""
+    try:
+        result = subprocess.run(
+            [jcmd, str(pid), "VM.native_memory", "summary"],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except (FileNotFoundError, OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def committed(summary, *names) -> int:
+    """Soma do committed das categorias `names` que existirem no resumo."""
+    return sum(
+        summary["categories"][n]["committed"]
+        for n in names
+        if n in summary["categories"]
+    )
+
+
+# --- Coletor ----------------------------------------------------------------
+#
+# `easymc nmt` consulta o servidor em execução a cada `interval` segundos e
+# grava uma série temporal compacta em logs/nmt.jsonl: uma linha por amostra,
+# {"t": epoch, "c": {categoria: committed em KB}}. Categorias que crescem de
+# forma constante (ex.: vazamento de memória nativa de um mod) são apontadas.
+
+NMT_SERIES_FILE = os.path.join("logs", "nmt.jsonl")
+DEFAULT_INTERVAL = 60
+# Falhas seguidas do jcmd (outro usuário, attach recusado) antes de desistir
+MAX_FAILURES = 5
+# Acima disso a metade mais antiga da série é rarefeita (uma a cada duas)
+MAX_SAMPLES = 2000
+# Critérios de crescimento constante
+MIN_SAMPLES = 6
+MIN_R2 = 0.8
+MIN_RISING = 0.8
+MIN_GROWTH_KB = 16 * 1024
+MIN_GROWTH_RATIO = 0.05
+# O heap cresce até o Xmx por decisão do GC, não por vazamento
+_IGNORED_GROWTH = {"Java Heap"}
+
+console = Console()
+
+
+def find_server_pid(directory: str):
+    """PID da JVM em execução no diretório do servidor (ou None)."""
+    directory = os.path.abspath(directory)
+    for process in psutil.process_iter(["pid", "name", "cwd"]):
+        if process.info.get("cwd") != directory:
+            continue
+        if "java" in (process.info.get("name") or "").lower():
+            return process.info["pid"]
+    return None
+
+
+def find_jcmd(pid: int) -> str:
+    """jcmd do mesmo JDK da JVM (versões diferentes podem não conversar)."""
+    try:
+        exe = psutil.Process(pid).exe()
+    except (psutil.Error, OSError):
+        exe = None
+    if exe:
+        candidate = os.path.join(os.path.dirname(exe), "jcmd")
+        if os.access(candidate, os.X_OK):
+            return candidate
+    return shutil.which("jcmd") or "jcmd"
+
+
+def nmt_enabled(pid: int) -> bool:
+    """True se a JVM foi iniciada com o NMT ativado."""
+    try:
+        cmdline = psutil.Process(pid).cmdline()
+    except (psutil.Error, OSError):
+        return False
+    return any(
+        arg.startswith("-XX:NativeMemoryTracking=") and not arg.endswith("=off")
+        for arg in cmdline
+    )
+
+
+def sample(summary, timestamp=None):
+    """Amostra compacta de um resumo do NMT (committed em KB)."""
+    categories = {
+        name: values["committed"] // 1024
+        for name, values in summary["categories"].items()
+    }
+    categories["Total"] = summary["total"]["committed"] // 1024
+    return {
+        "t": int(timestamp if timestamp is not None else time.time()),
+        "c": categories,
+    }
+
+
+def load_series(path: str):
+    """Amostras gravadas em `path` (linhas inválidas são ignoradas)."""
+    samples = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(item, dict) and "t" in item and "c" in item:
+                    samples.append(item)
+    except OSError:
+        pass
+    return samples
+
+
+def append_sample(path: str, item):
+    """Acrescenta uma amostra à série, rarefazendo-a se ficar grande demais."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(item, separators=(",", ":")) + "\n")
+    samples = load_series(path)
+    if len(samples) <= MAX_SAMPLES:
+        return
+    half = len(samples) // 2
+    samples = samples[:half:2] + samples[half:]
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for item in samples:
+            f.write(json.dumps(item, separators=(",", ":")) + "\n")
+    os.replace(tmp, path)
+
+
+def growth(points):
+    """Tendência de uma categoria: [(t, kb), ...] -> dicionário ou None.
+
+    `rate` é a inclinação da regressão linear em KB por hora, `r2` o quanto a
+    reta explica os pontos e `rising` a fração de intervalos sem queda.
+    """
+    if len(points) < 2:
+        return None
+    n = len(points)
+    mean_t = sum(t for t, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    stt = sum((t - mean_t) ** 2 for t, _ in points)
+    syy = sum((y - mean_y) ** 2 for _, y in points)
+    sty = sum((t - mean_t) * (y - mean_y) for t, y in points)
+    if stt == 0:
+        return None
+    slope = sty / stt
+    r2 = (sty * sty) / (stt * syy) if syy else 0.0
+    deltas = [b[1] - a[1] for a, b in zip(points, points[1:])]
+    rising = sum(1 for d in deltas if d >= 0) / len(deltas)
+    first, last = points[0][1], points[-1][1]
+    steady = (
+        n >= MIN_SAMPLES
+        and slope > 0
+        and r2 >= MIN_R2
+        and rising >= MIN_RISING
+        and last - first >= max(MIN_GROWTH_KB, first * MIN_GROWTH_RATIO)
+    )
+    return {
+        "first": first,
+        "last": last,
+        "rate": slope * 3600,
+        "r2": r2,
+        "rising": rising,
+        "steady": steady,
+    }
+
+
+def analyze_series(samples):
+    """{categoria: tendência} para todas as categorias da série."""
+    names = []
+    for item in samples:
+        for name in item["c"]:
+            if name not in names:
+                names.append(name)
+    trends = {}
+    for name in names:
+        points = [(item["t"], item["c"][name]) for item in samples if name in item["c"]]
+        trend = growth(points)
+        if trend:
+            trend["steady"] = trend["steady"] and name not in _IGNORED_GROWTH
+            trends[name] = trend
+    return trends
+
+
+def _kb(value) -> str:
+    if abs(value) >= 1024 * 1024:
+        return f"{value / (1024 * 1024):.2f} GB"
+    if abs(value) >= 1024:
+        return f"{value / 1024:.1f} MB"
+    return f"{value:.0f} KB"
+
+
+def render_report(samples):
+    """Tabela com o início, o fim e a tendência de cada categoria."""
+    trends = analyze_series(samples)
+    span = (samples[-1]["t"] - samples[0]["t"]) / 3600 if samples else 0
+    table = Table(
+        title=f"Memória nativa (committed) — {len(samples)} amostras, {span:.1f} h"
+    )
+    table.add_column("Categoria")
+    table.add_column("Início", justify="right")
+    table.add_column("Atual", justify="right")
+    table.add_column("Variação", justify="right")
+    table.add_column("Por hora", justify="right")
+    table.add_column("Tendência")
+    ordered = sorted(trends.items(), key=lambda kv: (kv[0] == "Total", -kv[1]["last"]))
+    for name, trend in ordered:
+        delta = trend["last"] - trend["first"]
+        if trend["steady"]:
+            status = "[bold red]crescendo[/bold red]"
+        elif name in _IGNORED_GROWTH and delta > 0:
+            status = "[dim]expansão do heap[/dim]"
+        else:
+            status = "[green]estável[/green]"
+        table.add_row(
+            name,
+            _kb(trend["first"]),
+            _kb(trend["last"]),
+            ("+" if delta > 0 else "") + _kb(delta),
+            ("+" if trend["rate"] > 0 else "") + _kb(trend["rate"]),
+            status,
+        )
+    return table, [name for name, trend in trends.items() if trend["steady"]]
+
+
+def _report(path) -> bool:
+    samples = load_series(path)
+    if not samples:
+        console.print(f"[bold red][ERRO][/bold red] Nenhuma amostra em {path}.")
+        return False
+    table, leaking = render_report(samples)
+    console.print(table)
+    if len(samples) < MIN_SAMPLES:
+        console.print(
+            f"[bold yellow][AVISO][/bold yellow] São necessárias ao menos {MIN_SAMPLES} amostras para apontar crescimento."
+        )
+    for name in leaking:
+        if name == "Total":
+            continue
+        console.print(
+            f"[bold yellow][AVISO][/bold yellow] {name} cresce de forma constante: "
+            "possível vazamento de memória nativa (ex.: um mod ou plugin)."
+        )
+    return True
+
+
+def collect_nmt(
+    directory: str,
+    interval: int = DEFAULT_INTERVAL,
+    count: int = None,
+    pid: int = None,
+    report_only: bool = False,
+) -> bool:
+    """Coleta o resumo do NMT do servidor periodicamente (até Ctrl+C).
+
+    As amostras vão para logs/nmt.jsonl do servidor; ao final mostra as
+    categorias e aponta as que crescem de forma constante.
+    """
+    path = os.path.join(directory, NMT_SERIES_FILE)
+    if report_only:
+        return _report(path)
+
+    pid = pid or find_server_pid(directory)
+    if not pid:
+        console.print(
+            f"[bold red][ERRO][/bold red] Nenhum servidor Java em execução em {directory}."
+        )
+        return False
+    if not nmt_enabled(pid):
+        console.print(
+            "[bold red][ERRO][/bold red] O servidor não foi iniciado com "
+            "-XX:NativeMemoryTracking=summary. Ative-o no jvm_args.txt e reinicie."
+        )
+        return False
+    jcmd = find_jcmd(pid)
+
+    console.print(
+        f"[dim]Coletando o NMT do PID {pid} a cada {interval}s em {path} (Ctrl+C para sair)...[/dim]"
+    )
+    taken = attempts = failures = 0
+    try:
+        while count is None or taken < count:
+            if attempts:
+                time.sleep(interval)
+            attempts += 1
+            if not psutil.pid_exists(pid):
+                console.print(
+                    "[bold yellow][AVISO][/bold yellow] O servidor foi encerrado."
+                )
+                break
+            summary = parse_nmt_summary(read_nmt_summary(pid, jcmd) or "")
+            if not summary:
+                failures += 1
+                console.print(
+                    f"[bold yellow][AVISO][/bold yellow] Falha ao consultar o NMT com {jcmd}."
+                )
+                if failures >= MAX_FAILURES:
+                    console.print(
+                        f"[bold red][ERRO][/bold red] {failures} falhas seguidas do jcmd; "
+                        "ele precisa rodar com o mesmo usuário da JVM."
+                    )
+                    _report(path)
+                    return False
+                continue
+            failures = 0
+            item = sample(summary)
+            append_sample(path, item)
+            taken += 1
+            console.print(
+                f"[bold green][OK][/bold green] {time.strftime('%H:%M:%S')} "
+                f"committed total: {_kb(item['c']['Total'])}"
+            )
+    except KeyboardInterrupt:
+        pass
+    return _report(path)
@@ -0,0 +1,554 @@
+# Supervisor dos servidores (asyncio)
+#
+# O supervisor executa o comando registrado pelo script de inicialização
+# (config/launch.py) diretamente, sem shell, e é dono do processo: lê a
+# saída sem bloquear, sabe quando o servidor terminou de carregar ("Done"),
+# aplica limites de tempo para iniciar e para parar, para com "stop" e, se o
+# servidor não sair, com SIGTERM e depois SIGKILL. Um servidor que cai é
+# reiniciado com espera crescente entre as tentativas. Um único processo
+# supervisiona vários servidores ao mesmo tempo (easymc run), acompanhando
+# o TPS e os atrasos de cada um pela saída (system/ticks.py).
+
+import asyncio
+import os
+import re
+import signal
+import subprocess
+import time
+import psutil
+from rich.console import Console
+from rich.table import Table
+from easymcserver.system.ticks import TickStats, render_ticks
+
+console = Console()
+
+# "Done (12.345s)! For help, type "help"" — o servidor terminou de carregar
+DONE_RE = re.compile(r"Done \((\d+(?:[.,]\d+)?)s\)!")
+# Java ("Done (...)!") ou Bedrock ("Server started.")
+READY_RE = re.compile(r"Done \(|Server started\.")
+
+# Modpacks grandes gerando o mundo pela primeira vez podem levar minutos
+STARTUP_TIMEOUT = 600
+# Tempo para o "stop" salvar o mundo antes do SIGTERM
+STOP_TIMEOUT = 120
+# Tempo entre o SIGTERM e o SIGKILL
+TERM_TIMEOUT = 30
+# Espera antes de reiniciar: dobra a cada queda seguida, até o máximo
+BACKOFF_START = 5
+BACKOFF_MAX = 300
+# Depois desse tempo rodando, uma queda volta a contar do início
+STABLE_AFTER = 600
+# Quedas seguidas antes de desistir do servidor
+MAX_FAILURES = 5
+# Intervalo entre as consultas ao código de saída do processo (s)
+EXIT_POLL = 0.5
+# Tempo para ler o resto da saída depois que o processo termina
+OUTPUT_GRACE = 5
+# Maior linha lida da saída (listas de mods podem passar de 64 KB)
+LINE_LIMIT = 1024**2
+
+
+def server_command(directory: str):
+    """(comando, opções) para iniciar o servidor sem shell, ou (None, {})."""
+    # Importação local: config/properties.py importa este módulo e o launch depende dele
+    from easymcserver.config.launch import launch_command
+
+    command, options = launch_command(directory)
+    if command:
+        return command, options
+    bedrock = os.path.join(
+        directory, "bedrock_server.exe" if os.name == "nt" else "bedrock_server"
+    )
+    if os.path.exists(bedrock):
+        return [os.path.abspath(bedrock)], {}
+    return None, {}
+
+
+def _limit_files(nofile):
+    """preexec_fn que aumenta o limite de arquivos abertos (o ulimit -n do script)."""
+
+    def apply():
+        import resource
+
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (nofile, nofile))
+        except (ValueError, OSError):
+            # Sem root o limite rígido não sobe: usa o máximo permitido
+            _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            if hard == resource.RLIM_INFINITY:
+                hard = nofile
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (min(nofile, hard), hard))
+            except (ValueError, OSError):
+                pass
+
+    return apply
+
+
+def _apply_windows_options(pid: int, options: dict):
+    """Afinidade e prioridade no Windows, que no script vêm do "start"."""
+    try:
+        process = psutil.Process(pid)
+        if "cpus" in options:
+            cpus = set()
+            for part in str(options["cpus"]).split(","):
+                start, _, end = part.partition("-")
+                cpus.update(range(int(start), int(end or start) + 1))
+            process.cpu_affinity(sorted(cpus))
+        if "nice" in options:
+            nice = options["nice"]
+            if nice >= 10:
+                priority = psutil.IDLE_PRIORITY_CLASS
+            elif nice > 0:
+                priority = psutil.BELOW_NORMAL_PRIORITY_CLASS
+            elif nice <= -10:
+                priority = psutil.HIGH_PRIORITY_CLASS
+            elif nice < 0:
+                priority = psutil.ABOVE_NORMAL_PRIORITY_CLASS
+            else:
+                priority = psutil.NORMAL_PRIORITY_CLASS
+            process.nice(priority)
+    except (psutil.Error, OSError, ValueError, AttributeError) as e:
+        console.print(
+            f"[bold yellow][AVISO][/bold yellow] Afinidade/prioridade não aplicadas: {e}"
+        )
+
+
+def _open_files_limit(pid: int):
+    try:
+        return psutil.Process(pid).rlimit(psutil.RLIMIT_NOFILE)[0]
+    except (psutil.Error, AttributeError, OSError):
+        return None
+
+
+class ServerInstance:
+    """Um servidor supervisionado: processo, saída, prontidão e reinícios.
+
+    `command` substitui o do script (usado pelo benchmark e pelo CDS);
+    `on_line` recebe cada linha da saída e `on_start` o processo recém-criado;
+    `ticks` acumula o TPS, os atrasos e os jogadores a partir da saída.
+    Com `detach` o servidor roda em outro grupo de processos: o Ctrl+C do
+    terminal chega só ao supervisor, que para o servidor com "stop".
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        name: str = None,
+        command=None,
+        restart: bool = True,
+        startup_timeout: float = STARTUP_TIMEOUT,
+        stop_timeout: float = STOP_TIMEOUT,
+        echo: bool = True,
+        detach: bool = False,
+        on_line=None,
+        on_start=None,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.name = name or os.path.basename(self.directory)
+        self.command = command
+        self.restart = restart
+        self.startup_timeout = startup_timeout
+        self.stop_timeout = stop_timeout
+        self.echo = echo
+        self.detach = detach
+        self.ticks = TickStats()
+        self.listeners = [self.ticks.feed] + ([on_line] if on_line else [])
+        self.on_start = on_start
+
+        self.state = "parado"
+        self.process = None
+        self.boot_seconds = None
+        self.started_at = None
+        self.restarts = 0
+        self.last_exit = None
+        self._ready = asyncio.Event()
+        self._stop_requested = asyncio.Event()
+        self._reader = None
+
+    # --- Processo -----------------------------------------------------------
+
+    async def start(self) -> bool:
+        """Inicia o processo (sem esperar o "Done"). False se não for possível."""
+        options = {}
+        command = self.command
+        if command is None:
+            command, options = server_command(self.directory)
+            if not command:
+                console.print(
+                    f"[bold red][ERRO][/bold red] {self.name}: script de inicialização não encontrado."
+                )
+                return False
+
+        kwargs = {}
+        if self.detach:
+            if os.name == "nt":
+                kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+            else:
+                kwargs["start_new_session"] = True
+        if os.name != "nt" and options.get("nofile"):
+            kwargs["preexec_fn"] = _limit_files(options["nofile"])
+        self._ready.clear()
+        self.boot_seconds = None
+        self.state = "iniciando"
+        self.started_at = time.perf_counter()
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *command,
+                cwd=self.directory,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=LINE_LIMIT,
+                **kwargs,
+            )
+        except OSError as e:
+            console.print(
+                f"[bold red][ERRO][/bold red] {self.name}: não foi possível iniciar {command[0]}: {e}"
+            )
+            self.state = "falhou"
+            return False
+
+        if os.name == "nt" and options:
+            _apply_windows_options(self.process.pid, options)
+        if self.command is None:
+            # Importação local: config/properties.py importa este módulo e o launch depende dele
+            from easymcserver.config.launch import log_launch
+
+            log_launch(
+                self.directory,
+                command,
+                self.process.pid,
+                _open_files_limit(self.process.pid),
+            )
+        if self.on_start:
+            self.on_start(self.process)
+        self._reader = asyncio.create_task(self._read_output())
+        return True
+
+    async def _read_output(self):
+        """Lê a saída linha a linha; marca o servidor como pronto no "Done"."""
+        while True:
+            try:
+                raw = await self.process.stdout.readline()
+            except ValueError:  # Linha maior que LINE_LIMIT: descartada
+                continue
+            if not raw:
+                break
+            line = raw.decode("utf-8", errors="replace")
+            if self.echo:
+                console.print(
+                    f"[{self.name}] {line.rstrip()}", markup=False, highlight=False
+                )
+            for listener in self.listeners:
+                listener(line)
+            if not self._ready.is_set() and READY_RE.search(line):
+                match = DONE_RE.search(line)
+                if match:
+                    self.boot_seconds = float(match.group(1).replace(",", "."))
+                else:
+                    self.boot_seconds = time.perf_counter() - self.started_at
+                self.state = "rodando"
+                self._ready.set()
+
+    def running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def wait_ready(self, timeout: float = None) -> bool:
+        """Espera o "Done". False se o processo sair antes ou o tempo acabar."""
+        ready = asyncio.create_task(self._ready.wait())
+        exited = asyncio.create_task(self._wait_exit(None))
+        await asyncio.wait(
+            {ready, exited},
+            timeout=timeout or self.startup_timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        for task in (ready, exited):
+            task.cancel()
+        return self._ready.is_set()
+
+    async def send(self, command: str) -> bool:
+        """Envia um comando ao console do servidor."""
+        if not self.running():
+            return False
+        try:
+            self.process.stdin.write(f"{command}\n".encode())
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            return False
+        return True
+
+    async def _wait_exit(self, timeout: float = None) -> bool:
+        """Espera o processo terminar. False se `timeout` segundos passarem antes.
+
+        Consulta o código de saída em vez de usar process.wait(), que só
+        retorna quando a saída é fechada, e um filho que a herdou pode
+        mantê-la aberta.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.process.returncode is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(EXIT_POLL)
+        return True
+
+    def _signal(self, sig):
+        """Envia o sinal ao servidor e, com `detach`, ao grupo de processos dele."""
+        try:
+            if self.detach and os.name != "nt":
+                os.killpg(self.process.pid, sig)
+            elif sig == signal.SIGTERM:
+                self.process.terminate()
+            else:
+                self.process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    async def stop(self):
+        """Para o servidor: "stop", depois SIGTERM e, por último, SIGKILL."""
+        self._stop_requested.set()
+        if not self.running():
+            return self.last_exit
+        self.state = "parando"
+        await self.send("stop")
+        if not await self._wait_exit(self.stop_timeout):
+            console.print(
+                f"[bold yellow][AVISO][/bold yellow] {self.name}: não parou em {self.stop_timeout:.0f}s, enviando SIGTERM."
+            )
+            self._signal(signal.SIGTERM)
+            if not await self._wait_exit(TERM_TIMEOUT):
+                console.print(
+                    f"[bold red][ERRO][/bold red] {self.name}: não respondeu ao SIGTERM, encerrando à força (SIGKILL)."
+                )
+                self._signal(getattr(signal, "SIGKILL", signal.SIGTERM))
+        return await self._finish()
+
+    async def _finish(self):
+        """Espera o fim da leitura da saída e registra o código de saída."""
+        await self._wait_exit()
+        code = self.process.returncode
+        if self.detach and os.name != "nt":
+            # Processos que o servidor deixou para trás no mesmo grupo
+            self._signal(signal.SIGKILL)
+        if self._reader:
+            try:
+                # Um filho que herdou a saída pode mantê-la aberta depois do fim do servidor
+                await asyncio.wait_for(self._reader, OUTPUT_GRACE)
+            except asyncio.TimeoutError:
+                pass
+            self._reader = None
+        self.last_exit = code
+        if self.state != "falhou":
+            self.state = "parado"
+        return code
+
+    # --- Modos de uso ---------------------------------------------------------
+
+    async def boot_once(self):
+        """Inicia, espera o "Done" e para. Retorna o tempo de boot ou None."""
+        if not await self.start():
+            return None
+        if not await self.wait_ready():
+            if self.running():
+                console.print(
+                    f"[bold yellow][AVISO][/bold yellow] {self.name}: não terminou de iniciar em "
+                    f"{self.startup_timeout:.0f}s."
+                )
+            await self.stop()
+            return None
+        await self.stop()
+        return self.boot_seconds
+
+    async def run(self):
+        """Mantém o servidor rodando até stop(), reiniciando depois de quedas."""
+        failures = 0
+        self._stop_requested.clear()
+        while not self._stop_requested.is_set():
+            if not await self.start():
+                self.state = "falhou"
+                return
+            ready = await self.wait_ready()
+            if not ready and self.running() and not self._stop_requested.is_set():
+                console.print(
+                    f"[bold red][ERRO][/bold red] {self.name}: não terminou de iniciar em "
+                    f"{self.startup_timeout:.0f}s."
+                )
+                await self.stop()
+                self._stop_requested.clear()
+            elif ready:
+                console.print(
+                    f"[bold green][OK][/bold green] {self.name}: pronto em {self.boot_seconds:.1f}s."
+                )
+            code = await self._finish()
+            if self._stop_requested.is_set():
+                return
+            uptime = time.perf_counter() - self.started_at
+            if code == 0:
+                if ready:
+                    # "stop" digitado no jogo: o servidor saiu por vontade própria
+                    console.print(f"[cyan]{self.name}: encerrado normalmente.[/cyan]")
+                else:
+                    # Ex.: EULA não aceito; reiniciar não mudaria nada
+                    self.state = "falhou"
+                    console.print(
+                        f"[bold red][ERRO][/bold red] {self.name}: saiu antes de terminar de iniciar "
+                        "(veja logs/latest.log)."
+                    )
+                return
+
+            failures = 1 if uptime >= STABLE_AFTER else failures + 1
+            if not self.restart or failures > MAX_FAILURES:
+                self.state = "falhou"
+                console.print(
+                    f"[bold red][ERRO][/bold red] {self.name}: saiu com código {code}."
+                )
+                if self.restart:
+                    console.print(
+                        f"[bold red][ERRO][/bold red] {self.name}: {self.restarts} reinícios sem sucesso, desistindo."
+                    )
+                return
+            delay = min(BACKOFF_START * 2 ** (failures - 1), BACKOFF_MAX)
+            self.state = "reiniciando"
+            console.print(
+                f"[bold yellow][AVISO][/bold yellow] {self.name}: saiu com código {code}; "
+                f"reiniciando em {delay}s."
+            )
+            try:
+                await asyncio.wait_for(self._stop_requested.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                self.restarts += 1
+
+
+class Supervisor:
+    """Vários ServerInstance num único loop; Ctrl+C/SIGTERM para todos."""
+
+    def __init__(self, instances=None, report: float = None):
+        self.instances = list(instances or [])
+        # Intervalo (s) entre os relatórios de ticks; None desativa
+        self.report = report
+
+    def add(self, instance: ServerInstance):
+        self.instances.append(instance)
+
+    async def stop_all(self):
+        await asyncio.gather(*(instance.stop() for instance in self.instances))
+
+    def ticks_table(self):
+        now = time.time()
+        return render_ticks({i.name: i.ticks.snapshot(now) for i in self.instances})
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.report)
+            console.print(self.ticks_table())
+
+    def _on_signal(self):
+        console.print("\n[cyan]Parando os servidores...[/cyan]")
+        asyncio.ensure_future(self.stop_all())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        signals = [signal.SIGINT, signal.SIGTERM]
+        installed = []
+        for sig in signals:
+            try:
+                loop.add_signal_handler(sig, self._on_signal)
+                installed.append(sig)
+            except (NotImplementedError, RuntimeError):  # Windows
+                pass
+        reporter = asyncio.create_task(self._report_loop()) if self.report else None
+        try:
+            await asyncio.gather(*(instance.run() for instance in self.instances))
+        finally:
+            if reporter:
+                reporter.cancel()
+            for sig in installed:
+                loop.remove_signal_handler(sig)
+            # Em caso de erro, os servidores (em outro grupo) não podem ficar órfãos
+            if any(instance.running() for instance in self.instances):
+                await self.stop_all()
+
+    def status_table(self):
+        table = Table(title="Servidores supervisionados")
+        table.add_column("Servidor", style="cyan")
+        table.add_column("Estado")
+        table.add_column("Boot", justify="right")
+        table.add_column("Reinícios", justify="right")
+        table.add_column("Saída", justify="right")
+        table.add_column("TPS", justify="right")
+        table.add_column("Atrasos", justify="right")
+        table.add_column("Pior atraso", justify="right")
+        for instance in self.instances:
+            ticks = instance.ticks.snapshot()
+            table.add_row(
+                instance.name,
+                instance.state,
+                f"{instance.boot_seconds:.1f}s" if instance.boot_seconds else "-",
+                str(instance.restarts),
+                "-" if instance.last_exit is None else str(instance.last_exit),
+                "-" if ticks["tps"] is None else f"{ticks['tps']:.1f}",
+                str(ticks["lag_spikes"]),
+                f"{ticks['worst_ms'] / 1000:.1f}s" if ticks["worst_ms"] else "-",
+            )
+        return table
+
+
+def supervise(
+    directories,
+    restart: bool = True,
+    startup_timeout: float = STARTUP_TIMEOUT,
+    stop_timeout: float = STOP_TIMEOUT,
+    report: float = None,
+) -> bool:
+    """Executa os servidores em `directories` até Ctrl+C (easymc run).
+
+    Com `report`, mostra a tabela de ticks (TPS, atrasos, jogadores) de cada
+    servidor a cada `report` segundos.
+    """
+    names = [os.path.basename(os.path.abspath(d)) for d in directories]
+
+    async def main():
+        instances = [
+            ServerInstance(
+                directory,
+                # Nomes repetidos ganham o caminho para não confundir a saída
+                name if names.count(name) == 1 else directory,
+                restart=restart,
+                detach=True,
+                startup_timeout=startup_timeout,
+                stop_timeout=stop_timeout,
+            )
+            for directory, name in zip(directories, names)
+        ]
+        supervisor = Supervisor(instances, report)
+        try:
+            await supervisor.run()
+        finally:
+            console.print(supervisor.status_table())
+        return all(i.state != "falhou" for i in supervisor.instances)
+
+    try:
+        return asyncio.run(main())
+    except KeyboardInterrupt:  # Windows: sem tratador de sinal no loop
+        return False
+
+
+def boot_until_done(directory, command=None, on_line=None, on_start=None):
+    """Inicia o servidor, espera o "Done", para e espera ele encerrar.
+
+    `command` é uma lista de argumentos (sem shell); o padrão é o comando do
+    script de inicialização. `on_start` recebe o processo logo depois de
+    criado (para monitorá-lo de fora). Retorna o tempo de inicialização em
+    segundos (o informado pelo próprio servidor, ou o medido) ou None se o
+    servidor não chegar ao "Done" no tempo limite.
+    """
+    instance = ServerInstance(
+        directory,
+        command=command,
+        restart=False,
+        echo=False,
+        on_line=on_line,
+        on_start=on_start,
+    )
+    return asyncio.run(instance.boot_once())
@@ -3,30 +3,29 @@ from importlib.metadata import version
 import subprocess
 import platform
 import os
+from easymcserver.system.cgroup import effective_cpus
+from easymcserver.system.jdk import default_jdk, version_line
 
 console = Console()
 
 
 def check_java_installed(return_version_only=False):
-    """Verifica se o Java está instalado e retorna a versão."""
-    try:
-        result = subprocess.run(
-            ["java", "-version"], capture_output=True, text=True, check=True
-        )
-        # A saída de java -version vai para stderr
-        version_line = result.stderr.split("\n")[0]
+    """Verifica se o Java está instalado e retorna a versão.
+
+    A versão vem da descoberta de JDKs (system/jdk.py), que lê o arquivo
+    `release` da instalação e guarda o resultado em cache.
+    """
+    jdk = default_jdk()
+    if jdk:
+        line = version_line(jdk)
         if return_version_only is True:
-            return version_line
-        else:
-            console.print(
-                f"[bold green][OK][/bold green] Java detectado: {version_line}"
-            )
-            return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        console.print(
-            "[bold red][ERRO][/bold red] O Java não está instalado ou não está no PATH. Instale-o e tente novamente."
-        )
-        return False
+            return line
+        console.print(f"[bold green][OK][/bold green] Java detectado: {line}")
+        return True
+    console.print(
+        "[bold red][ERRO][/bold red] O Java não está instalado ou não está no PATH. Instale-o e tente novamente."
+    )
+    return False
 
 
 def check_box64_installed():
@@ -42,5 +41,39 @@ def check_sys_arch():
     return platform.machine()
 
 
+def get_cpu_count():
+    """CPUs que este processo pode usar (afinidade, cpuset e cota do cgroup)."""
+    if hasattr(os, "sched_getaffinity"):
+        affinity = len(os.sched_getaffinity(0))
+    else:
+        affinity = os.cpu_count() or 1
+    return effective_cpus(affinity)
+
+
+def get_numa_nodes():
+    """Quantidade de nós NUMA com CPUs (1 quando não há como saber)."""
+    try:
+        nodes = [
+            n
+            for n in os.listdir("/sys/devices/system/node")
+            if n.startswith("node") and n[4:].isdigit()
+        ]
+    except OSError:
+        return 1
+    return max(1, len(nodes))
+
+
+def get_thp_mode():
+    """Modo das Transparent Huge Pages: "always", "madvise", "never" ou None."""
+    try:
+        with open("/sys/kernel/mm/transparent_hugepage/enabled", "r") as f:
+            content = f.read()
+    except OSError:
+        return None
+    # O modo ativo aparece entre colchetes: "always [madvise] never"
+    start, end = content.find("["), content.find("]")
+    return content[start + 1 : end] if start != -1 and end > start else None
+
+
 if __name__ == "__main__":
     check_sys_arch()
@@ -0,0 +1,388 @@
+# Saúde dos ticks: TPS, atrasos e travamentos a partir do log do servidor
+#
+# O servidor não registra o TPS, mas avisa quando fica para trás ("Can't keep
+# up! ... Running 2500ms or 50 ticks behind"): esses ticks foram perdidos. A
+# soma dos ticks perdidos numa janela dá o TPS médio dela. Também entram os
+# avisos do watchdog (tick travado por segundos), entradas e saídas de
+# jogadores, a duração dos saves e, quando aparecem no console, as respostas
+# de /tps (Paper/Spigot), /mspt (Paper) e /tick query (1.20.3+).
+#
+# Os eventos ficam num buffer circular de tamanho fixo, então a memória não
+# cresce com o tempo de execução. O analisador é alimentado linha a linha:
+# pela saída do servidor no supervisor (easymc run) ou pelo logs/latest.log
+# (easymc ticks).
+
+import json
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+
+console = Console()
+
+TICKS_PER_SECOND = 20
+# Janela do TPS e dos atrasos recentes (s)
+WINDOW = 60
+# Eventos guardados no buffer circular
+CAPACITY = 1024
+LATEST_LOG = os.path.join("logs", "latest.log")
+# Intervalo entre leituras no modo follow (s)
+FOLLOW_INTERVAL = 1.0
+
+# "[12:34:56] [Server thread/INFO]: ..." (vanilla) ou "[12:34:56 INFO]: ..." (console do Paper)
+_TIME_RE = re.compile(r"^\[(\d{2}):(\d{2}):(\d{2})")
+_START_RE = re.compile(r"Starting minecraft server version")
+_BEHIND_RE = re.compile(
+    r"Can't keep up! Is the server overloaded\? Running (\d+)ms or (\d+) ticks behind"
+)
+# Paper: "The server has not responded for 10 seconds!"; vanilla: "A single server tick took 60.00 seconds"
+_WATCHDOG_RE = re.compile(
+    r"has not responded for (\d+) seconds|A single server tick took (\d+(?:[.,]\d+)?) seconds"
+)
+_JOIN_RE = re.compile(r":\s(\w{1,16}) joined the game\s*$")
+_LEAVE_RE = re.compile(r":\s(\w{1,16}) left the game\s*$")
+# /save-all ("Saving the game"/"Saved the game") e o save do desligamento
+_SAVE_START_RE = re.compile(r"Saving the game|Saving chunks for level")
+_SAVE_END_RE = re.compile(r"Saved the game|All dimensions are saved")
+# /tps: "TPS from last 1m, 5m, 15m: 19.98, 20.0, 20.0" (com códigos de cor)
+_TPS_RE = re.compile(r"TPS from last 1m, 5m, 15m: \D*(\d+(?:\.\d+)?)")
+# /tick query: "Average time per tick: 1.2ms (Target: 50.0ms)"
+_TICK_QUERY_RE = re.compile(r"Average time per tick: (\d+(?:\.\d+)?)ms")
+# /mspt: cabeçalho e, na linha seguinte, "avg/min/max" dos últimos 5s, 10s e 1m
+_MSPT_HEADER_RE = re.compile(r"Server tick times \(avg/min/max\)")
+_MSPT_RE = re.compile(r"(\d+(?:\.\d+)?)/\d+(?:\.\d+)?/\d+(?:\.\d+)?")
+
+
+def _percentile(values, p):
+    """Percentil por posição mais próxima (valores já ordenados)."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class TickStats:
+    """Estatísticas de ticks de um servidor, alimentadas linha a linha.
+
+    `events` é o buffer circular: (instante, tipo, valor) com tipos "lag"
+    e "watchdog" (ms de atraso ou travamento e ticks perdidos ainda não
+    contados), "join", "leave", "save" (duração em s) e "start".
+    """
+
+    def __init__(self, window: float = WINDOW, capacity: int = CAPACITY):
+        self.window = window
+        self.events = deque(maxlen=capacity)
+        self.players = set()
+        self.lines = 0
+        self.lag_events = 0
+        self.lost_ticks = 0
+        self.watchdogs = 0
+        self.worst_ms = 0
+        self.joins = 0
+        self.reported_tps = None
+        self.reported_at = None
+        self.mspt = None
+        self.first_at = None
+        self.last_at = None
+        self._save_started = None
+        self._mspt_next = False
+        self._stamp = None
+        # Travamento em andamento: segundos e ticks já contados pelo watchdog
+        self._stall_seconds = 0
+        self._stall_ticks = 0
+
+    def _timestamp(self, line):
+        """Instante da linha.
+
+        O log só tem a hora: a data da primeira linha é a de hoje (ou a de
+        ontem, se a hora ainda não chegou) e as seguintes continuam a partir
+        da anterior, avançando um dia quando o relógio volta (meia-noite).
+        """
+        match = _TIME_RE.match(line)
+        if not match:
+            return self.last_at or time.time()
+        hour, minute, second = map(int, match.groups())
+        if self._stamp is None:
+            stamp = datetime.now().replace(
+                hour=hour, minute=minute, second=second, microsecond=0
+            )
+            if stamp.timestamp() > time.time() + 60:
+                stamp -= timedelta(days=1)
+        else:
+            stamp = self._stamp.replace(hour=hour, minute=minute, second=second)
+            if stamp < self._stamp:
+                stamp += timedelta(days=1)
+        self._stamp = stamp
+        return stamp.timestamp()
+
+    def feed(self, line: str):
+        """Processa uma linha; retorna o tipo do evento reconhecido, ou None."""
+        self.lines += 1
+        at = self._timestamp(line)
+        if self.first_at is None:
+            self.first_at = at
+        self.last_at = at
+
+        if self._mspt_next:
+            self._mspt_next = False
+            match = _MSPT_RE.search(line)
+            if match:
+                self.mspt = float(match.group(1))
+                return "mspt"
+
+        match = _BEHIND_RE.search(line)
+        if match:
+            ms, ticks = int(match.group(1)), int(match.group(2))
+            # O atraso inclui o travamento que o watchdog já contou
+            ticks = max(0, ticks - self._stall_ticks)
+            self._stall_seconds = self._stall_ticks = 0
+            self.events.append((at, "lag", (ms, ticks)))
+            self.lag_events += 1
+            self.lost_ticks += ticks
+            self.worst_ms = max(self.worst_ms, ms)
+            return "lag"
+        match = _WATCHDOG_RE.search(line)
+        if match:
+            seconds = float((match.group(1) or match.group(2)).replace(",", "."))
+            # O Paper repete o aviso (10, 15, 20 s...) durante o mesmo
+            # travamento: só o aumento desde o aviso anterior é novo
+            if seconds <= self._stall_seconds:
+                self._stall_seconds = self._stall_ticks = 0
+            if not self._stall_seconds:
+                self.watchdogs += 1
+            ticks = round((seconds - self._stall_seconds) * TICKS_PER_SECOND)
+            self._stall_seconds = seconds
+            self._stall_ticks += ticks
+            self.events.append((at, "watchdog", (seconds * 1000, ticks)))
+            self.worst_ms = max(self.worst_ms, seconds * 1000)
+            self.lost_ticks += ticks
+            return "watchdog"
+        match = _JOIN_RE.search(line)
+        if match:
+            self.players.add(match.group(1))
+            self.joins += 1
+            self.events.append((at, "join", match.group(1)))
+            return "join"
+        match = _LEAVE_RE.search(line)
+        if match:
+            self.players.discard(match.group(1))
+            self.events.append((at, "leave", match.group(1)))
+            return "leave"
+        if _SAVE_START_RE.search(line):
+            if self._save_started is None:
+                self._save_started = at
+            return None
+        if _SAVE_END_RE.search(line) and self._save_started is not None:
+            self.events.append((at, "save", at - self._save_started))
+            self._save_started = None
+            return "save"
+        if _START_RE.search(line):
+            # Servidor reiniciado: ninguém está online
+            self.players.clear()
+            self._save_started = None
+            self._stall_seconds = self._stall_ticks = 0
+            self.events.append((at, "start", None))
+            return "start"
+        match = _TPS_RE.search(line)
+        if match:
+            self.reported_tps = float(match.group(1))
+            self.reported_at = at
+            return "tps"
+        match = _TICK_QUERY_RE.search(line)
+        if match:
+            self.mspt = float(match.group(1))
+            return "mspt"
+        if _MSPT_HEADER_RE.search(line):
+            self._mspt_next = True
+        return None
+
+    def snapshot(self, now: float = None):
+        """Resumo da janela atual e do buffer. `now` padrão: a última linha lida."""
+        now = now or self.last_at or time.time()
+        since = now - self.window
+        lost = 0
+        recent_lags = 0
+        for at, kind, value in self.events:
+            if at < since:
+                continue
+            if kind in ("lag", "watchdog"):
+                lost += value[1]
+                recent_lags += kind == "lag"
+        # Logo depois de iniciar, a janela é o tempo desde a primeira linha
+        span = max(1.0, min(self.window, now - (self.first_at or now)))
+        tps = max(0.0, TICKS_PER_SECOND - lost / span) if self.first_at else None
+
+        lags = sorted(v[0] for _, k, v in self.events if k == "lag")
+        saves = [v for _, k, v in self.events if k == "save"]
+        return {
+            "tps": None if tps is None else round(tps, 2),
+            # Resposta antiga de /tps não descreve o momento atual
+            "reported_tps": (
+                self.reported_tps
+                if self.reported_at is not None and self.reported_at >= since
+                else None
+            ),
+            "mspt": self.mspt,
+            "window_seconds": self.window,
+            "lag_spikes_window": recent_lags,
+            "lag_spikes": self.lag_events,
+            "lost_ticks": self.lost_ticks,
+            "lag_p50_ms": _percentile(lags, 50),
+            "lag_p95_ms": _percentile(lags, 95),
+            "worst_ms": self.worst_ms or None,
+            "watchdogs": self.watchdogs,
+            "players_online": sorted(self.players),
+            "joins": self.joins,
+            "saves": len(saves),
+            "save_avg_seconds": sum(saves) / len(saves) if saves else None,
+            "save_max_seconds": max(saves) if saves else None,
+            "span_seconds": (self.last_at - self.first_at) if self.first_at else 0,
+        }
+
+
+# --- Relatório ----------------------------------------------------------------
+
+
+def render_ticks(snapshots: dict) -> Table:
+    """Tabela com uma linha por servidor: {nome: snapshot}."""
+    table = Table(title="Saúde dos ticks")
+    table.add_column("Servidor", style="cyan")
+    table.add_column("TPS", justify="right")
+    table.add_column("MSPT", justify="right")
+    table.add_column("Atrasos", justify="right")
+    table.add_column("Pior atraso", justify="right")
+    table.add_column("p95 atraso", justify="right")
+    table.add_column("Watchdog", justify="right")
+    table.add_column("Jogadores", justify="right")
+    table.add_column("Save médio/máx", justify="right")
+
+    def ms(value):
+        return f"{value / 1000:.1f}s" if value else "-"
+
+    for name, s in snapshots.items():
+        tps = s["reported_tps"] if s["reported_tps"] is not None else s["tps"]
+        if tps is None:
+            tps_cell = "-"
+        else:
+            color = "green" if tps >= 19.5 else "yellow" if tps >= 15 else "red"
+            tps_cell = f"[{color}]{tps:.1f}[/{color}]"
+        saves = (
+            f"{s['save_avg_seconds']:.1f}s/{s['save_max_seconds']:.1f}s"
+            if s["saves"]
+            else "-"
+        )
+        table.add_row(
+            name,
+            tps_cell,
+            f"{s['mspt']:.1f}" if s["mspt"] is not None else "-",
+            f"{s['lag_spikes_window']}/{s['lag_spikes']}",
+            ms(s["worst_ms"]),
+            ms(s["lag_p95_ms"]),
+            f"[red]{s['watchdogs']}[/red]" if s["watchdogs"] else "0",
+            str(len(s["players_online"])),
+            saves,
+        )
+    window = next(iter(snapshots.values()))["window_seconds"] if snapshots else WINDOW
+    table.caption = (
+        f"TPS e atrasos (na janela/total) dos últimos {window:g}s, estimados pelos "
+        'avisos "Can\'t keep up" (ou o /tps do servidor, quando recente)'
+    )
+    return table
+
+
+# --- Arquivos -------------------------------------------------------------------
+
+
+def _read_lines(f, stats, pending=b""):
+    """Alimenta as estatísticas com as linhas completas; retorna o resto (sem \\n)."""
+    for raw in f:
+        if not raw.endswith(b"\n"):
+            pending += raw
+            break
+        stats.feed((pending + raw).decode("utf-8", "replace"))
+        pending = b""
+    return pending
+
+
+def _name(directory, directories):
+    name = os.path.basename(os.path.abspath(directory))
+    names = [os.path.basename(os.path.abspath(d)) for d in directories]
+    return name if names.count(name) == 1 else directory
+
+
+def analyze_ticks(
+    directories, follow: bool = False, window: float = WINDOW, as_json: bool = False
+) -> bool:
+    """Lê o logs/latest.log de cada servidor e mostra a saúde dos ticks.
+
+    Com `follow`, continua lendo os logs até Ctrl+C, atualizando a tabela
+    (o servidor troca de latest.log a cada inicialização).
+    """
+    watched = {}
+    for directory in directories:
+        path = os.path.join(directory, LATEST_LOG)
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            console.print(
+                f"[bold red][ERRO][/bold red] {LATEST_LOG} não encontrado em {directory}."
+            )
+            continue
+        stats = TickStats(window)
+        pending = _read_lines(handle, stats)
+        watched[_name(directory, directories)] = [path, handle, pending, stats]
+    if not watched:
+        return False
+
+    try:
+        if follow:
+            _follow(watched)
+    finally:
+        for _, handle, _, _ in watched.values():
+            handle.close()
+
+    snapshots = {name: w[3].snapshot() for name, w in watched.items()}
+    if as_json:
+        print(json.dumps(snapshots, indent=2))
+    elif not follow:
+        console.print(render_ticks(snapshots))
+    return True
+
+
+def _follow(watched):
+    """Lê o que for escrito nos logs até Ctrl+C, seguindo a troca de arquivo."""
+
+    def table():
+        now = time.time()
+        return render_ticks({n: w[3].snapshot(now) for n, w in watched.items()})
+
+    console.print("[dim]Acompanhando os logs (Ctrl+C para sair)...[/dim]")
+    try:
+        with Live(table(), console=console) as live:
+            while True:
+                time.sleep(FOLLOW_INTERVAL)
+                for entry in watched.values():
+                    path, handle, pending, stats = entry
+                    pending = _read_lines(handle, stats, pending)
+                    try:
+                        newest = os.stat(path)
+                    except FileNotFoundError:
+                        entry[2] = pending
+                        continue
+                    current = os.fstat(handle.fileno())
+                    if (newest.st_ino, newest.st_dev) != (
+                        current.st_ino,
+                        current.st_dev,
+                    ) or newest.st_size < handle.tell():
+                        # Novo latest.log (reinício do servidor)
+                        pending = _read_lines(handle, stats, pending)
+                        handle.close()
+                        handle = open(path, "rb")
+                        pending = _read_lines(handle, stats)
+                    entry[1], entry[2] = handle, pending
+                live.update(table())
+    except KeyboardInterrupt:
+        pass
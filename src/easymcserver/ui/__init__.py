@@ -6,5 +6,8 @@ __all__ = [
     "get_bedrock_download_link",
     "get_java_download_link",
     "get_java_server_type",
+    "get_paper_version",
+    "get_plugin_links",
+    "get_loader_versions",
     "get_memory_menu",
 ]
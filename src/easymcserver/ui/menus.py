@@ -3,10 +3,14 @@ import os
 from InquirerPy import prompt
 from rich.console import Console
 from pathlib import Path
-from easymcserver.downloader.download import server_download
+from easymcserver.downloader.download import server_download, update_server
+from easymcserver.downloader.manifest import resolve_server_jar
 from easymcserver.utils import clear, create_start_script
 from easymcserver.config.properties import server_properties
 from easymcserver.config.jvm_args import edit_jvm_args_file
+from easymcserver.config.cds import train as train_cds
+from easymcserver.config.jvm_profile import generate_jvm_profile, memory_to_mb
+from easymcserver.system.footprint import check_xmx, format_size, plan_memory
 from easymcserver.system.sys_info import (
     check_java_installed,
     check_sys_arch,
@@ -125,6 +129,9 @@ def main_menu(test=False):
                                 "choices": [
                                     "Editar o server.properties",
                                     "Editar as flags da JVM (apenas Java)",
+                                    "Gerar flags da JVM para esta máquina (apenas Java)",
+                                    "Atualizar o servidor",
+                                    "Acelerar a inicialização (CDS, apenas Java)",
                                     "Sair",
                                 ],
                             }
@@ -135,6 +142,12 @@ def main_menu(test=False):
                             quit()
                         elif choice == "Editar o server.properties":
                             server_properties(directory)
+                        elif choice == "Atualizar o servidor":
+                            update_server(directory)
+                        elif choice.startswith("Acelerar a inicialização"):
+                            train_cds(directory)
+                        elif choice.startswith("Gerar flags da JVM"):
+                            generate_jvm_profile(directory)
                         else:
                             edit_jvm_args_file(directory, "w")
 
@@ -172,7 +185,34 @@ def get_bedrock_download_link():
 
 
 def get_java_download_link():
-    """Pergunta o link do Java"""
+    """Pergunta a versão (ou o link) do Java Server e retorna o link de download."""
+    questions = [
+        {
+            "type": "input",
+            "name": "version",
+            "message": 'Versão do servidor Java (ex.: 1.21.4, "latest release", "latest snapshot") ou link de download:',
+            "default": "latest release",
+        }
+    ]
+    answer = prompt(questions)["version"].strip()
+    if answer.startswith(("http://", "https://")):
+        return answer
+
+    try:
+        server = resolve_server_jar(answer)
+    except Exception as e:
+        console.print(
+            f"[bold red][ERRO][/bold red] Não foi possível consultar a lista de versões: {e}"
+        )
+        server = None
+
+    if server:
+        console.print(
+            f"[bold green][OK][/bold green] Versão {server['id']} ({server['type']}) encontrada."
+        )
+        return server["url"]
+
+    # Versão desconhecida ou sem rede: volta para o link manual
     console.print(f"[bold green]Acesse: {JAVA_SERVER_URL}[bold green]")
     questions = [
         {
@@ -185,6 +225,54 @@ def get_java_download_link():
     return prompt(questions)["link"]
 
 
+def get_paper_version():
+    """Pergunta a versão do Minecraft para o Paper."""
+    questions = [
+        {
+            "type": "input",
+            "name": "version",
+            "message": 'Versão do Paper (ex.: 1.21.4 ou "latest"):',
+            "default": "latest",
+        }
+    ]
+    return prompt(questions)["version"].strip()
+
+
+def get_loader_versions(server_type):
+    """Pergunta as versões do Minecraft e do loader de mods (Fabric/NeoForge)."""
+    loader = server_type.split(" ")[0]
+    questions = [
+        {
+            "type": "input",
+            "name": "game_version",
+            "message": 'Versão do Minecraft (ex.: 1.21.1 ou "latest"):',
+            "default": "latest",
+        },
+        {
+            "type": "input",
+            "name": "loader_version",
+            "message": f'Versão do {loader} (ou "latest" para a mais recente estável):',
+            "default": "latest",
+        },
+    ]
+    answers = prompt(questions)
+    return answers["game_version"].strip(), answers["loader_version"].strip()
+
+
+def get_plugin_links():
+    """Pergunta links de plugins para baixar junto com o servidor (opcional)."""
+    questions = [
+        {
+            "type": "input",
+            "name": "plugins",
+            "message": "Links de plugins (.jar) separados por vírgula (deixe em branco para pular):",
+            "default": "",
+        }
+    ]
+    answer = prompt(questions)["plugins"]
+    return [link.strip() for link in answer.split(",") if link.strip()]
+
+
 def select_dir(server_type):
     """Permite ao usuário escolher onde instalar o servidor."""
     questions = [
@@ -338,7 +426,7 @@ def java_selected(total_ram_gb, avaliable_ram_gb, test):
         clear()
         return
 
-    memory_xmx, memory_xms = get_memory_menu(total_ram_gb, avaliable_ram_gb)
+    memory_xmx, memory_xms = get_memory_menu(total_ram_gb, avaliable_ram_gb, output_dir)
 
     # Criação do Script de Inicialização Java
     create_start_script("Java", output_dir, memory_xmx, memory_xms)
@@ -382,19 +470,31 @@ def get_java_server_type(test=False):
                 "type": "list",
                 "name": "java_type",
                 "message": "Escolha o tipo de servidor Java:",
-                "choices": ["Vanilla"],
+                "choices": [
+                    "Vanilla",
+                    "Paper (Otimizado)",
+                    "Fabric (Mods)",
+                    "NeoForge (Mods)",
+                ],
             }
         ]
         return prompt(questions)["java_type"]
 
 
-def get_memory_menu(total_ram_gb, avaliable_ram_gb):
+def get_memory_menu(total_ram_gb, avaliable_ram_gb, directory="."):
     """Gerencia o menu de configuração de RAM com validação."""
+    plan = plan_memory(directory)
     while True:
         try:
             console.print(
                 f"Total de RAM do Sistema: [cyan]{total_ram_gb} GB[/cyan], RAM disponível para uso: [cyan]{avaliable_ram_gb} GB[/cyan]. Configure a memória disponível para a JVM:"
             )
+            if plan["recommended_xmx_mb"]:
+                console.print(
+                    f"Recomendado para esta máquina (já descontando metaspace, threads, GC e outros servidores): "
+                    f"[cyan]Xmx {format_size(plan['recommended_xmx_mb'])}[/cyan], "
+                    f"[cyan]Xms {format_size(plan['recommended_xms_mb'])}[/cyan]."
+                )
             questions = [
                 {
                     "type": "list",
@@ -441,6 +541,9 @@ def get_memory_menu(total_ram_gb, avaliable_ram_gb):
                             f"O valor de Xmx será ajustado para [green]{xms_fmt}B[/green]."
                         )
                         memory_xmx = memory_xms
+                    # Recusa um Xmx que, somado ao que fica fora do heap, levaria a swap
+                    if not check_xmx(directory, memory_to_mb(memory_xmx)):
+                        break
                     if test_xms > avaliable_ram_gb:
                         console.print(
                             f"[bold yellow][AVISO][/bold yellow] A quantidade de memória alocada para a JVM é maior do que a disponível para uso no sistema ([cyan]{avaliable_ram_gb} GB[/cyan]). Se o swap (ou pagefile.sys) for utilizado, a performance do servidor será severamente prejudicada."
@@ -1,7 +1,8 @@
 import os
 from rich.panel import Panel
 from rich.console import Console
-
+from easymcserver.downloader.fabric import LAUNCHER_JAR as FABRIC_LAUNCHER_JAR
+from easymcserver.downloader.neoforge import neoforge_args_file
 
 version_str = "0.2.0"
 
@@ -29,26 +30,34 @@ def clear():
     display_header()
 
 
-def create_start_script(server_type, output_dir, xmx=None, xms=None):
-    """Cria o script de inicialização (start.sh ou start.bat)."""
+def get_launch_target(output_dir):
+    """Retorna o que a JVM deve executar: o jar do servidor ou o argfile do NeoForge."""
+    neoforge_args = neoforge_args_file(output_dir)
+    if neoforge_args:
+        return f"@{neoforge_args}"
+    if os.path.exists(os.path.join(output_dir, FABRIC_LAUNCHER_JAR)):
+        return f"-jar {FABRIC_LAUNCHER_JAR}"
+    return "-jar server.jar"
+
 
+def create_start_script(server_type, output_dir, xmx=None, xms=None, quiet=False):
+    """Cria o script de inicialização (start.sh ou start.bat)."""
     if os.name == "nt":  # Windows
         script_name = "start.bat"
         # O Bedrock usa o .exe
         if server_type == "Bedrock":
             script_content = "bedrock_server.exe"
-        # O Java usa o java.exe
-        else:
-            script_content = f"java -Xmx{xmx} -Xms{xms} -jar server.jar nogui\npause"
-
     else:  # Linux/macOS
         script_name = "start.sh"
         if server_type == "Bedrock":
             script_content = "./bedrock_server"
-        else:
-            script_content = (
-                f"#!/bin/bash\njava -Xmx{xmx} -Xms{xms} -jar server.jar nogui"
-            )
+
+    if server_type != "Bedrock":
+        # Importação local: o launch usa get_launch_target deste módulo
+        from easymcserver.config.launch import build_start_script
+
+        # jvm_args.txt, CDS, afinidade e prioridades (ver config/launch.py)
+        script_content = build_start_script(output_dir, xmx, xms)
 
     script_path = os.path.join(output_dir, script_name)
 
@@ -58,6 +67,7 @@ def create_start_script(server_type, output_dir, xmx=None, xms=None):
     if os.name != "nt":
         os.chmod(script_path, 0o755)  # Permissão de execução no Linux/macOS
 
-    console.print(
-        f"[bold green][OK][/bold green] Script de inicialização '{script_name}' criado em {output_dir}."
-    )
+    if not quiet:
+        console.print(
+            f"[bold green][OK][/bold green] Script de inicialização '{script_name}' criado em {output_dir}."
+        )
@@ -0,0 +1,135 @@
+# Fixtures compartilhadas: cache isolado e um servidor HTTP local (http.server)
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from easymcserver.downloader import http_cache  # noqa: E402
+
+_RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Cada teste usa um cache próprio e nenhum limite de banda."""
+    directory = tmp_path / "cache"
+    monkeypatch.setenv("EASYMC_CACHE_DIR", str(directory))
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+    monkeypatch.delenv("EASYMC_MAX_RATE", raising=False)
+    http_cache._memo.clear()
+    yield directory
+    http_cache._memo.clear()
+
+
+class FileServer:
+    """Servidor HTTP local com arquivos em memória.
+
+    Cada rota aceita:
+    - `ranges`: responde 206 a requisições Range (padrão: True);
+    - `truncate`: manda só essa quantidade de bytes e fecha a conexão;
+    - `delay`: espera antes de responder (para observar concorrência);
+    - `status`: código de resposta fixo (ex.: 404).
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.handle(self)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}{path}"
+
+    def add(self, path: str, body, **options):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+            options.setdefault("content_type", "application/json")
+        self.routes[path] = {"body": body, **options}
+
+    def handle(self, request):
+        with self.lock:
+            self.requests.append((request.path, request.headers.get("Range")))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            self._respond(request)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def _respond(self, request):
+        route = self.routes.get(request.path)
+        if route and route.get("delay"):
+            time.sleep(route["delay"])
+        if route is None or route.get("status"):
+            request.send_response(route.get("status", 404) if route else 404)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+
+        body = route["body"]
+        start, end = 0, len(body) - 1
+        match = _RANGE_RE.match(request.headers.get("Range") or "")
+        partial = bool(match) and route.get("ranges", True)
+        if partial:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), len(body) - 1)
+        chunk = body[start : end + 1]
+
+        request.send_response(206 if partial else 200)
+        request.send_header(
+            "Content-Type", route.get("content_type", "application/octet-stream")
+        )
+        request.send_header("Content-Length", str(len(chunk)))
+        request.send_header("ETag", '"v1"')
+        if partial:
+            request.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        request.end_headers()
+        if route.get("truncate") is not None:
+            request.wfile.write(chunk[: route["truncate"]])
+            request.close_connection = True
+            return
+        request.wfile.write(chunk)
+
+    def get_requests(self, path: str):
+        with self.lock:
+            return [r for p, r in self.requests if p == path]
+
+
+@pytest.fixture
+def http_server():
+    server = FileServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+@pytest.fixture
+def payload():
+    """Conteúdo de teste com alguns blocos de leitura (ver transfer.py)."""
+    return os.urandom(300 * 1024)
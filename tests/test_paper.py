@@ -0,0 +1,127 @@
+import hashlib
+import os
+
+import requests
+
+from easymcserver.downloader.download import download_file_with_progress
+from easymcserver.downloader.paper import download_plugins, resolve_paper
+
+
+def _build(server, version, build_id, channel, jar):
+    name = f"paper-{version}-{build_id}.jar"
+    server.add(f"/jars/{name}", jar)
+    return {
+        "id": build_id,
+        "channel": channel,
+        "downloads": {
+            "server:default": {
+                "name": name,
+                "url": server.url(f"/jars/{name}"),
+                "checksums": {"sha256": hashlib.sha256(jar).hexdigest()},
+            }
+        },
+    }
+
+
+def _paper_api(server, jar):
+    server.add(
+        "/v3/projects/paper",
+        {"versions": {"1.21": ["1.21.4", "1.21.3", "1.21.4-rc1"]}},
+    )
+    # A versão mais nova ainda não tem build estável
+    server.add(
+        "/v3/projects/paper/versions/1.21.4/builds",
+        [_build(server, "1.21.4", 5, "ALPHA", b"alpha")],
+    )
+    server.add(
+        "/v3/projects/paper/versions/1.21.3/builds",
+        [
+            _build(server, "1.21.3", 10, "STABLE", b"old"),
+            _build(server, "1.21.3", 12, "STABLE", jar),
+            _build(server, "1.21.3", 13, "BETA", b"beta"),
+        ],
+    )
+    return server.url("/v3")
+
+
+def test_resolve_latest_stable_build(http_server, payload):
+    build = resolve_paper("latest", api_url=_paper_api(http_server, payload))
+
+    assert build["version"] == "1.21.3"
+    assert build["build"] == 12
+    assert build["name"] == "paper-1.21.3-12.jar"
+    assert build["sha256"] == hashlib.sha256(payload).hexdigest()
+
+
+def test_resolve_specific_version_without_stable_build(http_server, payload):
+    api_url = _paper_api(http_server, payload)
+
+    assert resolve_paper("1.21.4", api_url=api_url) is None
+
+
+def test_paper_jar_is_checked_against_sha256(http_server, payload, tmp_path):
+    build = resolve_paper("latest", api_url=_paper_api(http_server, payload))
+    output_dir = str(tmp_path / "server")
+
+    assert download_file_with_progress(
+        build["url"], "server.jar", output_dir, build["sha256"]
+    )
+    with open(os.path.join(output_dir, "server.jar"), "rb") as f:
+        assert f.read() == payload
+
+    # O mesmo build servido com outro conteúdo é recusado
+    http_server.add(f"/jars/{build['name']}", payload[:-1] + b"x")
+    other_dir = str(tmp_path / "other")
+    os.remove(tmp_path / "cache" / "objects" / build["sha256"])
+    assert not download_file_with_progress(
+        build["url"], "server.jar", other_dir, build["sha256"]
+    )
+    assert not os.path.exists(os.path.join(other_dir, "server.jar"))
+    assert not os.path.exists(os.path.join(other_dir, "server.jar.part"))
+
+
+def test_download_plugins_concurrently(http_server, tmp_path):
+    plugins = []
+    for i in range(6):
+        body = f"plugin {i}".encode() * 1000
+        http_server.add(f"/plugins/plugin{i}.jar", body, delay=0.2)
+        plugins.append(http_server.url(f"/plugins/plugin{i}.jar"))
+    checked = b"verificado" * 1000
+    http_server.add("/plugins/checked.jar", checked, delay=0.2)
+    plugins.append(
+        {
+            "url": http_server.url("/plugins/checked.jar"),
+            "name": "Checked.jar",
+            "sha256": hashlib.sha256(checked).hexdigest(),
+        }
+    )
+
+    with requests.Session() as session:
+        assert download_plugins(plugins, str(tmp_path), session=session)
+
+    plugins_dir = tmp_path / "plugins"
+    for i in range(6):
+        assert (plugins_dir / f"plugin{i}.jar").read_bytes() == (
+            f"plugin {i}".encode() * 1000
+        )
+    assert (plugins_dir / "Checked.jar").read_bytes() == checked
+    assert http_server.max_active > 1
+
+
+def test_download_plugins_reports_failures(http_server, tmp_path):
+    http_server.add("/plugins/ok.jar", b"ok" * 1000)
+    http_server.add("/plugins/missing.jar", b"", status=404)
+
+    with requests.Session() as session:
+        ok = download_plugins(
+            [
+                http_server.url("/plugins/ok.jar"),
+                http_server.url("/plugins/missing.jar"),
+            ],
+            str(tmp_path),
+            session=session,
+        )
+
+    assert not ok
+    assert (tmp_path / "plugins" / "ok.jar").read_bytes() == b"ok" * 1000
+    assert not (tmp_path / "plugins" / "missing.jar").exists()
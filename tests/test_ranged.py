@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+
+import pytest
+import requests
+
+from easymcserver.downloader.ranged import ranged_download
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_resumes_from_part(http_server, payload, tmp_path):
+    http_server.add("/server.jar", payload)
+    url = http_server.url("/server.jar")
+    dest = str(tmp_path / "server.jar")
+    digest = _sha256(payload)
+
+    # Download interrompido na metade: .part do tamanho final + estado salvo
+    half = len(payload) // 2
+    with open(dest + ".part", "wb") as f:
+        f.write(payload[:half])
+        f.truncate(len(payload))
+    with open(dest + ".part.json", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "url": url,
+                "size": len(payload),
+                "validator": digest,
+                "segments": [[0, len(payload) - 1, half]],
+            },
+            f,
+        )
+
+    assert ranged_download(url, dest, expected_hash=digest) == dest
+
+    with open(dest, "rb") as f:
+        assert f.read() == payload
+    assert not os.path.exists(dest + ".part")
+    assert not os.path.exists(dest + ".part.json")
+    # Só a sonda e o que faltava foram pedidos de novo
+    assert http_server.get_requests("/server.jar") == [
+        "bytes=0-0",
+        f"bytes={half}-{len(payload) - 1}",
+    ]
+
+
+def test_ignores_part_from_another_file(http_server, payload, tmp_path):
+    http_server.add("/server.jar", payload)
+    url = http_server.url("/server.jar")
+    dest = str(tmp_path / "server.jar")
+
+    with open(dest + ".part", "wb") as f:
+        f.write(b"\0" * len(payload))
+    with open(dest + ".part.json", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "url": url,
+                "size": len(payload),
+                "validator": '"v0"',
+                "segments": [[0, len(payload) - 1, len(payload)]],
+            },
+            f,
+        )
+
+    ranged_download(url, dest)
+
+    with open(dest, "rb") as f:
+        assert f.read() == payload
+
+
+def test_falls_back_without_accept_ranges(http_server, payload, tmp_path):
+    http_server.add("/server.jar", payload, ranges=False)
+    dest = str(tmp_path / "server.jar")
+    progress = []
+
+    ranged_download(
+        http_server.url("/server.jar"),
+        dest,
+        expected_hash=_sha256(payload),
+        on_progress=lambda done, total: progress.append((done, total)),
+    )
+
+    with open(dest, "rb") as f:
+        assert f.read() == payload
+    assert not os.path.exists(dest + ".part")
+    # Sonda + uma única conexão com o arquivo inteiro
+    assert len(http_server.get_requests("/server.jar")) == 2
+    assert progress[-1] == (len(payload), len(payload))
+
+
+def test_truncated_body_is_not_accepted(http_server, payload, tmp_path):
+    http_server.add("/server.jar", payload, ranges=False, truncate=len(payload) // 2)
+    dest = str(tmp_path / "server.jar")
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        ranged_download(http_server.url("/server.jar"), dest)
+
+    assert not os.path.exists(dest)
+
+
+def test_hash_mismatch_removes_part(http_server, payload, tmp_path):
+    http_server.add("/server.jar", payload)
+    dest = str(tmp_path / "server.jar")
+
+    with pytest.raises(ValueError):
+        ranged_download(
+            http_server.url("/server.jar"), dest, expected_hash=_sha256(b"outro")
+        )
+
+    assert not os.path.exists(dest)
+    assert not os.path.exists(dest + ".part")
+    assert not os.path.exists(dest + ".part.json")